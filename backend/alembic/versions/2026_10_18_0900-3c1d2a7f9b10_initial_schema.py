@@ -0,0 +1,156 @@
+"""initial schema
+
+Revision ID: 3c1d2a7f9b10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d2a7f9b10'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tenants',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('type', sa.Enum('government', 'business', 'corporate', name='tenanttype'), nullable=False),
+        sa.Column('contact_phone', sa.String(length=20), nullable=True),
+        sa.Column('contact_email', sa.String(length=100), nullable=True),
+        sa.Column('office_address', sa.Text(), nullable=True),
+        sa.Column('working_hours', sa.String(length=100), nullable=True),
+        sa.Column('allowed_source_types', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_table(
+        'users',
+        sa.Column('phone_number', sa.String(length=20), nullable=False),
+        sa.Column('last_known_location', sa.String(length=100), nullable=True),
+        sa.Column('subscribed_tenants', postgresql.ARRAY(sa.UUID()), nullable=True),
+        sa.Column('last_interaction_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('opted_out', sa.Boolean(), nullable=False),
+        sa.Column('preferred_language', sa.String(length=10), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('phone_number'),
+    )
+    op.create_table(
+        'location_aliases',
+        sa.Column('alias', sa.String(length=100), nullable=False),
+        sa.Column('canonical_location', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('alias'),
+    )
+    op.create_table(
+        'notices',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column(
+            'source_type',
+            sa.Enum('official_notice', 'advisory', 'service_notice', name='noticesourcetype'),
+            nullable=False,
+        ),
+        sa.Column('approved_by', sa.String(length=100), nullable=True),
+        sa.Column('publish_status', sa.Enum('draft', 'approved', 'archived', name='noticestatus'), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=True),
+        sa.Column('validity_start', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('validity_end', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('file_type', sa.Enum('pdf', 'docx', 'jpg', 'png', 'text', name='filetype'), nullable=False),
+        sa.Column('original_file_path', sa.Text(), nullable=True),
+        sa.Column('ocr_processed', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'embeddings',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('notice_id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('chunk_text', sa.Text(), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['notice_id'], ['notices.id']),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'queries',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        sa.Column('tenant_id', sa.UUID(), nullable=True),
+        sa.Column('query_text', sa.Text(), nullable=False),
+        sa.Column('query_language', sa.String(length=10), nullable=True),
+        sa.Column('location', sa.String(length=100), nullable=True),
+        sa.Column('response_text', sa.Text(), nullable=True),
+        sa.Column('response_language', sa.String(length=10), nullable=True),
+        sa.Column('response_type', sa.String(length=50), nullable=True),
+        sa.Column('retrieved_chunks', postgresql.ARRAY(sa.UUID()), nullable=True),
+        sa.Column('latency_ms', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['phone_number'], ['users.phone_number']),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'unanswered_queries',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        sa.Column('tenant_id', sa.UUID(), nullable=True),
+        sa.Column('query_text', sa.Text(), nullable=False),
+        sa.Column('query_language', sa.String(length=10), nullable=True),
+        sa.Column('location', sa.String(length=100), nullable=True),
+        sa.Column('reason', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'broadcasts',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=True),
+        sa.Column('notice_id', sa.UUID(), nullable=True),
+        sa.Column('message_text', sa.Text(), nullable=False),
+        sa.Column('target_location', sa.String(length=100), nullable=True),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['notice_id'], ['notices.id']),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('broadcasts')
+    op.drop_table('unanswered_queries')
+    op.drop_table('queries')
+    op.drop_table('embeddings')
+    op.drop_table('notices')
+    op.drop_table('location_aliases')
+    op.drop_table('users')
+    op.drop_table('tenants')
+    sa.Enum(name='filetype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='noticestatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='noticesourcetype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='tenanttype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,61 @@
+"""embedding vector column and ANN index
+
+Revision ID: 8e4b6f1a2c55
+Revises: 3c1d2a7f9b10
+Create Date: 2026-10-18 09:30:00.000000
+
+The ANN index type defaults to HNSW. Pass ``-x vector_index=ivfflat`` to
+build IVFFlat instead (faster to build, lower recall; tune
+``IVFFLAT_PROBES`` at query time).
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b6f1a2c55'
+down_revision: Union[str, Sequence[str], None] = '3c1d2a7f9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIM = 1536
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    index_type = context.get_x_argument(as_dictionary=True).get('vector_index', 'hnsw')
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.add_column('embeddings', sa.Column('embedding', Vector(EMBEDDING_DIM), nullable=False))
+    if index_type == 'ivfflat':
+        op.create_index(
+            'ix_embeddings_embedding_ann',
+            'embeddings',
+            ['embedding'],
+            postgresql_using='ivfflat',
+            postgresql_with={'lists': 100},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        )
+    else:
+        op.create_index(
+            'ix_embeddings_embedding_ann',
+            'embeddings',
+            ['embedding'],
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        )
+    # Tenant/location pre-filter for the vector scan
+    op.create_index('ix_embeddings_tenant_location', 'embeddings', ['tenant_id', 'location'])
+    op.create_index('ix_embeddings_notice_id', 'embeddings', ['notice_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_embeddings_notice_id', table_name='embeddings')
+    op.drop_index('ix_embeddings_tenant_location', table_name='embeddings')
+    op.drop_index('ix_embeddings_embedding_ann', table_name='embeddings')
+    op.drop_column('embeddings', 'embedding')
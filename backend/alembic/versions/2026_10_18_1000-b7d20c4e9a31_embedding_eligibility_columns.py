@@ -0,0 +1,152 @@
+"""denormalized retrieval eligibility on embeddings
+
+Revision ID: b7d20c4e9a31
+Revises: 8e4b6f1a2c55
+Create Date: 2026-10-18 10:00:00.000000
+
+Copies notice/tenant eligibility (approved, tenant active, validity_end,
+title) onto each embedding row so retrieval is a single-table vector
+search over partial indexes. Triggers keep the copies in sync with
+notices and tenants; expired rows are flipped by the app's expiry
+sweeper and also filtered at query time.
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d20c4e9a31'
+down_revision: Union[str, Sequence[str], None] = '8e4b6f1a2c55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ELIGIBILITY_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION embeddings_fill_eligibility() RETURNS trigger AS $$
+BEGIN
+    SELECT n.publish_status = 'approved' AND t.is_active
+               AND (n.validity_end IS NULL OR n.validity_end > NOW()),
+           n.validity_end,
+           n.title
+      INTO NEW.is_active, NEW.validity_end, NEW.notice_title
+      FROM notices n
+      JOIN tenants t ON t.id = n.tenant_id
+     WHERE n.id = NEW.notice_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notices_sync_embeddings() RETURNS trigger AS $$
+BEGIN
+    UPDATE embeddings e
+       SET is_active = NEW.publish_status = 'approved' AND t.is_active
+               AND (NEW.validity_end IS NULL OR NEW.validity_end > NOW()),
+           validity_end = NEW.validity_end,
+           notice_title = NEW.title
+      FROM tenants t
+     WHERE e.notice_id = NEW.id
+       AND t.id = NEW.tenant_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION tenants_sync_embeddings() RETURNS trigger AS $$
+BEGIN
+    UPDATE embeddings e
+       SET is_active = NEW.is_active AND n.publish_status = 'approved'
+               AND (n.validity_end IS NULL OR n.validity_end > NOW())
+      FROM notices n
+     WHERE e.notice_id = n.id
+       AND e.tenant_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+ELIGIBILITY_TRIGGERS = """
+CREATE TRIGGER embeddings_fill_eligibility
+    BEFORE INSERT ON embeddings
+    FOR EACH ROW EXECUTE FUNCTION embeddings_fill_eligibility();
+
+CREATE TRIGGER notices_sync_embeddings
+    AFTER UPDATE OF publish_status, validity_end, title ON notices
+    FOR EACH ROW
+    WHEN (OLD.publish_status IS DISTINCT FROM NEW.publish_status
+          OR OLD.validity_end IS DISTINCT FROM NEW.validity_end
+          OR OLD.title IS DISTINCT FROM NEW.title)
+    EXECUTE FUNCTION notices_sync_embeddings();
+
+CREATE TRIGGER tenants_sync_embeddings
+    AFTER UPDATE OF is_active ON tenants
+    FOR EACH ROW
+    WHEN (OLD.is_active IS DISTINCT FROM NEW.is_active)
+    EXECUTE FUNCTION tenants_sync_embeddings();
+"""
+
+BACKFILL = """
+UPDATE embeddings e
+   SET is_active = n.publish_status = 'approved' AND t.is_active
+           AND (n.validity_end IS NULL OR n.validity_end > NOW()),
+       validity_end = n.validity_end,
+       notice_title = n.title
+  FROM notices n
+  JOIN tenants t ON t.id = n.tenant_id
+ WHERE e.notice_id = n.id;
+"""
+
+
+def _create_ann_index(where: str | None) -> None:
+    index_type = context.get_x_argument(as_dictionary=True).get('vector_index', 'hnsw')
+    if index_type == 'ivfflat':
+        using, params = 'ivfflat', {'lists': 100}
+    else:
+        using, params = 'hnsw', {'m': 16, 'ef_construction': 64}
+    op.create_index(
+        'ix_embeddings_embedding_ann',
+        'embeddings',
+        ['embedding'],
+        postgresql_using=using,
+        postgresql_with=params,
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+        postgresql_where=sa.text(where) if where else None,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('embeddings', sa.Column('is_active', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('embeddings', sa.Column('validity_end', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('embeddings', sa.Column('notice_title', sa.String(length=500), nullable=True))
+    op.execute(ELIGIBILITY_FUNCTIONS)
+    op.execute(ELIGIBILITY_TRIGGERS)
+    op.execute(BACKFILL)
+
+    # Only eligible rows are indexed, so the ANN scan never visits drafts/archived/inactive tenants
+    op.drop_index('ix_embeddings_embedding_ann', table_name='embeddings')
+    _create_ann_index('is_active')
+    op.drop_index('ix_embeddings_tenant_location', table_name='embeddings')
+    op.create_index(
+        'ix_embeddings_active_tenant_location',
+        'embeddings',
+        ['tenant_id', 'location'],
+        postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_embeddings_active_tenant_location', table_name='embeddings')
+    op.create_index('ix_embeddings_tenant_location', 'embeddings', ['tenant_id', 'location'])
+    op.drop_index('ix_embeddings_embedding_ann', table_name='embeddings')
+    _create_ann_index(None)
+    op.execute('DROP TRIGGER IF EXISTS tenants_sync_embeddings ON tenants')
+    op.execute('DROP TRIGGER IF EXISTS notices_sync_embeddings ON notices')
+    op.execute('DROP TRIGGER IF EXISTS embeddings_fill_eligibility ON embeddings')
+    op.execute('DROP FUNCTION IF EXISTS tenants_sync_embeddings()')
+    op.execute('DROP FUNCTION IF EXISTS notices_sync_embeddings()')
+    op.execute('DROP FUNCTION IF EXISTS embeddings_fill_eligibility()')
+    op.drop_column('embeddings', 'notice_title')
+    op.drop_column('embeddings', 'validity_end')
+    op.drop_column('embeddings', 'is_active')
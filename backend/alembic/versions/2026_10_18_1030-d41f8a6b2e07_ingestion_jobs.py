@@ -0,0 +1,56 @@
+"""ingestion job queue
+
+Revision ID: d41f8a6b2e07
+Revises: b7d20c4e9a31
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f8a6b2e07'
+down_revision: Union[str, Sequence[str], None] = 'b7d20c4e9a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ingestion_state = sa.Enum('queued', 'ocr', 'chunking', 'embedding', 'indexed', 'failed', name='ingestionstate')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('notice_id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('state', ingestion_state, nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['notice_id'], ['notices.id']),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Claim scan only touches unfinished jobs
+    op.create_index(
+        'ix_ingestion_jobs_open',
+        'ingestion_jobs',
+        ['state', 'created_at'],
+        postgresql_where=sa.text("state NOT IN ('indexed', 'failed')"),
+    )
+    op.create_index('ix_ingestion_jobs_notice_id', 'ingestion_jobs', ['notice_id', 'created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingestion_jobs_notice_id', table_name='ingestion_jobs')
+    op.drop_index('ix_ingestion_jobs_open', table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    ingestion_state.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,34 @@
+"""unique (notice_id, chunk_index) on embeddings
+
+Revision ID: 5a9c3e71d8f2
+Revises: d41f8a6b2e07
+Create Date: 2026-10-18 11:00:00.000000
+
+Lets the bulk writer upsert chunks so re-ingesting a notice is
+idempotent. The unique index also serves notice_id lookups, replacing
+ix_embeddings_notice_id.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9c3e71d8f2'
+down_revision: Union[str, Sequence[str], None] = 'd41f8a6b2e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_unique_constraint('uq_embeddings_notice_chunk', 'embeddings', ['notice_id', 'chunk_index'])
+    op.drop_index('ix_embeddings_notice_id', table_name='embeddings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_embeddings_notice_id', 'embeddings', ['notice_id'])
+    op.drop_constraint('uq_embeddings_notice_chunk', 'embeddings', type_='unique')
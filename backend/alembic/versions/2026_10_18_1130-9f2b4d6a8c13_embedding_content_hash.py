@@ -0,0 +1,48 @@
+"""content-hash chunk identity on embeddings
+
+Revision ID: 9f2b4d6a8c13
+Revises: 5a9c3e71d8f2
+Create Date: 2026-10-18 11:30:00.000000
+
+Chunks are identified by (notice_id, content_hash) instead of their
+position, so re-publishing an edited notice only embeds new or changed
+chunks. Existing rows are backfilled with the same sha256 the ingestion
+pipeline computes; duplicate chunks within a notice keep the first.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f2b4d6a8c13'
+down_revision: Union[str, Sequence[str], None] = '5a9c3e71d8f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('embeddings', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.execute("UPDATE embeddings SET content_hash = encode(sha256(convert_to(chunk_text, 'UTF8')), 'hex')")
+    op.execute(
+        """
+        DELETE FROM embeddings e
+        USING embeddings first
+        WHERE e.notice_id = first.notice_id
+            AND e.content_hash = first.content_hash
+            AND e.chunk_index > first.chunk_index
+        """
+    )
+    op.alter_column('embeddings', 'content_hash', nullable=False)
+    op.create_unique_constraint('uq_embeddings_notice_content_hash', 'embeddings', ['notice_id', 'content_hash'])
+    op.drop_constraint('uq_embeddings_notice_chunk', 'embeddings', type_='unique')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_unique_constraint('uq_embeddings_notice_chunk', 'embeddings', ['notice_id', 'chunk_index'])
+    op.drop_constraint('uq_embeddings_notice_content_hash', 'embeddings', type_='unique')
+    op.drop_column('embeddings', 'content_hash')
@@ -0,0 +1,60 @@
+"""broadcast fan-out status and checkpoint columns
+
+Revision ID: c83e5b1f0a47
+Revises: 9f2b4d6a8c13
+Create Date: 2026-10-18 12:00:00.000000
+
+Broadcasts are queued by the API and sent by the worker; these columns
+hold the claim, heartbeat and resume cursor. Existing rows were sent
+inline, so they are marked completed.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c83e5b1f0a47'
+down_revision: Union[str, Sequence[str], None] = '9f2b4d6a8c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+broadcast_status = sa.Enum('queued', 'sending', 'completed', 'failed', name='broadcaststatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    broadcast_status.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        'broadcasts',
+        sa.Column('status', broadcast_status, server_default='completed', nullable=False),
+    )
+    op.alter_column('broadcasts', 'status', server_default=None)
+    op.add_column('broadcasts', sa.Column('total_count', sa.Integer(), nullable=True))
+    op.add_column('broadcasts', sa.Column('last_phone_number', sa.String(length=20), nullable=True))
+    op.add_column('broadcasts', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('broadcasts', sa.Column('error', sa.Text(), nullable=True))
+    op.add_column('broadcasts', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('broadcasts', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    # Claim scan only touches unfinished broadcasts
+    op.create_index(
+        'ix_broadcasts_open',
+        'broadcasts',
+        ['status', 'created_at'],
+        postgresql_where=sa.text("status IN ('queued', 'sending')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_broadcasts_open', table_name='broadcasts')
+    op.drop_column('broadcasts', 'completed_at')
+    op.drop_column('broadcasts', 'heartbeat_at')
+    op.drop_column('broadcasts', 'error')
+    op.drop_column('broadcasts', 'attempts')
+    op.drop_column('broadcasts', 'last_phone_number')
+    op.drop_column('broadcasts', 'total_count')
+    op.drop_column('broadcasts', 'status')
+    broadcast_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,50 @@
+"""indexes for broadcast target selection
+
+Revision ID: e6a1c9d3b5f8
+Revises: c83e5b1f0a47
+Create Date: 2026-10-18 12:30:00.000000
+
+Both are partial on opted-in users, which is every target query's first
+filter. The GIN index serves ``subscribed_tenants @> ARRAY[tenant]``. The
+location index serves located broadcasts and returns rows in keyset
+(phone_number) order within each location.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c9d3b5f8'
+down_revision: Union[str, Sequence[str], None] = 'c83e5b1f0a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_users_subscribed_tenants_gin',
+        'users',
+        ['subscribed_tenants'],
+        postgresql_using='gin',
+        postgresql_where=sa.text('opted_out IS NOT TRUE'),
+    )
+    op.create_index(
+        'ix_users_location_phone',
+        'users',
+        [sa.text('lower(last_known_location)'), 'phone_number'],
+        postgresql_where=sa.text('opted_out IS NOT TRUE'),
+    )
+    op.create_index('ix_location_aliases_alias_lower', 'location_aliases', [sa.text('lower(alias)')])
+    op.create_index('ix_location_aliases_canonical_lower', 'location_aliases', [sa.text('lower(canonical_location)')])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_location_aliases_canonical_lower', table_name='location_aliases')
+    op.drop_index('ix_location_aliases_alias_lower', table_name='location_aliases')
+    op.drop_index('ix_users_location_phone', table_name='users')
+    op.drop_index('ix_users_subscribed_tenants_gin', table_name='users')
@@ -0,0 +1,62 @@
+"""delivery events and per-broadcast delivery counters
+
+Revision ID: 1b7f3e9c2d64
+Revises: e6a1c9d3b5f8
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7f3e9c2d64'
+down_revision: Union[str, Sequence[str], None] = 'e6a1c9d3b5f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'delivery_events',
+        sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('broadcast_id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=True),
+        sa.Column('message_sid', sa.String(length=64), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('error_code', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id']),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('message_sid', 'status', name='uq_delivery_events_message_status'),
+    )
+    op.create_index('ix_delivery_events_broadcast_id', 'delivery_events', ['broadcast_id', 'created_at'])
+    op.create_table(
+        'broadcast_delivery_stats',
+        sa.Column('broadcast_id', sa.UUID(), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=True),
+        sa.Column('sent', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('delivered', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('read', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('failed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id']),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('broadcast_id', 'location'),
+    )
+    op.create_index('ix_broadcast_delivery_stats_tenant', 'broadcast_delivery_stats', ['tenant_id', 'location'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_broadcast_delivery_stats_tenant', table_name='broadcast_delivery_stats')
+    op.drop_table('broadcast_delivery_stats')
+    op.drop_index('ix_delivery_events_broadcast_id', table_name='delivery_events')
+    op.drop_table('delivery_events')
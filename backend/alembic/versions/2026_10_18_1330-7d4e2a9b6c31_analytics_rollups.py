@@ -0,0 +1,85 @@
+"""analytics rollup tables
+
+Revision ID: 7d4e2a9b6c31
+Revises: 1b7f3e9c2d64
+Create Date: 2026-10-18 13:30:00.000000
+
+Dashboards read these instead of scanning queries/unanswered_queries.
+BRIN indexes on the append-only created_at columns keep each incremental
+merge window cheap to find.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e2a9b6c31'
+down_revision: Union[str, Sequence[str], None] = '1b7f3e9c2d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'query_rollups',
+        sa.Column('granularity', sa.String(length=5), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('answered', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'tenant_id', 'language', 'location'),
+    )
+    op.create_index('ix_query_rollups_tenant_bucket', 'query_rollups', ['tenant_id', 'granularity', 'bucket_start'])
+    op.create_table(
+        'query_text_rollups',
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('query_key', sa.String(length=200), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('bucket_start', 'tenant_id', 'query_key', 'language'),
+    )
+    op.create_index('ix_query_text_rollups_tenant_bucket', 'query_text_rollups', ['tenant_id', 'bucket_start'])
+    op.create_table(
+        'unanswered_rollups',
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('query_key', sa.String(length=200), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('bucket_start', 'tenant_id', 'query_key', 'language', 'location'),
+    )
+    op.create_index('ix_unanswered_rollups_tenant_bucket', 'unanswered_rollups', ['tenant_id', 'bucket_start'])
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('processed_until', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_index('ix_queries_created_at_brin', 'queries', ['created_at'], postgresql_using='brin')
+    op.create_index(
+        'ix_unanswered_queries_created_at_brin', 'unanswered_queries', ['created_at'], postgresql_using='brin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_unanswered_queries_created_at_brin', table_name='unanswered_queries')
+    op.drop_index('ix_queries_created_at_brin', table_name='queries')
+    op.drop_table('rollup_watermarks')
+    op.drop_index('ix_unanswered_rollups_tenant_bucket', table_name='unanswered_rollups')
+    op.drop_table('unanswered_rollups')
+    op.drop_index('ix_query_text_rollups_tenant_bucket', table_name='query_text_rollups')
+    op.drop_table('query_text_rollups')
+    op.drop_index('ix_query_rollups_tenant_bucket', table_name='query_rollups')
+    op.drop_table('query_rollups')
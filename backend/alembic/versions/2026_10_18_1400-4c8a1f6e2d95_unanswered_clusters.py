@@ -0,0 +1,96 @@
+"""unanswered query clusters
+
+Revision ID: 4c8a1f6e2d95
+Revises: 7d4e2a9b6c31
+Create Date: 2026-10-18 14:00:00.000000
+
+Replaces the exact-text unanswered rollup with MinHash/LSH clusters:
+unanswered_cluster_bands is the LSH index, unanswered_cluster_stats the
+daily per-cluster counts the gap report reads. Queries still waiting to be
+clustered are found through a partial index on cluster_id IS NULL.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8a1f6e2d95'
+down_revision: Union[str, Sequence[str], None] = '7d4e2a9b6c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'unanswered_clusters',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('representative_text', sa.Text(), nullable=False),
+        sa.Column('signature', sa.ARRAY(sa.BigInteger()), nullable=False),
+        sa.Column('query_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'unanswered_cluster_bands',
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('band_hash', sa.BigInteger(), nullable=False),
+        sa.Column('cluster_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.ForeignKeyConstraint(['cluster_id'], ['unanswered_clusters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tenant_id', 'band_hash', 'cluster_id'),
+    )
+    op.create_table(
+        'unanswered_cluster_stats',
+        sa.Column('cluster_id', sa.UUID(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['cluster_id'], ['unanswered_clusters.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('cluster_id', 'bucket_start', 'language', 'location'),
+    )
+    op.create_index(
+        'ix_unanswered_cluster_stats_tenant_bucket', 'unanswered_cluster_stats', ['tenant_id', 'bucket_start'],
+    )
+    op.add_column('unanswered_queries', sa.Column('cluster_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'fk_unanswered_queries_cluster_id', 'unanswered_queries', 'unanswered_clusters', ['cluster_id'], ['id'],
+    )
+    op.create_index(
+        'ix_unanswered_queries_unclustered', 'unanswered_queries', ['created_at'],
+        postgresql_where=sa.text('cluster_id IS NULL AND tenant_id IS NOT NULL'),
+    )
+    op.drop_index('ix_unanswered_rollups_tenant_bucket', table_name='unanswered_rollups')
+    op.drop_table('unanswered_rollups')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        'unanswered_rollups',
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('query_key', sa.String(length=200), nullable=False),
+        sa.Column('language', sa.String(length=10), nullable=False),
+        sa.Column('location', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('bucket_start', 'tenant_id', 'query_key', 'language', 'location'),
+    )
+    op.create_index('ix_unanswered_rollups_tenant_bucket', 'unanswered_rollups', ['tenant_id', 'bucket_start'])
+    op.drop_index('ix_unanswered_queries_unclustered', table_name='unanswered_queries')
+    op.drop_constraint('fk_unanswered_queries_cluster_id', 'unanswered_queries', type_='foreignkey')
+    op.drop_column('unanswered_queries', 'cluster_id')
+    op.drop_index('ix_unanswered_cluster_stats_tenant_bucket', table_name='unanswered_cluster_stats')
+    op.drop_table('unanswered_cluster_stats')
+    op.drop_table('unanswered_cluster_bands')
+    op.drop_table('unanswered_clusters')
@@ -0,0 +1,41 @@
+"""query rollup counters for extractive vs generated replies
+
+Revision ID: b5e9d2a7c4f1
+Revises: a2d7f4c9e1b3
+Create Date: 2026-10-18 15:00:00.000000
+
+Existing buckets start at zero for the new counters; only rows merged
+after the upgrade are split by response path.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9d2a7c4f1'
+down_revision: Union[str, Sequence[str], None] = 'a2d7f4c9e1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('query_rollups', sa.Column('extractive', sa.Integer(), server_default='0', nullable=False))
+    op.add_column(
+        'query_rollups', sa.Column('extractive_latency_ms', sa.BigInteger(), server_default='0', nullable=False),
+    )
+    op.add_column('query_rollups', sa.Column('generated', sa.Integer(), server_default='0', nullable=False))
+    op.add_column(
+        'query_rollups', sa.Column('generated_latency_ms', sa.BigInteger(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('query_rollups', 'generated_latency_ms')
+    op.drop_column('query_rollups', 'generated')
+    op.drop_column('query_rollups', 'extractive_latency_ms')
+    op.drop_column('query_rollups', 'extractive')
@@ -0,0 +1,30 @@
+"""tenant departments
+
+Revision ID: d8b3e5f1a9c6
+Revises: c1f6a8e3d2b7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b3e5f1a9c6'
+down_revision: Union[str, Sequence[str], None] = 'c1f6a8e3d2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tenants', sa.Column('department', sa.String(length=50), nullable=True))
+    op.create_unique_constraint('tenants_department_key', 'tenants', ['department'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('tenants_department_key', 'tenants', type_='unique')
+    op.drop_column('tenants', 'department')
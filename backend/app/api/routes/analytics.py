@@ -1,62 +1,62 @@
-from fastapi import APIRouter, Depends
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.deps import get_current_user, get_tenant_id
+from app.db.session import get_session
 from app.schemas.analytics import BroadcastCoverageResponse, QueryAnalyticsResponse, UnansweredQueriesResponse
+from app.services.analytics import get_query_analytics, get_unanswered_analytics, resolve_range
+from app.services.delivery import get_broadcast_coverage
 
 router = APIRouter()
 
 
 @router.get("/analytics/queries", response_model=QueryAnalyticsResponse)
 async def query_analytics(
+    start: datetime | None = None,
+    end: datetime | None = None,
     tenant_id: str = Depends(get_tenant_id),
     _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> QueryAnalyticsResponse:
-    _ = tenant_id
-    return QueryAnalyticsResponse(
-        total_queries=150,
-        answered_queries=120,
-        unanswered_queries=30,
-        automated_rate=0.7,
-        top_queries=[
-            {"query": "vaccination camp", "count": 45, "language": "hi"},
-            {"query": "power outage", "count": 30, "language": "en"},
-        ],
-        language_distribution={"hi": 60, "en": 50, "ta": 40},
-    )
+    try:
+        start, end = resolve_range(start, end, default=timedelta(days=7))
+        analytics = await get_query_analytics(session, tenant_id, start, end)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return QueryAnalyticsResponse(**analytics)
 
 
 @router.get("/analytics/unanswered", response_model=UnansweredQueriesResponse)
 async def unanswered_analytics(
+    start: datetime | None = None,
+    end: datetime | None = None,
     tenant_id: str = Depends(get_tenant_id),
     _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> UnansweredQueriesResponse:
-    _ = tenant_id
+    try:
+        start, end = resolve_range(start, end, default=timedelta(days=7))
+        unanswered = await get_unanswered_analytics(session, tenant_id, start, end)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     return UnansweredQueriesResponse(
-        week="2026-01-19 to 2026-01-25",
-        unanswered_queries=[
-            {
-                "query": "garbage collection schedule",
-                "count": 37,
-                "locations": ["Ward 5", "Ward 12"],
-                "languages": ["hi", "en"],
-            }
-        ],
+        week=f"{start.date()} to {(end - timedelta(microseconds=1)).date()}",
+        unanswered_queries=unanswered,
     )
 
 
 @router.get("/analytics/broadcast-coverage", response_model=BroadcastCoverageResponse)
 async def broadcast_coverage(
+    broadcast_id: uuid.UUID | None = None,
     tenant_id: str = Depends(get_tenant_id),
     _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> BroadcastCoverageResponse:
-    return BroadcastCoverageResponse(
-        tenant_id=tenant_id,
-        coverage=[
-            {
-                "location": "Ward 12",
-                "boundary": {"type": "Polygon", "coordinates": []},
-                "sent_count": 150,
-                "success_rate": 0.95,
-            }
-        ],
-    )
+    try:
+        coverage = await get_broadcast_coverage(session, tenant_id, broadcast_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid X-Tenant-Id")
+    return BroadcastCoverageResponse(tenant_id=tenant_id, coverage=coverage)
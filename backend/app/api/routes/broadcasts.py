@@ -1,14 +1,30 @@
-from fastapi import APIRouter, Depends
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.routes.notices import get_tenant_notice
 from app.core.deps import get_current_user, get_tenant_id
 from app.db.session import get_session
+from app.models import Broadcast
+from app.models.tables import BroadcastStatus
 from app.schemas.broadcasts import BroadcastCreate, BroadcastResponse
-from app.services.broadcast import get_broadcast_targets, send_whatsapp_broadcast
 
 router = APIRouter()
 
 
+def to_broadcast_response(broadcast: Broadcast) -> BroadcastResponse:
+    return BroadcastResponse(
+        id=str(broadcast.id),
+        status=broadcast.status.value,
+        sent_count=broadcast.sent_count,
+        failed_count=broadcast.failed_count,
+        total_count=broadcast.total_count,
+        error=broadcast.error,
+        completed_at=broadcast.completed_at,
+    )
+
+
 @router.post("/broadcasts", response_model=BroadcastResponse)
 async def create_broadcast(
     payload: BroadcastCreate,
@@ -16,6 +32,35 @@ async def create_broadcast(
     _: dict = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> BroadcastResponse:
-    targets = await get_broadcast_targets(session, tenant_id, payload.target_location)
-    sent, failed = await send_whatsapp_broadcast(targets, payload.message)
-    return BroadcastResponse(id="stub-id", status="sent", sent_count=sent, failed_count=failed)
+    # Fan-out runs in the worker; poll GET /broadcasts/{id} for progress
+    notice = await get_tenant_notice(session, payload.notice_id, tenant_id)
+    broadcast = Broadcast(
+        id=uuid.uuid4(),
+        tenant_id=notice.tenant_id,
+        notice_id=notice.id,
+        message_text=payload.message,
+        target_location=payload.target_location,
+        sent_count=0,
+        failed_count=0,
+        status=BroadcastStatus.queued,
+        attempts=0,
+    )
+    session.add(broadcast)
+    await session.commit()
+    return to_broadcast_response(broadcast)
+
+
+@router.get("/broadcasts/{broadcast_id}", response_model=BroadcastResponse)
+async def get_broadcast(
+    broadcast_id: str,
+    tenant_id: str = Depends(get_tenant_id),
+    _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> BroadcastResponse:
+    try:
+        broadcast = await session.get(Broadcast, uuid.UUID(broadcast_id))
+    except ValueError:
+        broadcast = None
+    if broadcast is None or str(broadcast.tenant_id) != tenant_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Broadcast not found")
+    return to_broadcast_response(broadcast)
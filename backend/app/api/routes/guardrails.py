@@ -0,0 +1,53 @@
+import uuid
+
+from fastapi import APIRouter, Depends
+from redis import asyncio as redis
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_current_user, get_redis, get_tenant_id, parse_tenant_id
+from app.db.session import get_session
+from app.models import TenantGuardrailRule
+from app.schemas.guardrails import GuardrailRulesResponse, GuardrailRulesUpdate
+from app.services.guardrails import DEFAULT_FORBIDDEN_PHRASES, guardrail_registry, publish_guardrail_change
+from app.services.phrases import normalize_phrase
+
+router = APIRouter()
+
+
+@router.get("/guardrails", response_model=GuardrailRulesResponse)
+async def list_guardrail_rules(
+    tenant_id: str = Depends(get_tenant_id),
+    _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> GuardrailRulesResponse:
+    rows = await session.execute(
+        select(TenantGuardrailRule.phrase)
+        .where(TenantGuardrailRule.tenant_id == parse_tenant_id(tenant_id))
+        .order_by(TenantGuardrailRule.phrase)
+    )
+    return GuardrailRulesResponse(phrases=list(rows.scalars()), default_phrases=sorted(DEFAULT_FORBIDDEN_PHRASES))
+
+
+@router.put("/guardrails", response_model=GuardrailRulesResponse)
+async def replace_guardrail_rules(
+    payload: GuardrailRulesUpdate,
+    tenant_id: str = Depends(get_tenant_id),
+    _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    redis_client: redis.Redis = Depends(get_redis),
+) -> GuardrailRulesResponse:
+    tenant = parse_tenant_id(tenant_id)
+    phrases = sorted({normalize_phrase(phrase)[:200] for phrase in payload.phrases} - {""})
+    await session.execute(delete(TenantGuardrailRule).where(TenantGuardrailRule.tenant_id == tenant))
+    if phrases:
+        await session.execute(
+            insert(TenantGuardrailRule), [{"id": uuid.uuid4(), "tenant_id": tenant, "phrase": phrase} for phrase in phrases]
+        )
+    await session.commit()
+    guardrail_registry.invalidate(tenant_id)
+    try:
+        await publish_guardrail_change(redis_client, tenant_id)
+    except Exception:
+        pass  # Redis not available; other processes pick the rules up after their listener reconnects
+    return GuardrailRulesResponse(phrases=phrases, default_phrases=sorted(DEFAULT_FORBIDDEN_PHRASES))
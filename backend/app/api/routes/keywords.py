@@ -0,0 +1,63 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+from redis import asyncio as redis
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import get_current_user, get_redis, get_tenant_id, parse_tenant_id
+from app.db.session import get_session
+from app.models import TenantKeyword
+from app.schemas.keywords import KeywordSetResponse, KeywordSetUpdate
+from app.services.phrases import normalize_phrase
+from app.services.tenants import publish_tenant_change, tenant_registry
+
+router = APIRouter()
+
+
+@router.get("/keywords", response_model=list[KeywordSetResponse])
+async def list_keywords(
+    tenant_id: str = Depends(get_tenant_id),
+    _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> list[KeywordSetResponse]:
+    rows = await session.execute(
+        select(TenantKeyword.department, TenantKeyword.keyword)
+        .where(TenantKeyword.tenant_id == parse_tenant_id(tenant_id))
+        .order_by(TenantKeyword.department, TenantKeyword.keyword)
+    )
+    departments: dict[str, list[str]] = {}
+    for department, keyword in rows:
+        departments.setdefault(department, []).append(keyword)
+    return [KeywordSetResponse(department=name, keywords=words) for name, words in departments.items()]
+
+
+@router.put("/keywords/{department}", response_model=KeywordSetResponse)
+async def replace_keywords(
+    payload: KeywordSetUpdate,
+    department: str = Path(max_length=50),
+    tenant_id: str = Depends(get_tenant_id),
+    _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    redis_client: redis.Redis = Depends(get_redis),
+) -> KeywordSetResponse:
+    owner = tenant_registry.get(tenant_id)
+    if owner is None or owner.department != department:
+        # Keywords feed the shared intent matcher; a tenant may only steer traffic to itself
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not this tenant's department")
+    tenant = parse_tenant_id(tenant_id)
+    keywords = sorted({normalize_phrase(word)[:100] for word in payload.keywords} - {""})
+    await session.execute(
+        delete(TenantKeyword).where(TenantKeyword.tenant_id == tenant, TenantKeyword.department == department)
+    )
+    if keywords:
+        await session.execute(
+            insert(TenantKeyword),
+            [{"id": uuid.uuid4(), "tenant_id": tenant, "department": department, "keyword": word} for word in keywords],
+        )
+    await session.commit()
+    try:
+        await publish_tenant_change(redis_client)
+    except Exception:
+        pass  # Redis not available; listeners reload when they reconnect
+    return KeywordSetResponse(department=department, keywords=keywords)
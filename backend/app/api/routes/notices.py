@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.deps import get_current_user, get_tenant_id
 from app.db.session import get_session
 from app.models import Notice
 from app.schemas.notices import (
+    IngestionJobResponse,
     NoticeCreate,
     NoticePreviewRequest,
     NoticePreviewResponse,
     NoticePublishResponse,
 )
-from app.services.ingestion import process_notice_upload
+from app.services.jobs import enqueue_ingestion_job, get_latest_job
 from app.services.rag import preview_notice_response
+from app.services.tenants import tenant_registry
 
 router = APIRouter()
 
@@ -23,6 +27,9 @@ async def create_notice(
     _: dict = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> dict:
+    tenant = tenant_registry.get(tenant_id)
+    if tenant is not None and not tenant.allows_source_type(payload.source_type):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Source type not allowed for this tenant")
     # Create draft notice (ingestion happens on publish)
     return {"status": "draft", "notice_id": "stub-id", "tenant_id": tenant_id}
 
@@ -38,11 +45,46 @@ async def preview_notice(
     return preview_notice_response(payload.query, payload.location)
 
 
+async def get_tenant_notice(session: AsyncSession, notice_id: str, tenant_id: str) -> Notice:
+    try:
+        notice = await session.get(Notice, uuid.UUID(notice_id))
+    except ValueError:
+        notice = None
+    if notice is None or str(notice.tenant_id) != tenant_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notice not found")
+    return notice
+
+
 @router.post("/notices/{notice_id}/publish", response_model=NoticePublishResponse)
 async def publish_notice(
     notice_id: str,
     tenant_id: str = Depends(get_tenant_id),
     _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> NoticePublishResponse:
-    _ = tenant_id
-    return NoticePublishResponse(status="approved", notice_id=notice_id)
+    # OCR/chunking/embedding run in the ingestion worker; poll /ingestion for progress
+    notice = await get_tenant_notice(session, notice_id, tenant_id)
+    job = await enqueue_ingestion_job(session, notice)
+    return NoticePublishResponse(status=job.state.value, notice_id=notice_id, job_id=str(job.id))
+
+
+@router.get("/notices/{notice_id}/ingestion", response_model=IngestionJobResponse)
+async def notice_ingestion_status(
+    notice_id: str,
+    tenant_id: str = Depends(get_tenant_id),
+    _: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> IngestionJobResponse:
+    notice = await get_tenant_notice(session, notice_id, tenant_id)
+    job = await get_latest_job(session, notice.id, notice.tenant_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No ingestion job for notice")
+    return IngestionJobResponse(
+        job_id=str(job.id),
+        notice_id=notice_id,
+        state=job.state.value,
+        progress=job.progress,
+        attempts=job.attempts,
+        error=job.error,
+        updated_at=job.updated_at,
+    )
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from redis import asyncio as redis
 
+from app.core.deps import get_redis
 from app.schemas.webhook import WhatsAppWebhookRequest, WhatsAppWebhookResponse
+from app.services.delivery import parse_status_callback, record_status_callback
 from app.services.query import handle_whatsapp_message
 
 router = APIRouter()
 
 
 @router.post("/webhook/whatsapp", response_model=WhatsAppWebhookResponse)
-async def whatsapp_webhook(request: Request) -> WhatsAppWebhookResponse:
+async def whatsapp_webhook(
+    request: Request,
+    redis_client: redis.Redis = Depends(get_redis),
+) -> WhatsAppWebhookResponse:
     content_type = request.headers.get("content-type", "")
     if "application/json" in content_type:
         raw_payload = await request.json()
@@ -15,9 +21,19 @@ async def whatsapp_webhook(request: Request) -> WhatsAppWebhookResponse:
         form = await request.form()
         raw_payload = dict(form)
     payload = WhatsAppWebhookRequest(**raw_payload)
-    return await handle_whatsapp_message(payload)
+    return await handle_whatsapp_message(payload, redis_client)
 
 
 @router.post("/webhook/status")
-async def whatsapp_status_callback() -> dict:
+async def whatsapp_status_callback(
+    request: Request,
+    broadcast_id: str | None = None,
+    redis_client: redis.Redis = Depends(get_redis),
+) -> dict:
+    # Buffered on a Redis stream; the worker writes events and counters in batches
+    form = await request.form()
+    event = parse_status_callback(form, broadcast_id)
+    if event and not await record_status_callback(redis_client, event):
+        # Twilio retries callbacks answered with a 5xx
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Status not recorded")
     return {"status": "ok"}
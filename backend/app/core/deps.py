@@ -1,9 +1,14 @@
+import uuid
+
 from fastapi import Depends, Header, HTTPException, status
+from redis import asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_access_token
 from app.db.session import get_session
 from app.db.tenancy import set_current_tenant
+from app.services.cache import get_redis_client
+from app.services.tenants import tenant_registry
 
 
 async def get_current_user(authorization: str | None = Header(default=None)) -> dict:
@@ -13,10 +18,30 @@ async def get_current_user(authorization: str | None = Header(default=None)) ->
     return decode_access_token(token)
 
 
+def get_redis() -> redis.Redis:
+    return get_redis_client()
+
+
 def get_tenant_id(x_tenant_id: str | None = Header(default=None)) -> str:
+    """Canonical ID of an active tenant, checked against the in-process registry (no I/O)."""
     if not x_tenant_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing X-Tenant-Id")
-    return x_tenant_id
+    tenant_uuid = parse_tenant_id(x_tenant_id)
+    if not tenant_registry.loaded:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Tenant registry not loaded")
+    tenant = tenant_registry.get(tenant_uuid)
+    if tenant is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown tenant")
+    if not tenant.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant is inactive")
+    return str(tenant.id)
+
+
+def parse_tenant_id(tenant_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(tenant_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid X-Tenant-Id")
 
 
 async def get_tenant_session(
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+from asyncpg import Connection
+from sqlalchemy.types import UserDefinedType
+
+# pgvector binary format: uint16 dim, uint16 unused, then big-endian float32 values
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+
+def to_float32(values) -> np.ndarray:
+    """Compact 1-D float32 vector (no copy if it already is one)."""
+    return np.ascontiguousarray(values, dtype=np.float32)
+
+
+def encode_vector(value) -> bytes:
+    """pgvector binary wire format from bytes, pgvector text, a list or an ndarray."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, str):
+        value = value.strip()[1:-1].split(",")
+    array = np.asarray(value, dtype=_WIRE_DTYPE)
+    if array.ndim != 1:
+        raise ValueError("expected a 1-D vector")
+    return _HEADER.pack(array.shape[0], 0) + array.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size).astype(np.float32)
+
+
+class PgVector(UserDefinedType):
+    """``vector(dim)`` column/bind type that hands ndarrays straight to the asyncpg binary codec."""
+
+    cache_ok = True
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+
+    def get_col_spec(self, **kw) -> str:
+        return f"VECTOR({self.dim})"
+
+
+async def register_vector_codec(conn: Connection) -> None:
+    """Send/receive ``vector`` in binary so COPY and queries skip text formatting."""
+    try:
+        await conn.set_type_codec(
+            "vector",
+            encoder=encode_vector,
+            decoder=decode_vector,
+            format="binary",
+        )
+    except ValueError:
+        pass  # pgvector extension not installed yet (before migrations)
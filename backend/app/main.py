@@ -1,12 +1,66 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.api.router import api_router
 from app.core.config import settings
+from app.db.session import engine
+from app.services.cache import (
+    cache_generations,
+    close_redis_pool,
+    get_redis_pool_stats,
+    init_redis_pool,
+    response_cache,
+    run_invalidation_listener,
+)
+from app.services.guardrails import run_guardrail_invalidation_listener
+from app.services.llm import close_http_client
+from app.services.logging import query_log_sink
+from app.services.semantic_cache import semantic_cache
+from app.services.tenants import run_tenant_registry_listener, tenant_registry
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    redis_client = init_redis_pool()
+    query_log_sink.start()
+    try:
+        await tenant_registry.refresh()  # Serve requests with tenants loaded; the listener keeps them current
+    except Exception:
+        logger.warning("tenant registry not loaded at startup; the listener will retry", exc_info=True)
+    background = [
+        asyncio.create_task(run_invalidation_listener(redis_client, cache_generations, response_cache, semantic_cache)),
+        asyncio.create_task(run_tenant_registry_listener(redis_client)),
+        asyncio.create_task(run_guardrail_invalidation_listener(redis_client)),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    for task in background:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await query_log_sink.close()
+    await close_redis_pool()
+    await close_http_client()
+    await engine.dispose()
+
 
-app = FastAPI(title="Asila Backend", version="0.1.0")
+app = FastAPI(title="Asila Backend", version="0.1.0", lifespan=lifespan)
 app.include_router(api_router)
 
 
 @app.get("/health")
 async def health_check() -> dict:
-    return {"status": "ok", "environment": settings.env}
+    return {
+        "status": "ok",
+        "environment": settings.env,
+        "redis_pool": get_redis_pool_stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "query_log": query_log_sink.stats(),
+    }
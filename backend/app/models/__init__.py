@@ -1,11 +1,22 @@
 from app.models.base import Base
 from app.models.tables import (
     Broadcast,
+    BroadcastDeliveryStats,
+    DeliveryEvent,
     Embedding,
+    IngestionJob,
     LocationAlias,
     Notice,
     Query,
+    QueryRollup,
+    QueryTextRollup,
+    RollupWatermark,
     Tenant,
+    TenantGuardrailRule,
+    TenantKeyword,
+    UnansweredCluster,
+    UnansweredClusterBand,
+    UnansweredClusterStats,
     UnansweredQuery,
     User,
 )
@@ -13,11 +24,22 @@ from app.models.tables import (
 __all__ = [
     "Base",
     "Tenant",
+    "TenantKeyword",
+    "TenantGuardrailRule",
     "Notice",
     "Embedding",
     "User",
     "LocationAlias",
     "Query",
     "UnansweredQuery",
+    "QueryRollup",
+    "QueryTextRollup",
+    "UnansweredCluster",
+    "UnansweredClusterBand",
+    "UnansweredClusterStats",
+    "RollupWatermark",
     "Broadcast",
+    "DeliveryEvent",
+    "BroadcastDeliveryStats",
+    "IngestionJob",
 ]
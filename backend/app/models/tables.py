@@ -1,11 +1,13 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Boolean, DateTime, Enum as SqlEnum, ForeignKey, Integer, String, Text
+import numpy as np
+from sqlalchemy import BigInteger, Boolean, DateTime, Enum as SqlEnum, ForeignKey, Integer, String, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
+from app.db.vector import PgVector
 from app.models.base import Base
 
 
@@ -35,12 +37,30 @@ class FileType(str, Enum):
     text = "text"
 
 
+class IngestionState(str, Enum):
+    queued = "queued"
+    ocr = "ocr"
+    chunking = "chunking"
+    embedding = "embedding"
+    indexed = "indexed"
+    failed = "failed"
+
+
+class BroadcastStatus(str, Enum):
+    queued = "queued"
+    sending = "sending"
+    completed = "completed"
+    failed = "failed"
+
+
 class Tenant(Base):
     __tablename__ = "tenants"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     type: Mapped[TenantType] = mapped_column(SqlEnum(TenantType), nullable=False)
+    # Intent department whose citizen questions this tenant answers (at most one tenant each)
+    department: Mapped[str | None] = mapped_column(String(50), unique=True)
     contact_phone: Mapped[str | None] = mapped_column(String(20))
     contact_email: Mapped[str | None] = mapped_column(String(100))
     office_address: Mapped[str | None] = mapped_column(Text)
@@ -51,6 +71,31 @@ class Tenant(Base):
     updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+class TenantKeyword(Base):
+    """Extra intent keywords a tenant maintains for a department."""
+
+    __tablename__ = "tenant_keywords"
+    __table_args__ = (UniqueConstraint("tenant_id", "department", "keyword", name="uq_tenant_keywords"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    department: Mapped[str] = mapped_column(String(50), nullable=False)
+    keyword: Mapped[str] = mapped_column(String(100), nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class TenantGuardrailRule(Base):
+    """A phrase a tenant's replies must never contain, on top of the defaults."""
+
+    __tablename__ = "tenant_guardrail_rules"
+    __table_args__ = (UniqueConstraint("tenant_id", "phrase", name="uq_tenant_guardrail_rules"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    phrase: Mapped[str] = mapped_column(String(200), nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 class Notice(Base):
     __tablename__ = "notices"
 
@@ -74,13 +119,21 @@ class Notice(Base):
 
 class Embedding(Base):
     __tablename__ = "embeddings"
+    __table_args__ = (UniqueConstraint("notice_id", "content_hash", name="uq_embeddings_notice_content_hash"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     notice_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("notices.id"), nullable=False)
     tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     chunk_text: Mapped[str] = mapped_column(Text, nullable=False)
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    # sha256 of chunk_text; unchanged chunks keep their vector across re-ingestion
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     location: Mapped[str | None] = mapped_column(String(100))
+    embedding: Mapped[np.ndarray] = mapped_column(PgVector(1536), nullable=False)
+    # Eligibility copied from notice/tenant by DB triggers; retrieval filters on these only
+    is_active: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    validity_end: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True))
+    notice_title: Mapped[str | None] = mapped_column(String(500))
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -131,9 +184,90 @@ class UnansweredQuery(Base):
     query_language: Mapped[str | None] = mapped_column(String(10))
     location: Mapped[str | None] = mapped_column(String(100))
     reason: Mapped[str | None] = mapped_column(String(100))
+    cluster_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("unanswered_clusters.id"))
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
+class QueryRollup(Base):
+    """Query counts per hour/day bucket, tenant, language and location (merged incrementally)."""
+
+    __tablename__ = "query_rollups"
+
+    granularity: Mapped[str] = mapped_column(String(5), primary_key=True)
+    bucket_start: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    language: Mapped[str] = mapped_column(String(10), primary_key=True)
+    location: Mapped[str] = mapped_column(String(100), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    answered: Mapped[int] = mapped_column(Integer, default=0)
+    extractive: Mapped[int] = mapped_column(Integer, default=0)
+    extractive_latency_ms: Mapped[int] = mapped_column(BigInteger, default=0)
+    generated: Mapped[int] = mapped_column(Integer, default=0)
+    generated_latency_ms: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class QueryTextRollup(Base):
+    """Daily counts per normalized query text, for top queries."""
+
+    __tablename__ = "query_text_rollups"
+
+    bucket_start: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    query_key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    language: Mapped[str] = mapped_column(String(10), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class UnansweredCluster(Base):
+    """Similar unanswered queries of a tenant, grouped by MinHash/LSH."""
+
+    __tablename__ = "unanswered_clusters"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    representative_text: Mapped[str] = mapped_column(Text, nullable=False)
+    signature: Mapped[list[int]] = mapped_column(ARRAY(BigInteger), nullable=False)
+    query_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class UnansweredClusterBand(Base):
+    """LSH index: one row per band hash of a cluster's signature."""
+
+    __tablename__ = "unanswered_cluster_bands"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True)
+    band_hash: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    cluster_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("unanswered_clusters.id", ondelete="CASCADE"), primary_key=True
+    )
+
+
+class UnansweredClusterStats(Base):
+    """Daily counts per cluster, language and location for the gap report."""
+
+    __tablename__ = "unanswered_cluster_stats"
+
+    cluster_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("unanswered_clusters.id", ondelete="CASCADE"), primary_key=True
+    )
+    bucket_start: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    language: Mapped[str] = mapped_column(String(10), primary_key=True)
+    location: Mapped[str] = mapped_column(String(100), primary_key=True)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class RollupWatermark(Base):
+    """Source rows created before ``processed_until`` are already merged into the rollups."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    processed_until: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 class Broadcast(Base):
     __tablename__ = "broadcasts"
 
@@ -144,4 +278,60 @@ class Broadcast(Base):
     target_location: Mapped[str | None] = mapped_column(String(100))
     sent_count: Mapped[int] = mapped_column(Integer, default=0)
     failed_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Fan-out progress; recipients are sent in phone_number order, so a reclaimed
+    # broadcast resumes after last_phone_number
+    status: Mapped[BroadcastStatus] = mapped_column(SqlEnum(BroadcastStatus), default=BroadcastStatus.queued)
+    total_count: Mapped[int | None] = mapped_column(Integer)
+    last_phone_number: Mapped[str | None] = mapped_column(String(20))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text)
+    heartbeat_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True))
+    completed_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class DeliveryEvent(Base):
+    """One Twilio status callback per (message, status); duplicates are dropped on insert."""
+
+    __tablename__ = "delivery_events"
+    __table_args__ = (UniqueConstraint("message_sid", "status", name="uq_delivery_events_message_status"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    broadcast_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("broadcasts.id"), nullable=False)
+    tenant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"))
+    message_sid: Mapped[str] = mapped_column(String(64), nullable=False)
+    phone_number: Mapped[str | None] = mapped_column(String(20))
+    location: Mapped[str] = mapped_column(String(100), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    error_code: Mapped[str | None] = mapped_column(String(20))
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class BroadcastDeliveryStats(Base):
+    """Running delivery counters per broadcast and recipient location, bumped on every event flush."""
+
+    __tablename__ = "broadcast_delivery_stats"
+
+    broadcast_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("broadcasts.id"), primary_key=True)
+    location: Mapped[str] = mapped_column(String(100), primary_key=True)
+    tenant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"))
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    delivered: Mapped[int] = mapped_column(Integer, default=0)
+    read: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    notice_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("notices.id"), nullable=False)
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+    state: Mapped[IngestionState] = mapped_column(SqlEnum(IngestionState), default=IngestionState.queued)
+    progress: Mapped[int] = mapped_column(Integer, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text)
+    heartbeat_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -2,6 +2,7 @@ from app.schemas.analytics import BroadcastCoverageResponse, QueryAnalyticsRespo
 from app.schemas.auth import LoginRequest, LoginResponse
 from app.schemas.broadcasts import BroadcastCreate, BroadcastResponse
 from app.schemas.notices import (
+    IngestionJobResponse,
     NoticeCreate,
     NoticePreviewChunk,
     NoticePreviewRequest,
@@ -18,6 +19,7 @@ __all__ = [
     "NoticePreviewChunk",
     "NoticePreviewResponse",
     "NoticePublishResponse",
+    "IngestionJobResponse",
     "BroadcastCreate",
     "BroadcastResponse",
     "QueryAnalyticsResponse",
@@ -6,6 +6,9 @@ class QueryAnalyticsResponse(BaseModel):
     answered_queries: int
     unanswered_queries: int
     automated_rate: float
+    extractive_queries: int = 0
+    extractive_rate: float = 0.0
+    average_latency_ms: dict[str, float] = {}
     top_queries: list[dict]
     language_distribution: dict
 
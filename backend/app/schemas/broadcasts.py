@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -12,3 +14,6 @@ class BroadcastResponse(BaseModel):
     status: str
     sent_count: int
     failed_count: int
+    total_count: int | None = None
+    error: str | None = None
+    completed_at: datetime | None = None
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class GuardrailRulesUpdate(BaseModel):
+    phrases: list[str] = Field(max_length=1000)
+
+
+class GuardrailRulesResponse(BaseModel):
+    phrases: list[str]
+    default_phrases: list[str]
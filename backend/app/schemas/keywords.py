@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class KeywordSetUpdate(BaseModel):
+    keywords: list[str] = Field(max_length=1000)
+
+
+class KeywordSetResponse(BaseModel):
+    department: str
+    keywords: list[str]
@@ -31,3 +31,14 @@ class NoticePreviewResponse(BaseModel):
 class NoticePublishResponse(BaseModel):
     status: str
     notice_id: str
+    job_id: str | None = None
+
+
+class IngestionJobResponse(BaseModel):
+    job_id: str
+    notice_id: str
+    state: str
+    progress: int
+    attempts: int
+    error: str | None = None
+    updated_at: datetime | None = None
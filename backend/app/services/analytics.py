@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import QueryRollup, QueryTextRollup, UnansweredCluster, UnansweredClusterStats
+from app.services.query import UNANSWERED_REASONS
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_WATERMARK = "query_rollups"
+
+# Response types that waited on an LLM generation (a fallback still paid for the attempt)
+GENERATED_RESPONSE_TYPES = ("rag", "filtered", "extractive_fallback")
+
+# Ranges up to this long are served from hourly buckets, longer ones from daily
+HOURLY_RANGE_LIMIT = timedelta(hours=48)
+
+# Grouping key for top queries: trimmed, lower-cased, whitespace collapsed
+_QUERY_KEY_SQL = r"left(regexp_replace(lower(btrim({col})), '\s+', ' ', 'g'), 200)"
+
+INIT_WATERMARK_SQL = """
+INSERT INTO rollup_watermarks (name, processed_until) VALUES (:name, '-infinity')
+ON CONFLICT (name) DO NOTHING;
+"""
+
+LOCK_WATERMARK_SQL = "SELECT processed_until FROM rollup_watermarks WHERE name = :name FOR UPDATE;"
+
+# Each statement merges the source rows created in [:start, :end) into the
+# existing buckets, so a run only ever scans rows added since the last one.
+MERGE_QUERY_ROLLUPS_SQL = """
+INSERT INTO query_rollups AS r (
+    granularity, bucket_start, tenant_id, language, location,
+    total, answered, extractive, extractive_latency_ms, generated, generated_latency_ms
+)
+SELECT
+    g.granularity,
+    date_trunc(g.granularity, q.created_at, 'UTC'),
+    q.tenant_id,
+    COALESCE(q.query_language, ''),
+    COALESCE(q.location, ''),
+    count(*),
+    count(*) FILTER (WHERE NOT (COALESCE(q.response_type, '') = ANY(:unanswered_types))),
+    count(*) FILTER (WHERE q.response_type = 'extractive'),
+    COALESCE(sum(q.latency_ms) FILTER (WHERE q.response_type = 'extractive'), 0),
+    count(*) FILTER (WHERE q.response_type = ANY(:generated_types)),
+    COALESCE(sum(q.latency_ms) FILTER (WHERE q.response_type = ANY(:generated_types)), 0)
+FROM queries q
+CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+WHERE q.tenant_id IS NOT NULL AND q.created_at >= :start AND q.created_at < :end
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (granularity, bucket_start, tenant_id, language, location) DO UPDATE SET
+    total = r.total + EXCLUDED.total,
+    answered = r.answered + EXCLUDED.answered,
+    extractive = r.extractive + EXCLUDED.extractive,
+    extractive_latency_ms = r.extractive_latency_ms + EXCLUDED.extractive_latency_ms,
+    generated = r.generated + EXCLUDED.generated,
+    generated_latency_ms = r.generated_latency_ms + EXCLUDED.generated_latency_ms;
+"""
+
+MERGE_QUERY_TEXT_ROLLUPS_SQL = f"""
+INSERT INTO query_text_rollups AS r (bucket_start, tenant_id, query_key, language, count)
+SELECT
+    date_trunc('day', q.created_at, 'UTC'),
+    q.tenant_id,
+    {_QUERY_KEY_SQL.format(col="q.query_text")},
+    COALESCE(q.query_language, ''),
+    count(*)
+FROM queries q
+WHERE q.tenant_id IS NOT NULL AND q.created_at >= :start AND q.created_at < :end
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (bucket_start, tenant_id, query_key, language) DO UPDATE SET
+    count = r.count + EXCLUDED.count;
+"""
+
+
+async def run_rollups(session: AsyncSession) -> tuple[datetime, datetime] | None:
+    """Merge rows created since the watermark into the rollups and advance it.
+
+    The window stops ``analytics_rollup_lag_seconds`` short of now so rows
+    from transactions still in flight (created_at is their start time) are
+    picked up by the next run rather than skipped. The watermark row is
+    locked, so concurrent workers never merge the same window twice.
+    Returns the merged window, or None if there was nothing to do.
+    """
+    await session.execute(text(INIT_WATERMARK_SQL), {"name": ROLLUP_WATERMARK})
+    start = (await session.execute(text(LOCK_WATERMARK_SQL), {"name": ROLLUP_WATERMARK})).scalar_one()
+    end = datetime.now(timezone.utc) - timedelta(seconds=settings.analytics_rollup_lag_seconds)
+    if start >= end:
+        await session.rollback()
+        return None
+
+    params = {"start": start, "end": end}
+    await session.execute(
+        text(MERGE_QUERY_ROLLUPS_SQL),
+        {**params, "unanswered_types": list(UNANSWERED_REASONS), "generated_types": list(GENERATED_RESPONSE_TYPES)},
+    )
+    await session.execute(text(MERGE_QUERY_TEXT_ROLLUPS_SQL), params)
+    await session.execute(
+        text("UPDATE rollup_watermarks SET processed_until = :end WHERE name = :name"),
+        {"end": end, "name": ROLLUP_WATERMARK},
+    )
+    await session.commit()
+    return start, end
+
+
+async def run_rollup_scheduler() -> None:
+    """Merge new query rows into the rollups every ``analytics_rollup_interval_seconds``."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await run_rollups(session)
+        except Exception:
+            logger.exception("analytics rollup failed")  # Watermark not advanced; retried next run
+        await asyncio.sleep(settings.analytics_rollup_interval_seconds)
+
+
+def resolve_range(start: datetime | None, end: datetime | None, default: timedelta) -> tuple[datetime, datetime]:
+    """Fill in a missing bound (``end`` defaults to now); naive datetimes are taken as UTC."""
+    if end is None:
+        end = datetime.now(timezone.utc)
+    elif end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start is None:
+        start = end - default
+    elif start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise ValueError("start must be before end")
+    return start, end
+
+
+def rollup_granularity(start: datetime, end: datetime) -> str:
+    return "hour" if end - start <= HOURLY_RANGE_LIMIT else "day"
+
+
+def truncate_to_bucket(moment: datetime, granularity: str) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def get_query_analytics(
+    session: AsyncSession,
+    tenant_id: str,
+    start: datetime,
+    end: datetime,
+    top_n: int = 10,
+) -> dict:
+    """Totals, automated rate, language mix and top queries for a time range.
+
+    Buckets overlapping the range are counted whole; top queries always
+    come from the daily text rollups.
+    """
+    tenant = uuid.UUID(tenant_id)
+    granularity = rollup_granularity(start, end)
+    rollup = QueryRollup
+    by_language = (
+        await session.execute(
+            select(
+                rollup.language,
+                func.sum(rollup.total).label("total"),
+                func.sum(rollup.answered).label("answered"),
+                func.sum(rollup.extractive).label("extractive"),
+                func.sum(rollup.extractive_latency_ms).label("extractive_latency_ms"),
+                func.sum(rollup.generated).label("generated"),
+                func.sum(rollup.generated_latency_ms).label("generated_latency_ms"),
+            )
+            .where(
+                rollup.tenant_id == tenant,
+                rollup.granularity == granularity,
+                rollup.bucket_start >= truncate_to_bucket(start, granularity),
+                rollup.bucket_start < end,
+            )
+            .group_by(rollup.language)
+        )
+    ).all()
+    totals = {
+        column: sum(getattr(row, column) for row in by_language)
+        for column in ("total", "answered", "extractive", "extractive_latency_ms", "generated", "generated_latency_ms")
+    }
+    total, answered, extractive = totals["total"], totals["answered"], totals["extractive"]
+
+    text_rollup = QueryTextRollup
+    count = func.sum(text_rollup.count).label("count")
+    top = (
+        await session.execute(
+            select(text_rollup.query_key, text_rollup.language, count)
+            .where(
+                text_rollup.tenant_id == tenant,
+                text_rollup.bucket_start >= truncate_to_bucket(start, "day"),
+                text_rollup.bucket_start < end,
+            )
+            .group_by(text_rollup.query_key, text_rollup.language)
+            .order_by(count.desc(), text_rollup.query_key)
+            .limit(top_n)
+        )
+    ).all()
+
+    return {
+        "total_queries": total,
+        "answered_queries": answered,
+        "unanswered_queries": total - answered,
+        "automated_rate": answered / total if total else 0.0,
+        # Extractive replies skip the LLM; compare their latency with generated ones
+        "extractive_queries": extractive,
+        "extractive_rate": extractive / total if total else 0.0,
+        "average_latency_ms": {
+            path: totals[f"{path}_latency_ms"] / totals[path]
+            for path in ("extractive", "generated")
+            if totals[path]
+        },
+        "top_queries": [
+            {"query": row.query_key, "count": row.count, "language": row.language or None} for row in top
+        ],
+        "language_distribution": {
+            (row.language or "unknown"): row.total for row in by_language
+        },
+    }
+
+
+async def get_unanswered_analytics(
+    session: AsyncSession,
+    tenant_id: str,
+    start: datetime,
+    end: datetime,
+    top_n: int = 20,
+) -> list[dict]:
+    """Largest clusters of similar unanswered queries in a range, with where and in which languages they were asked."""
+    stats = UnansweredClusterStats
+    count = func.sum(stats.count).label("count")
+    rows = (
+        await session.execute(
+            select(
+                UnansweredCluster.representative_text,
+                count,
+                func.array_agg(stats.location.distinct()).filter(stats.location != "").label("locations"),
+                func.array_agg(stats.language.distinct()).filter(stats.language != "").label("languages"),
+            )
+            .join(UnansweredCluster, UnansweredCluster.id == stats.cluster_id)
+            .where(
+                stats.tenant_id == uuid.UUID(tenant_id),
+                stats.bucket_start >= truncate_to_bucket(start, "day"),
+                stats.bucket_start < end,
+            )
+            .group_by(UnansweredCluster.id, UnansweredCluster.representative_text)
+            .order_by(count.desc(), UnansweredCluster.id)
+            .limit(top_n)
+        )
+    ).all()
+    return [
+        {
+            "query": row.representative_text,
+            "count": row.count,
+            "locations": sorted(row.locations or []),
+            "languages": sorted(row.languages or []),
+        }
+        for row in rows
+    ]
@@ -1,23 +1,288 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from redis import asyncio as redis
+from sqlalchemy import func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Broadcast, User
+from app.core.config import settings
+from app.models import Broadcast, LocationAlias
+from app.models.tables import BroadcastStatus
+from app.services.delivery import build_status_callback_url
+from app.services.messaging import send_whatsapp_message
+from app.services.ratelimit import RateLimitMode, build_rate_limit_key, evaluate_rate_limits
+
+logger = logging.getLogger(__name__)
+
+
+# Served by ix_users_subscribed_tenants_gin or, for located broadcasts,
+# ix_users_location_phone. Optional filters are added only when set so the
+# planner never sees "param IS NULL OR ..." branches.
+def _target_filter_sql(params: dict) -> str:
+    sql = """
+FROM users u
+WHERE u.opted_out IS NOT TRUE
+    AND u.subscribed_tenants @> ARRAY[CAST(:tenant_id AS uuid)]"""
+    if params.get("locations") is not None:
+        sql += "\n    AND lower(u.last_known_location) = ANY(:locations)"
+    if params.get("active_since") is not None:
+        sql += "\n    AND u.last_interaction_at >= :active_since"
+    if params.get("after") is not None:
+        sql += "\n    AND u.phone_number > :after"
+    return sql
+
+
+def _target_page_sql(params: dict) -> str:
+    return f"SELECT u.phone_number {_target_filter_sql(params)}\nORDER BY u.phone_number\nLIMIT :page_size;"
+
+
+def _target_count_sql(params: dict) -> str:
+    return f"SELECT count(*) {_target_filter_sql(params)};"
+
+
+async def resolve_location_names(session: AsyncSession, location: str) -> list[str]:
+    """Lower-cased canonical name for ``location`` plus every alias of it."""
+    key = location.strip().lower()
+    canonical = (
+        await session.execute(
+            select(LocationAlias.canonical_location).where(func.lower(LocationAlias.alias) == key)
+        )
+    ).scalar() or location.strip()
+    aliases = await session.execute(
+        select(func.lower(LocationAlias.alias)).where(
+            func.lower(LocationAlias.canonical_location) == canonical.lower()
+        )
+    )
+    return sorted({canonical.lower(), key, *aliases.scalars()})
+
+
+async def _target_params(session: AsyncSession, tenant_id: str, location: str | None) -> dict:
+    recency = settings.broadcast_active_within_days
+    return {
+        "tenant_id": uuid.UUID(tenant_id),
+        "locations": await resolve_location_names(session, location) if location else None,
+        "active_since": datetime.now(timezone.utc) - timedelta(days=recency) if recency else None,
+    }
 
 
-async def get_broadcast_targets(
+async def iter_broadcast_targets(
     session: AsyncSession,
     tenant_id: str,
     location: str | None = None,
-) -> list[str]:
-    """Get phone numbers for broadcast targeting."""
-    # TODO: query users who interacted + opted-in + match location
-    return []
-
-
-async def send_whatsapp_broadcast(phone_numbers: list[str], message: str) -> tuple[int, int]:
-    """Stub for sending broadcast via Twilio/WhatsApp Channels."""
-    sent = len(phone_numbers)
-    failed = 0
-    # TODO: integrate Twilio API
-    return sent, failed
+    after: str | None = None,
+    page_size: int | None = None,
+) -> AsyncIterator[str]:
+    """Stream opted-in subscribers of a tenant in phone_number order, starting after ``after``.
+
+    Keyset pages keep each query short, so no transaction stays open for
+    the hours a large fan-out takes.
+    """
+    params = await _target_params(session, tenant_id, location)
+    params["page_size"] = page_size or settings.broadcast_target_page_size
+    while True:
+        params["after"] = after
+        result = await session.execute(text(_target_page_sql(params)), params)
+        page = list(result.scalars())
+        for phone in page:
+            yield phone
+        if len(page) < params["page_size"]:
+            return
+        after = page[-1]
+
+
+async def count_broadcast_targets(session: AsyncSession, tenant_id: str, location: str | None = None) -> int:
+    params = await _target_params(session, tenant_id, location)
+    return (await session.execute(text(_target_count_sql(params)), params)).scalar_one()
+
+
+class ProviderRateLimiter:
+    """Paces sends to the provider's messages-per-second limit.
+
+    The token bucket lives in Redis so every worker shares the account's
+    limit; without Redis each process paces itself locally.
+    """
+
+    def __init__(self, client: redis.Redis | None, rate_per_second: int, key: str = "twilio") -> None:
+        self.client = client
+        self.rate_per_second = rate_per_second
+        self.key = build_rate_limit_key("provider_ratelimit", key, RateLimitMode.token_bucket)
+        self._lock = asyncio.Lock()
+        self._next_local_slot = 0.0
+        self._redis_failing = False  # logs once per outage rather than once per message
+
+    async def acquire(self) -> None:
+        if self.client is None:
+            await self._acquire_local()
+            return
+        while True:
+            try:
+                [result] = await evaluate_rate_limits(
+                    self.client, [self.key], self.rate_per_second, 1, RateLimitMode.token_bucket
+                )
+            except Exception:
+                if not self._redis_failing:
+                    logger.warning("provider rate limit unavailable in Redis; pacing locally", exc_info=True)
+                    self._redis_failing = True
+                await self._acquire_local()
+                return
+            self._redis_failing = False
+            if result.allowed:
+                return
+            await asyncio.sleep(max(result.retry_after_ms, 1) / 1000)
+
+    async def _acquire_local(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(self._next_local_slot, now)
+            self._next_local_slot = slot + 1 / self.rate_per_second
+        await asyncio.sleep(slot - now)
+
+
+@dataclass
+class SendResult:
+    sent: int = 0
+    failed: int = 0
+
+
+async def send_whatsapp_broadcast(
+    phone_numbers: Iterable[str],
+    message: str,
+    limiter: ProviderRateLimiter,
+    max_concurrency: int | None = None,
+    status_callback: str | None = None,
+) -> SendResult:
+    """Send one batch with bounded concurrency under the provider rate limit."""
+    semaphore = asyncio.Semaphore(max_concurrency or settings.broadcast_max_concurrency)
+    result = SendResult()
+
+    async def send(phone: str) -> None:
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                await send_whatsapp_message(phone, message, status_callback)
+                result.sent += 1
+            except Exception:
+                result.failed += 1  # Rejected, or transient errors outlasted the retries
+
+    await asyncio.gather(*(send(phone) for phone in phone_numbers))
+    return result
+
+
+CLAIM_BROADCAST_SQL = """
+UPDATE broadcasts
+SET status = 'sending', attempts = attempts + 1, error = NULL, heartbeat_at = NOW()
+WHERE id = (
+    SELECT id
+    FROM broadcasts
+    WHERE
+        (
+            status = 'queued'
+            OR (status = 'sending' AND heartbeat_at < NOW() - make_interval(secs => :stale_after))
+        )
+        AND attempts < :max_attempts
+    ORDER BY created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+)
+RETURNING id, attempts;
+"""
+
+FAIL_LOST_BROADCASTS_SQL = """
+UPDATE broadcasts
+SET status = 'failed', error = 'worker lost'
+WHERE status = 'sending'
+    AND heartbeat_at < NOW() - make_interval(secs => :stale_after)
+    AND attempts >= :max_attempts;
+"""
+
+
+@dataclass
+class ClaimedBroadcast:
+    id: uuid.UUID
+    attempts: int
+
+
+async def claim_broadcast(session: AsyncSession) -> ClaimedBroadcast | None:
+    params = {"stale_after": settings.broadcast_stale_after_seconds, "max_attempts": settings.broadcast_max_attempts}
+    await session.execute(text(FAIL_LOST_BROADCASTS_SQL), params)
+    row = (await session.execute(text(CLAIM_BROADCAST_SQL), params)).first()
+    await session.commit()
+    if row is None:
+        return None
+    return ClaimedBroadcast(id=row.id, attempts=row.attempts)
+
+
+async def checkpoint_broadcast(
+    session: AsyncSession,
+    broadcast_id: uuid.UUID,
+    result: SendResult,
+    last_phone_number: str,
+) -> None:
+    """Record a finished batch; counters and cursor move together in one statement."""
+    await session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id)
+        .values(
+            sent_count=Broadcast.sent_count + result.sent,
+            failed_count=Broadcast.failed_count + result.failed,
+            last_phone_number=last_phone_number,
+            heartbeat_at=text("NOW()"),
+        )
+    )
+    await session.commit()
+
+
+async def _iter_batches(phone_numbers: AsyncIterable[str], size: int) -> AsyncIterator[list[str]]:
+    batch: list[str] = []
+    async for phone in phone_numbers:
+        batch.append(phone)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def run_broadcast(session: AsyncSession, broadcast_id: uuid.UUID, redis_client: redis.Redis | None) -> Broadcast:
+    """Fan a claimed broadcast out in batches, checkpointing after each one.
+
+    Delivery is at-least-once: a crash mid-batch resends that batch on resume.
+    """
+    broadcast = await session.get(Broadcast, broadcast_id)
+    if broadcast is None:
+        raise LookupError(f"broadcast {broadcast_id} not found")
+    tenant_id = str(broadcast.tenant_id)
+    if broadcast.total_count is None:
+        broadcast.total_count = await count_broadcast_targets(session, tenant_id, broadcast.target_location)
+    await session.commit()
+
+    limiter = ProviderRateLimiter(redis_client, settings.broadcast_rate_per_second)
+    status_callback = build_status_callback_url(broadcast_id)
+    targets = iter_broadcast_targets(session, tenant_id, broadcast.target_location, after=broadcast.last_phone_number)
+    async for batch in _iter_batches(targets, settings.broadcast_batch_size):
+        result = await send_whatsapp_broadcast(batch, broadcast.message_text, limiter, status_callback=status_callback)
+        await checkpoint_broadcast(session, broadcast_id, result, batch[-1])
+
+    broadcast.status = BroadcastStatus.completed
+    broadcast.completed_at = func.now()
+    await session.commit()
+    await session.refresh(broadcast)
+    return broadcast
+
+
+async def fail_broadcast(session: AsyncSession, claimed: ClaimedBroadcast, error: str) -> None:
+    """Requeue for another attempt (resuming at the cursor), or mark failed once attempts are exhausted."""
+    exhausted = claimed.attempts >= settings.broadcast_max_attempts
+    await session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == claimed.id)
+        .values(status=BroadcastStatus.failed if exhausted else BroadcastStatus.queued, error=error[:1000])
+    )
+    await session.commit()
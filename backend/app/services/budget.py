@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyBudget:
+    """End-to-end deadline for one reply, with a cap per stage.
+
+    Each stage gets ``min(cap, time left)``; when it runs out the stage is
+    cancelled and ``asyncio.TimeoutError`` raised so the caller can fall back.
+    """
+
+    def __init__(self, total_seconds: float) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.deadline = self._loop.time() + total_seconds
+        self.timings: dict[str, float] = {}
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - self._loop.time())
+
+    async def run(self, stage: str, awaitable: Awaitable[T], cap_seconds: float) -> T:
+        started = self._loop.time()
+        try:
+            return await asyncio.wait_for(awaitable, min(cap_seconds, self.remaining()))
+        finally:
+            self.timings[stage] = self._loop.time() - started
@@ -1,17 +1,87 @@
+import asyncio
 import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
 
 from redis import asyncio as redis
+from redis.commands.core import AsyncScript
 
 from app.core.config import settings
+from app.services.semantic_cache import semantic_cache
+
+T = TypeVar("T")
+
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+_redis_pool: redis.BlockingConnectionPool | None = None
+_redis_client: redis.Redis | None = None
+
+
+def create_redis_pool() -> redis.BlockingConnectionPool:
+    """Build a bounded pool; callers wait up to the pool timeout instead of opening extra sockets."""
+    return redis.BlockingConnectionPool.from_url(
+        settings.redis_url,
+        decode_responses=True,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout_seconds,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+
+
+def init_redis_pool() -> redis.Redis:
+    """Create the process-wide Redis client. Called once from the app lifespan."""
+    global _redis_pool, _redis_client
+    if _redis_client is None:
+        _redis_pool = create_redis_pool()
+        _redis_client = redis.Redis(connection_pool=_redis_pool)
+    return _redis_client
+
+
+async def close_redis_pool() -> None:
+    global _redis_pool, _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+    if _redis_pool is not None:
+        await _redis_pool.disconnect()
+    _redis_pool = None
+    _redis_client = None
 
 
 def get_redis_client() -> redis.Redis:
-    return redis.from_url(settings.redis_url, decode_responses=True)
+    """Return the shared client, creating the pool lazily outside the lifespan (scripts, tests)."""
+    return init_redis_pool()
+
+
+def get_redis_pool_stats() -> dict:
+    if _redis_pool is None:
+        return {"initialized": False, "max_connections": settings.redis_max_connections}
+    idle = len(getattr(_redis_pool, "_available_connections", []))
+    in_use = len(getattr(_redis_pool, "_in_use_connections", []))
+    return {
+        "initialized": True,
+        "max_connections": _redis_pool.max_connections,
+        "in_use": in_use,
+        "idle": idle,
+        "created": in_use + idle,
+    }
+
+
+def _location_key(location: str | None) -> str:
+    return (location or "all").lower().replace(" ", "-")
 
 
 def build_cache_key(tenant_id: str, location: str | None, intent_hash: str, language: str) -> str:
-    location_key = (location or "all").lower().replace(" ", "-")
-    return f"cache:{tenant_id}:{location_key}:{intent_hash}:{language}"
+    return f"cache:{tenant_id}:{_location_key(location)}:{intent_hash}:{language}"
+
+
+def build_semantic_scope(tenant_id: str, location: str | None, language: str) -> str:
+    """Scope key shaped like build_cache_key, so tenant prefixes invalidate both tiers."""
+    return f"cache:{tenant_id}:{_location_key(location)}:{language}"
 
 
 def hash_intent(seed: str) -> str:
@@ -19,9 +89,195 @@ def hash_intent(seed: str) -> str:
     return digest.hexdigest()[:12]
 
 
-async def get_cached_response(client: redis.Redis, cache_key: str) -> str | None:
-    return await client.get(cache_key)
+def encode_cached_response(response_text: str, response_type: str) -> str:
+    """Cache entry carrying the type the response was computed as, so repeats of an
+    unanswered question are still logged as unanswered."""
+    return json.dumps([response_type, response_text], ensure_ascii=False)
+
+
+def decode_cached_response(value: str) -> tuple[str, str]:
+    """(response_text, original response_type); plain-text entries from before types were stored read as answered."""
+    try:
+        response_type, response_text = json.loads(value)
+        return response_text, response_type
+    except (ValueError, TypeError):
+        return value, "cached"
+
+
+def cache_generation_key(tenant_id: str) -> str:
+    # Outside the tenant's cache: prefix, so invalidation scans never delete it
+    return f"cachegen:{tenant_id}"
+
+
+# Store only if the tenant's cache generation still matches what the writer
+# read before computing. ARGV: value, generation, ttl_seconds.
+STORE_IF_CURRENT_LUA = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+
+_store_script: AsyncScript | None = None
+
+
+def _get_store_script(client: redis.Redis) -> AsyncScript:
+    global _store_script
+    if _store_script is None:
+        _store_script = client.register_script(STORE_IF_CURRENT_LUA)
+    return _store_script
+
+
+async def get_cached_response(client: redis.Redis, cache_key: str, tenant_id: str) -> tuple[str | None, str]:
+    """Cached value and the tenant's cache generation, read in one round trip."""
+    value, generation = await client.mget(cache_key, cache_generation_key(tenant_id))
+    return value, generation or "0"
+
+
+async def set_cached_response(
+    client: redis.Redis,
+    cache_key: str,
+    value: str,
+    tenant_id: str,
+    generation: str,
+    ttl_seconds: int = 86400,
+) -> bool:
+    """Store ``value`` unless the tenant's cache was invalidated after ``generation`` was read."""
+    script = _get_store_script(client)
+    stored = await script(
+        keys=[cache_key, cache_generation_key(tenant_id)], args=[value, generation, ttl_seconds], client=client
+    )
+    return bool(stored)
+
+
+class LocalResponseCache:
+    """Per-process L1 in front of Redis: TTL + LRU eviction, with single-flight for misses."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: str, ttl_seconds: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        stale = [key for key in self._entries if key.startswith(prefix)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def single_flight(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run factory once per key; concurrent callers await the same result."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+        # Shield so one cancelled waiter does not cancel the shared computation
+        return await asyncio.shield(future)
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheGenerations:
+    """Per-prefix invalidation counters for the in-process caches.
+
+    Callers read ``current`` before computing a response and store it only
+    if the value is unchanged, so a computation that straddles an
+    invalidation cannot write the pre-invalidation answer back. Passed to
+    the invalidation listener like the caches themselves.
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[str, int] = {}
+        self._epoch = 0  # bumped by clear(), which drops every prefix at once
+
+    def current(self, prefix: str) -> tuple[int, int]:
+        return self._epoch, self._counts.get(prefix, 0)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        self._counts[prefix] = self._counts.get(prefix, 0) + 1
+        return 0
+
+    def clear(self) -> None:
+        self._epoch += 1
+
+
+response_cache = LocalResponseCache(settings.l1_cache_max_entries, settings.l1_cache_ttl_seconds)
+cache_generations = CacheGenerations()
+
+
+def tenant_cache_prefix(tenant_id: str) -> str:
+    return f"cache:{tenant_id}:"
+
+
+async def invalidate_tenant_cache(client: redis.Redis, tenant_id: str) -> int:
+    """Drop a tenant's cached responses in Redis and tell every worker to drop its L1 copies.
+
+    The generation bump comes first, so responses still being computed
+    from before the invalidation fail their conditional store.
+    """
+    prefix = tenant_cache_prefix(tenant_id)
+    await client.incr(cache_generation_key(tenant_id))
+    deleted = 0
+    batch: list[str] = []
+    async for key in client.scan_iter(match=f"{prefix}*", count=500):
+        batch.append(key)
+        if len(batch) >= 500:
+            deleted += await client.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += await client.unlink(*batch)
+    cache_generations.invalidate_prefix(prefix)
+    response_cache.invalidate_prefix(prefix)
+    semantic_cache.invalidate_prefix(prefix)
+    await client.publish(CACHE_INVALIDATION_CHANNEL, prefix)
+    return deleted
 
 
-async def set_cached_response(client: redis.Redis, cache_key: str, value: str, ttl_seconds: int = 86400) -> None:
-    await client.set(cache_key, value, ex=ttl_seconds)
+async def run_invalidation_listener(client: redis.Redis, *caches) -> None:
+    """Apply invalidations published by any worker to the given in-process caches. Runs for the app lifetime."""
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message:
+                        for cache in caches:
+                            cache.invalidate_prefix(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Invalidations may have been missed while disconnected
+            for cache in caches:
+                cache.clear()
+            await asyncio.sleep(5)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from functools import lru_cache
+
+TokenCounter = Callable[[str], int]
+
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+# Start of a paragraph break that the next segment may complete
+_PARTIAL_BREAK = re.compile(r"\n[ \t]*$")
+# Latin/Tamil full stop, ?, !, Devanagari danda and double danda, Urdu full stop
+SENTENCE_BREAK = re.compile(r"(?<=[.!?।॥۔])\s+")
+
+
+def whitespace_token_count(text: str) -> int:
+    return len(text.split())
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(name: str) -> TokenCounter:
+    """``whitespace`` or a tiktoken encoding name (e.g. ``cl100k_base``; needs tiktoken installed)."""
+    if name == "whitespace":
+        return whitespace_token_count
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(name)
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+class _ParagraphSplitter:
+    """Incremental paragraph splitter; a paragraph (or its break) may span segments."""
+
+    def __init__(self) -> None:
+        self._carry: list[str] = []
+        self._pending = ""
+
+    def feed(self, segment: str) -> Iterator[str]:
+        segment = self._pending + segment
+        start = 0
+        for match in PARAGRAPH_BREAK.finditer(segment):
+            self._carry.append(segment[start:match.start()])
+            paragraph = "".join(self._carry).strip()
+            self._carry = []
+            if paragraph:
+                yield paragraph
+            start = match.end()
+        partial = _PARTIAL_BREAK.search(segment, start)
+        end = partial.start() if partial else len(segment)
+        self._carry.append(segment[start:end])
+        self._pending = segment[end:]
+
+    def close(self) -> Iterator[str]:
+        paragraph = "".join(self._carry).strip()
+        self._carry = []
+        if paragraph:
+            yield paragraph
+
+
+def iter_paragraphs(segments: Iterable[str]) -> Iterator[str]:
+    """Paragraphs from a stream of text segments (pages)."""
+    splitter = _ParagraphSplitter()
+    for segment in segments:
+        yield from splitter.feed(segment)
+    yield from splitter.close()
+
+
+async def aiter_paragraphs(segments: AsyncIterable[str]) -> AsyncIterator[str]:
+    splitter = _ParagraphSplitter()
+    async for segment in segments:
+        for paragraph in splitter.feed(segment):
+            yield paragraph
+    for paragraph in splitter.close():
+        yield paragraph
+
+
+def iter_sentences(paragraph: str) -> Iterator[str]:
+    start = 0
+    for match in SENTENCE_BREAK.finditer(paragraph):
+        yield paragraph[start:match.start()]
+        start = match.end()
+    if start < len(paragraph):
+        yield paragraph[start:]
+
+
+def _split_oversized(sentence: str, max_tokens: int, count_tokens: TokenCounter) -> Iterator[tuple[str, int]]:
+    """Hard-wrap a single sentence longer than the limit on word boundaries."""
+    words: list[str] = []
+    total = 0
+    for word in sentence.split():
+        n = count_tokens(word)
+        if words and total + n > max_tokens:
+            yield " ".join(words), total
+            words, total = [], 0
+        words.append(word)
+        total += n
+    if words:
+        yield " ".join(words), total
+
+
+def _chunk_paragraph(
+    paragraph: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    count_tokens: TokenCounter,
+) -> Iterator[str]:
+    sentences: list[str] = []
+    counts: list[int] = []
+    total = 0
+    for sentence in iter_sentences(paragraph):
+        n = count_tokens(sentence)
+        pieces = _split_oversized(sentence, max_tokens, count_tokens) if n > max_tokens else [(sentence, n)]
+        for piece, piece_tokens in pieces:
+            if sentences and total + piece_tokens > max_tokens:
+                yield " ".join(sentences)
+                keep = 0
+                kept_tokens = 0
+                while keep < len(sentences) and kept_tokens + counts[-1 - keep] <= overlap_tokens:
+                    kept_tokens += counts[-1 - keep]
+                    keep += 1
+                if kept_tokens + piece_tokens > max_tokens:
+                    keep, kept_tokens = 0, 0
+                sentences = sentences[len(sentences) - keep:]
+                counts = counts[len(counts) - keep:]
+                total = kept_tokens
+            sentences.append(piece)
+            counts.append(piece_tokens)
+            total += piece_tokens
+    if sentences:
+        yield " ".join(sentences)
+
+
+def iter_chunks(
+    segments: Iterable[str],
+    max_tokens: int = 500,
+    overlap_tokens: int = 0,
+    count_tokens: TokenCounter = whitespace_token_count,
+) -> Iterator[str]:
+    """Lazily chunk streamed text in linear time.
+
+    Paragraphs that fit become one chunk; longer ones are packed sentence by
+    sentence with a running token count, repeating up to ``overlap_tokens``
+    of trailing sentences at the start of the next chunk.
+    """
+    for paragraph in iter_paragraphs(segments):
+        yield from _chunk_paragraph(paragraph, max_tokens, overlap_tokens, count_tokens)
+
+
+async def aiter_chunks(
+    segments: AsyncIterable[str],
+    max_tokens: int = 500,
+    overlap_tokens: int = 0,
+    count_tokens: TokenCounter = whitespace_token_count,
+) -> AsyncIterator[str]:
+    """iter_chunks over segments produced asynchronously (e.g. OCR pages)."""
+    async for paragraph in aiter_paragraphs(segments):
+        for chunk in _chunk_paragraph(paragraph, max_tokens, overlap_tokens, count_tokens):
+            yield chunk
+
+
+def chunk_text(text: str, max_tokens: int = 500) -> list[str]:
+    """Chunk a whole string (see iter_chunks)."""
+    return list(iter_chunks([text], max_tokens=max_tokens))
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import random
+import unicodedata
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timezone
+
+from sqlalchemy import insert, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import UnansweredCluster, UnansweredClusterBand, UnansweredClusterStats, UnansweredQuery
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16  # 4 rows per band: pairs above ~0.5 Jaccard usually share a band
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed, so signatures stay comparable across processes and restarts
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+
+# Only one worker clusters at a time, so two similar new queries never open two clusters
+CLUSTER_LOCK_KEY = 0x5A5A0019
+
+CLAIM_UNCLUSTERED_SQL = """
+SELECT id, tenant_id, query_text, query_language, location, created_at
+FROM unanswered_queries
+WHERE cluster_id IS NULL AND tenant_id IS NOT NULL
+ORDER BY created_at
+LIMIT :batch_size;
+"""
+
+CANDIDATE_CLUSTERS_SQL = """
+SELECT b.band_hash, c.id, c.signature
+FROM unanswered_cluster_bands b
+JOIN unanswered_clusters c ON c.id = b.cluster_id
+WHERE b.tenant_id = :tenant_id AND b.band_hash = ANY(:band_hashes);
+"""
+
+BUMP_CLUSTER_COUNTS_SQL = """
+UPDATE unanswered_clusters c
+SET query_count = c.query_count + v.n, updated_at = NOW()
+FROM unnest(CAST(:cluster_ids AS uuid[]), CAST(:counts AS integer[])) AS v(id, n)
+WHERE c.id = v.id;
+"""
+
+
+def normalize_query(query_text: str) -> str:
+    """Lower-case, with punctuation and symbols removed and whitespace collapsed.
+
+    Combining marks are kept, so Indic words stay intact.
+    """
+    cleaned = "".join(" " if unicodedata.category(char)[0] in "PSZC" else char for char in query_text.lower())
+    return " ".join(cleaned.split())
+
+
+def shingles(normalized: str) -> set[str]:
+    """Character n-grams; robust to inflection and typos in any script."""
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def _hash64(value: str, signed: bool = False) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big", signed=signed)
+
+
+def minhash_signature(query_text: str) -> list[int]:
+    hashes = [_hash64(shingle) for shingle in shingles(normalize_query(query_text))]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_hashes(signature: list[int]) -> list[int]:
+    """One signed 64-bit key per LSH band (fits a Postgres bigint)."""
+    rows = len(signature) // NUM_BANDS
+    return [
+        _hash64(f"{band}:" + ",".join(map(str, signature[band * rows:(band + 1) * rows])), signed=True)
+        for band in range(NUM_BANDS)
+    ]
+
+
+def estimate_similarity(left: list[int], right: list[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(a == b for a, b in zip(left, right)) / len(left)
+
+
+@dataclass
+class _Candidate:
+    id: uuid.UUID
+    signature: list[int]
+
+
+@dataclass
+class _TenantIndex:
+    """The slice of a tenant's LSH index touched by one batch, plus clusters opened in it."""
+
+    by_band: dict[int, dict[uuid.UUID, _Candidate]] = field(default_factory=dict)
+
+    def add(self, band: int, candidate: _Candidate) -> None:
+        self.by_band.setdefault(band, {})[candidate.id] = candidate
+
+    def best_match(self, signature: list[int], bands: list[int], threshold: float) -> uuid.UUID | None:
+        candidates = {c.id: c for band in bands for c in self.by_band.get(band, {}).values()}
+        scored = [(estimate_similarity(signature, c.signature), c.id) for c in candidates.values()]
+        scored = [item for item in scored if item[0] >= threshold]
+        return max(scored, key=lambda item: item[0])[1] if scored else None
+
+
+async def _load_index(session: AsyncSession, tenant_id: uuid.UUID, bands: set[int]) -> _TenantIndex:
+    index = _TenantIndex()
+    result = await session.execute(
+        text(CANDIDATE_CLUSTERS_SQL), {"tenant_id": tenant_id, "band_hashes": sorted(bands)}
+    )
+    for band, cluster_id, signature in result:
+        index.add(band, _Candidate(cluster_id, list(signature)))
+    return index
+
+
+async def cluster_unanswered_queries(session: AsyncSession, batch_size: int | None = None) -> int:
+    """Assign the oldest unclustered queries to clusters; returns how many were assigned.
+
+    Candidates come from LSH band lookups (one indexed query per tenant per
+    batch), so the cost per query does not grow with the number of clusters.
+    A query joins the most similar candidate at or above
+    ``unanswered_cluster_threshold`` or opens a new cluster. Assignments,
+    new clusters and counters commit together.
+    """
+    locked = (await session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": CLUSTER_LOCK_KEY})).scalar()
+    if not locked:
+        await session.rollback()
+        return 0
+    rows = (
+        await session.execute(
+            text(CLAIM_UNCLUSTERED_SQL), {"batch_size": batch_size or settings.unanswered_cluster_batch_size}
+        )
+    ).all()
+    if not rows:
+        await session.rollback()
+        return 0
+
+    signatures = {row.id: minhash_signature(row.query_text) for row in rows}
+    bands = {row.id: band_hashes(signatures[row.id]) for row in rows}
+    indexes: dict[uuid.UUID, _TenantIndex] = {}
+    for tenant_id in {row.tenant_id for row in rows}:
+        tenant_bands = {band for row in rows if row.tenant_id == tenant_id for band in bands[row.id]}
+        indexes[tenant_id] = await _load_index(session, tenant_id, tenant_bands)
+
+    new_clusters: list[dict] = []
+    new_bands: list[dict] = []
+    assignments: list[dict] = []
+    counts: Counter[uuid.UUID] = Counter()
+    stats: Counter[tuple] = Counter()
+    for row in rows:
+        index = indexes[row.tenant_id]
+        cluster_id = index.best_match(signatures[row.id], bands[row.id], settings.unanswered_cluster_threshold)
+        if cluster_id is None:
+            cluster_id = uuid.uuid4()
+            new_clusters.append({
+                "id": cluster_id,
+                "tenant_id": row.tenant_id,
+                "representative_text": row.query_text.strip()[:500],
+                "signature": signatures[row.id],
+                "query_count": 0,
+            })
+            candidate = _Candidate(cluster_id, signatures[row.id])
+            for band in bands[row.id]:
+                index.add(band, candidate)
+                new_bands.append({"tenant_id": row.tenant_id, "band_hash": band, "cluster_id": cluster_id})
+        assignments.append({"id": row.id, "cluster_id": cluster_id})
+        counts[cluster_id] += 1
+        day = row.created_at.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        stats[(cluster_id, day, row.query_language or "", row.location or "", row.tenant_id)] += 1
+
+    if new_clusters:
+        await session.execute(insert(UnansweredCluster), new_clusters)
+        await session.execute(pg_insert(UnansweredClusterBand).on_conflict_do_nothing(), new_bands)
+    await session.execute(update(UnansweredQuery), assignments)
+    await session.execute(
+        text(BUMP_CLUSTER_COUNTS_SQL),
+        {"cluster_ids": list(counts), "counts": list(counts.values())},
+    )
+    upsert = pg_insert(UnansweredClusterStats).values([
+        {"cluster_id": c, "bucket_start": day, "language": lang, "location": loc, "tenant_id": t, "count": n}
+        for (c, day, lang, loc, t), n in stats.items()
+    ])
+    await session.execute(upsert.on_conflict_do_update(
+        index_elements=["cluster_id", "bucket_start", "language", "location"],
+        set_={"count": UnansweredClusterStats.count + upsert.excluded.count},
+    ))
+    await session.commit()
+    return len(rows)
+
+
+async def run_clustering_loop() -> None:
+    """Cluster new unanswered queries, draining the backlog before sleeping."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                assigned = await cluster_unanswered_queries(session)
+        except Exception:
+            logger.exception("unanswered query clustering failed")  # Nothing committed; retried next run
+            assigned = 0
+        if assigned < settings.unanswered_cluster_batch_size:
+            await asyncio.sleep(settings.unanswered_cluster_interval_seconds)
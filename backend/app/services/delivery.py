@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Mapping
+
+from redis import asyncio as redis
+from redis.exceptions import ResponseError
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import BroadcastDeliveryStats
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_STREAM = "delivery:events"
+DELIVERY_GROUP = "delivery-writers"
+# Entries the database rejects are parked here (and acked) instead of blocking their batch forever
+DELIVERY_DEAD_LETTER_STREAM = "delivery:events:dead"
+
+# Column widths in delivery_events; longer values are cut rather than failing the batch
+MESSAGE_SID_MAX_LENGTH = 64
+PHONE_NUMBER_MAX_LENGTH = 20
+ERROR_CODE_MAX_LENGTH = 20
+
+# Caps the sessions held by write-through callbacks while Redis is down
+_direct_writes = asyncio.Semaphore(settings.delivery_direct_write_concurrency)
+
+# Twilio MessageStatus values with a counter (undelivered counts as failed);
+# queued/accepted/sending are not recorded
+COUNTED_STATUSES = frozenset({"sent", "delivered", "read", "failed", "undelivered"})
+
+# Events are deduplicated on (message_sid, status) so Twilio retries and
+# stream redeliveries never double count; only newly inserted events feed the
+# counters, aggregated per (broadcast, location) in the same statement.
+WRITE_DELIVERY_EVENTS_SQL = """
+WITH incoming AS (
+    SELECT *
+    FROM unnest(
+        CAST(:broadcast_ids AS uuid[]),
+        CAST(:message_sids AS varchar[]),
+        CAST(:phone_numbers AS varchar[]),
+        CAST(:statuses AS varchar[]),
+        CAST(:error_codes AS varchar[])
+    ) AS t(broadcast_id, message_sid, phone_number, status, error_code)
+),
+inserted AS (
+    INSERT INTO delivery_events (broadcast_id, tenant_id, message_sid, phone_number, location, status, error_code)
+    SELECT
+        i.broadcast_id,
+        b.tenant_id,
+        i.message_sid,
+        i.phone_number,
+        COALESCE(u.last_known_location, b.target_location, 'unknown'),
+        i.status,
+        i.error_code
+    FROM incoming i
+    JOIN broadcasts b ON b.id = i.broadcast_id
+    LEFT JOIN users u ON u.phone_number = i.phone_number
+    ON CONFLICT (message_sid, status) DO NOTHING
+    RETURNING broadcast_id, tenant_id, location, status
+)
+INSERT INTO broadcast_delivery_stats AS s (broadcast_id, location, tenant_id, sent, delivered, read, failed)
+SELECT
+    broadcast_id,
+    location,
+    tenant_id,
+    count(*) FILTER (WHERE status = 'sent'),
+    count(*) FILTER (WHERE status = 'delivered'),
+    count(*) FILTER (WHERE status = 'read'),
+    count(*) FILTER (WHERE status IN ('failed', 'undelivered'))
+FROM inserted
+GROUP BY broadcast_id, location, tenant_id
+ON CONFLICT (broadcast_id, location) DO UPDATE SET
+    sent = s.sent + EXCLUDED.sent,
+    delivered = s.delivered + EXCLUDED.delivered,
+    read = s.read + EXCLUDED.read,
+    failed = s.failed + EXCLUDED.failed,
+    updated_at = NOW();
+"""
+
+
+def build_status_callback_url(broadcast_id: uuid.UUID) -> str | None:
+    if not settings.public_base_url:
+        return None
+    return f"{settings.public_base_url.rstrip('/')}/webhook/status?broadcast_id={broadcast_id}"
+
+
+def clean_delivery_event(fields: Mapping[str, str]) -> dict[str, str] | None:
+    """A writable event (values cut to their column widths), or None if it cannot be recorded."""
+    status = (fields.get("status") or "").lower()
+    message_sid = fields.get("message_sid")
+    broadcast_id = fields.get("broadcast_id")
+    if status not in COUNTED_STATUSES or not message_sid or not broadcast_id:
+        return None
+    try:
+        uuid.UUID(broadcast_id)
+    except ValueError:
+        return None
+    return {
+        "broadcast_id": broadcast_id,
+        "message_sid": message_sid[:MESSAGE_SID_MAX_LENGTH],
+        "phone_number": (fields.get("phone_number") or "")[:PHONE_NUMBER_MAX_LENGTH],
+        "status": status,
+        "error_code": (fields.get("error_code") or "")[:ERROR_CODE_MAX_LENGTH],
+    }
+
+
+def parse_status_callback(form: Mapping[str, str], broadcast_id: str | None) -> dict[str, str] | None:
+    """Stream entry for a Twilio status callback, or None if it is not a counted broadcast status."""
+    return clean_delivery_event({
+        "broadcast_id": broadcast_id or "",
+        "message_sid": form.get("MessageSid") or "",
+        "phone_number": (form.get("To") or "").removeprefix("whatsapp:"),
+        "status": form.get("MessageStatus") or "",
+        "error_code": form.get("ErrorCode") or "",
+    })
+
+
+async def write_delivery_events(session: AsyncSession, events: list[Mapping[str, str]]) -> None:
+    """Insert a batch of events and bump the per-broadcast/location counters (caller commits)."""
+    if not events:
+        return
+    await session.execute(
+        text(WRITE_DELIVERY_EVENTS_SQL),
+        {
+            "broadcast_ids": [uuid.UUID(event["broadcast_id"]) for event in events],
+            "message_sids": [event["message_sid"] for event in events],
+            "phone_numbers": [event["phone_number"] or None for event in events],
+            "statuses": [event["status"] for event in events],
+            "error_codes": [event["error_code"] or None for event in events],
+        },
+    )
+
+
+async def record_status_callback(client: redis.Redis, event: dict[str, str]) -> bool:
+    """Buffer an event on the Redis stream; write it through directly if Redis is down.
+
+    Returns False when the event could not be recorded (Redis and the
+    database both unavailable, or too many write-throughs already running),
+    so the webhook can ask Twilio to retry.
+    """
+    try:
+        await client.xadd(DELIVERY_STREAM, event, maxlen=settings.delivery_stream_max_len, approximate=True)
+        return True
+    except Exception:
+        pass  # Redis not available
+    if _direct_writes.locked():
+        return False
+    async with _direct_writes:
+        try:
+            async with AsyncSessionLocal() as session:
+                await write_delivery_events(session, [event])
+                await session.commit()
+        except Exception:
+            logger.warning("could not record delivery status %s", event["message_sid"], exc_info=True)
+            return False
+    return True
+
+
+async def _ensure_group(client: redis.Redis) -> None:
+    try:
+        await client.xgroup_create(DELIVERY_STREAM, DELIVERY_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def flush_delivery_events(client: redis.Redis, consumer: str) -> int:
+    """Write one batch from the stream; entries are acked only after the commit.
+
+    Entries left pending by a dead consumer are reclaimed first.
+    """
+    batch_size = settings.delivery_flush_batch_size
+    _, entries, *_ = await client.xautoclaim(
+        DELIVERY_STREAM, DELIVERY_GROUP, consumer, min_idle_time=settings.delivery_reclaim_idle_ms, count=batch_size,
+    )
+    if not entries:
+        reply = await client.xreadgroup(
+            DELIVERY_GROUP, consumer, {DELIVERY_STREAM: ">"}, count=batch_size, block=settings.delivery_flush_block_ms,
+        )
+        entries = reply[0][1] if reply else []
+    if not entries:
+        return 0
+
+    events = []
+    rejected = []
+    for entry_id, fields in entries:
+        event = clean_delivery_event(fields)
+        if event is None:
+            rejected.append((entry_id, fields))
+        else:
+            events.append((entry_id, event))
+    try:
+        await _write_events([event for _, event in events])
+    except (DataError, IntegrityError):
+        # One bad entry fails the whole statement; write the rest one by one
+        for entry_id, event in events:
+            try:
+                await _write_events([event])
+            except (DataError, IntegrityError):
+                rejected.append((entry_id, event))
+    for entry_id, fields in rejected:
+        logger.warning("dead-lettering delivery event %s: %s", entry_id, fields)
+        await client.xadd(DELIVERY_DEAD_LETTER_STREAM, fields, maxlen=settings.delivery_stream_max_len, approximate=True)
+    await client.xack(DELIVERY_STREAM, DELIVERY_GROUP, *(entry_id for entry_id, _ in entries))
+    return len(entries)
+
+
+async def _write_events(events: list[Mapping[str, str]]) -> None:
+    async with AsyncSessionLocal() as session:
+        await write_delivery_events(session, events)
+        await session.commit()
+
+
+async def run_delivery_flusher(client: redis.Redis, consumer: str) -> None:
+    """Drain status callbacks from the stream into Postgres in batches."""
+    while True:
+        try:
+            await _ensure_group(client)
+            while True:
+                await flush_delivery_events(client, consumer)
+        except Exception:
+            await asyncio.sleep(5)  # Redis or database not available; unacked entries stay pending
+
+
+async def get_broadcast_coverage(
+    session: AsyncSession,
+    tenant_id: str,
+    broadcast_id: uuid.UUID | None = None,
+) -> list[dict]:
+    """Delivery totals per location from the running counters (no event scan)."""
+    stats = BroadcastDeliveryStats
+    query = (
+        select(
+            stats.location,
+            func.sum(stats.sent).label("sent"),
+            func.sum(stats.delivered).label("delivered"),
+            func.sum(stats.read).label("read"),
+            func.sum(stats.failed).label("failed"),
+        )
+        .where(stats.tenant_id == uuid.UUID(tenant_id))
+        .group_by(stats.location)
+        .order_by(stats.location)
+    )
+    if broadcast_id is not None:
+        query = query.where(stats.broadcast_id == broadcast_id)
+    rows = (await session.execute(query)).all()
+    return [
+        {
+            "location": row.location,
+            "sent_count": row.sent,
+            "delivered_count": row.delivered,
+            "read_count": row.read,
+            "failed_count": row.failed,
+            "success_rate": row.delivered / row.sent if row.sent else 0.0,
+        }
+        for row in rows
+    ]
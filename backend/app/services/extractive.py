@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from app.services.chunking import iter_sentences
+from app.services.retrieval import RetrievedChunk
+
+EXTRACTIVE_MAX_CHARS = 400
+
+
+def is_decisive(chunks: list[RetrievedChunk], max_distance: float, min_margin: float) -> bool:
+    """The top chunk is close to the query and clearly ahead of the runner-up.
+
+    ``chunks`` are ordered by distance, as ``retrieve_chunks`` returns them.
+    """
+    if not chunks or chunks[0].distance > max_distance:
+        return False
+    return len(chunks) == 1 or chunks[1].distance - chunks[0].distance >= min_margin
+
+
+def _excerpt(text: str, max_chars: int) -> str:
+    excerpt = ""
+    for sentence in iter_sentences(text):
+        candidate = f"{excerpt} {sentence}".strip()
+        if excerpt and len(candidate) > max_chars:
+            break
+        excerpt = candidate
+    if len(excerpt) > max_chars:
+        excerpt = excerpt[:max_chars].rsplit(" ", 1)[0] + "…"
+    return excerpt
+
+
+def _contact_line(chunk: RetrievedChunk) -> str | None:
+    contacts = [part for part in (chunk.contact_phone, chunk.contact_email) if part]
+    if not contacts:
+        return None
+    line = "Contact: " + ", ".join(contacts)
+    return f"{line} ({chunk.working_hours})" if chunk.working_hours else line
+
+
+def build_extractive_answer(chunk: RetrievedChunk, max_chars: int = EXTRACTIVE_MAX_CHARS) -> str:
+    """Reply quoting the leading sentences of a retrieved notice chunk, with the tenant's contact details, without an LLM."""
+    source = " - ".join(part for part in (chunk.tenant_name, chunk.title) if part)
+    excerpt = _excerpt(chunk.chunk_text, max_chars)
+    lines = [f"{source}: {excerpt}" if source else excerpt]
+    contact = _contact_line(chunk)
+    if contact:
+        lines.append(contact)
+    return "\n".join(lines)
@@ -1,25 +1,184 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from redis import asyncio as redis
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models import TenantGuardrailRule
+from app.services.phrases import compile_phrases, normalize_phrase
+
+logger = logging.getLogger(__name__)
+
+GUARDRAIL_INVALIDATION_CHANNEL = "guardrails:invalidate"
+
+BLOCKED_RESPONSE = "I can only provide verified information. Please contact the department directly."
+
+# Applies to every tenant: no diagnoses, no speculation, no speaking for the office
+DEFAULT_FORBIDDEN_PHRASES = frozenset({
+    "you have",
+    "diagnosed with",
+    "treatment for",
+    "i am from",
+    "official statement",
+    "might be",
+    "probably",
+    "i think",
+})
+
+
+@dataclass(frozen=True)
+class GuardrailMatch:
+    rule: str
+    start: int
+    end: int
+
+
+@dataclass
+class GuardrailResult:
+    response: str
+    is_safe: bool
+    matches: list[GuardrailMatch]
+
+
+class GuardrailScanner:
+    """A tenant's forbidden phrases compiled into one regex; one pass finds every match."""
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self.rules = frozenset(filter(None, (normalize_phrase(phrase) for phrase in phrases)))
+        self.pattern = compile_phrases(self.rules)
+        self.max_rule_length = max((len(rule) for rule in self.rules), default=0)
+
+    def scan(self, text: str, start: int = 0) -> list[GuardrailMatch]:
+        """Matches from ``start`` on; offsets index ``text`` (exact unless casefolding changes lengths)."""
+        if self.pattern is None:
+            return []
+        offset = max(0, start - 1)  # one character of context for the word-boundary lookbehind
+        return [
+            GuardrailMatch(normalize_phrase(match.group()), offset + match.start(), offset + match.end())
+            for match in self.pattern.finditer(text[offset:].casefold(), start - offset)
+        ]
+
+    def check(self, response: str) -> GuardrailResult:
+        matches = self.scan(response)
+        if matches:
+            return GuardrailResult(BLOCKED_RESPONSE, False, matches)
+        return GuardrailResult(response, True, [])
+
+    def incremental(self) -> IncrementalGuardrail:
+        return IncrementalGuardrail(self)
+
+
+class IncrementalGuardrail:
+    """Checks a streamed response as tokens arrive, rescanning only the tail.
+
+    A match touching the end of the text so far is held back until the next
+    token (or ``close``) shows it ends on a word boundary. Each match is
+    reported once. The rescanned tail is twice the longest rule, leaving
+    room for phrases whose spaces arrive as longer whitespace runs.
+    """
+
+    def __init__(self, scanner: GuardrailScanner) -> None:
+        self.scanner = scanner
+        self.text = ""
+        self.matches: list[GuardrailMatch] = []
+        self._checked = 0
+        self._reported = 0
+
+    def feed(self, token: str) -> list[GuardrailMatch]:
+        self.text += token
+        return self._scan(final=False)
+
+    def close(self) -> list[GuardrailMatch]:
+        return self._scan(final=True)
+
+    def _scan(self, final: bool) -> list[GuardrailMatch]:
+        window = max(0, self._checked - 2 * self.scanner.max_rule_length)
+        found = [
+            match for match in self.scanner.scan(self.text, window)
+            if match.end > self._reported and (final or match.end < len(self.text))
+        ]
+        if found:
+            self._reported = found[-1].end
+        self._checked = len(self.text)
+        self.matches.extend(found)
+        return found
+
+
+class GuardrailRegistry:
+    """Compiled scanners per tenant (defaults plus the tenant's own rules), built on first use."""
+
+    def __init__(self) -> None:
+        self.default = GuardrailScanner(DEFAULT_FORBIDDEN_PHRASES)
+        self._scanners: dict[str, GuardrailScanner] = {}
+
+    async def get(self, tenant_id: str | None) -> GuardrailScanner:
+        if not tenant_id:
+            return self.default
+        scanner = self._scanners.get(tenant_id)
+        if scanner is None:
+            scanner = await self._load(tenant_id)
+        return scanner
+
+    async def _load(self, tenant_id: str) -> GuardrailScanner:
+        try:
+            tenant = uuid.UUID(tenant_id)
+        except ValueError:
+            return self.default  # placeholder tenant ids have no rules of their own
+        try:
+            async with AsyncSessionLocal() as session:
+                rows = await session.execute(
+                    select(TenantGuardrailRule.phrase).where(TenantGuardrailRule.tenant_id == tenant)
+                )
+                phrases = list(rows.scalars())
+        except Exception:
+            return self.default  # Database not available; not cached, so the next reply retries
+        scanner = GuardrailScanner([*DEFAULT_FORBIDDEN_PHRASES, *phrases]) if phrases else self.default
+        self._scanners[tenant_id] = scanner
+        return scanner
+
+    def invalidate(self, tenant_id: str) -> None:
+        self._scanners.pop(tenant_id, None)
+
+    def clear(self) -> None:
+        self._scanners.clear()
+
+
+guardrail_registry = GuardrailRegistry()
+
 
 def post_process_response(response: str) -> tuple[str, bool]:
     """
-    Check response for forbidden keywords.
+    Check response against the default forbidden phrases.
     Returns (response, is_safe).
     """
-    forbidden = {
-        "you have",
-        "diagnosed with",
-        "treatment for",
-        "i am from",
-        "official statement",
-        "might be",
-        "probably",
-        "i think",
-    }
-    
-    response_lower = response.lower()
-    for keyword in forbidden:
-        if keyword in response_lower:
-            return ("I can only provide verified information. Please contact the department directly.", False)
-    
-    return (response, True)
+    result = guardrail_registry.default.check(response)
+    return result.response, result.is_safe
+
+
+async def publish_guardrail_change(client: redis.Redis, tenant_id: str) -> None:
+    """Tell every process to drop its compiled rules for the tenant."""
+    await client.publish(GUARDRAIL_INVALIDATION_CHANNEL, tenant_id)
+
+
+async def run_guardrail_invalidation_listener(client: redis.Redis) -> None:
+    """Drop compiled rule sets whenever a tenant edits them. Runs for the app lifetime."""
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(GUARDRAIL_INVALIDATION_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message:
+                        guardrail_registry.invalidate(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Invalidations may have been missed while disconnected
+            guardrail_registry.clear()
+            await asyncio.sleep(5)
@@ -1,64 +1,263 @@
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import time
 import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Container, Iterable
+from dataclasses import dataclass
+from itertools import islice
+from typing import TypeVar
 
-from app.models import Notice
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
+from app.core.config import settings
+from app.db.session import engine
+from app.models import Embedding, Notice
+from app.models.tables import IngestionState
+from app.services.chunking import aiter_chunks, get_token_counter
+from app.services.llm import generate_embeddings
+from app.services.ocr import get_ocr_stage
 
-def chunk_text(text: str, max_tokens: int = 500) -> list[str]:
-    """Simple chunker: split by paragraphs, fallback to sentences if too large."""
-    paragraphs = text.split("\n\n")
-    chunks = []
-    for para in paragraphs:
-        if len(para.split()) <= max_tokens:
-            chunks.append(para.strip())
+StageCallback = Callable[[IngestionState], Awaitable[None]]
+T = TypeVar("T")
+
+
+def chunk_hash(chunk: str) -> str:
+    """Content identity of a chunk (matches the backfill in the content_hash migration)."""
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+async def load_chunk_hashes(session: AsyncSession, notice_id: uuid.UUID) -> set[str]:
+    result = await session.execute(select(Embedding.content_hash).where(Embedding.notice_id == notice_id))
+    return set(result.scalars())
+
+
+async def _batched(items: Iterable[T] | AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    if not isinstance(items, AsyncIterable):
+        iterator = iter(items)
+        while batch := list(islice(iterator, size)):
+            yield batch
+        return
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _no_stage(_: IngestionState) -> None:
+    pass
+
+
+async def iter_notice_segments(
+    notice: Notice,
+    file_content: bytes | None = None,
+    on_stage: StageCallback | None = None,
+) -> AsyncIterator[str]:
+    """Text of a notice as a stream of segments: the typed content, then one per OCR page.
+
+    ``on_stage`` gets ``ocr`` just before the first page is recognised and
+    ``chunking`` as the first text the chunker has to work through is
+    handed over (for image notices, the first page rather than the short
+    typed caption). Sets ``notice.ocr_processed`` once every page is read.
+    """
+    report = on_stage or _no_stage
+    ocr_stage = get_ocr_stage()
+    if not (notice.file_type in {"jpg", "png"} and file_content and ocr_stage):
+        await report(IngestionState.chunking)
+        yield notice.content
+        return
+
+    yield notice.content
+    await report(IngestionState.ocr)
+    first_page = True
+    async for page in ocr_stage.iter_pages(file_content):
+        if first_page:
+            await report(IngestionState.chunking)
+            yield f"\n\n{page}"  # the scan is separate from the typed caption
+            first_page = False
         else:
-            sentences = para.split(". ")
-            current_chunk = ""
-            for sentence in sentences:
-                if len((current_chunk + sentence).split()) <= max_tokens:
-                    current_chunk += sentence + ". "
-                else:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence + ". "
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-    return [c for c in chunks if c]
+            yield f"\n{page}"  # a sentence may run on past a page break; the chunker decides
+    notice.ocr_processed = True
 
 
-async def process_notice_upload(
+async def iter_notice_embeddings(
     notice: Notice,
     file_content: bytes | None = None,
-) -> list[dict]:
+    on_stage: StageCallback | None = None,
+    known_hashes: Container[str] = frozenset(),
+) -> AsyncIterator[dict]:
     """
-    Stub ingestion pipeline:
+    Streaming ingestion pipeline:
     1. OCR if image (jpg/png)
-    2. Chunk text
-    3. Generate embeddings
-    4. Return embedding data for DB insert
+    2. Chunk text lazily
+    3. Embed new or changed chunks one batch at a time
+    4. Yield embedding rows for DB insert
+
+    Chunks whose hash is in ``known_hashes`` are already stored; they are yielded
+    with ``embedding=None`` so the writer only moves them to their new position.
+    Repeated chunks within a notice are yielded once. Only one embedding batch is
+    held at a time, so memory stays flat for long notices. The stages overlap, so
+    ``on_stage`` (job progress reporting) is awaited when each stage's work
+    actually begins: OCR and chunking from the segment stream, embedding just
+    before the first provider call.
+    """
+    report = on_stage or _no_stage
+    chunks = aiter_chunks(
+        iter_notice_segments(notice, file_content, report),
+        max_tokens=settings.chunk_max_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+        count_tokens=get_token_counter(settings.chunk_tokenizer),
+    )
+
+    embedding_started = False
+    seen: set[str] = set()
+    index = 0
+    async for batch in _batched(chunks, settings.embedding_batch_size):
+        hashed = []
+        for chunk in batch:
+            content_hash = chunk_hash(chunk)
+            if content_hash not in seen:
+                seen.add(content_hash)
+                hashed.append((chunk, content_hash))
+        changed = [chunk for chunk, content_hash in hashed if content_hash not in known_hashes]
+        if changed and not embedding_started:
+            await report(IngestionState.embedding)
+            embedding_started = True
+        vectors = iter(await generate_embeddings(changed) if changed else [])
+        for chunk, content_hash in hashed:
+            yield {
+                "id": uuid.uuid4(),
+                "notice_id": notice.id,
+                "tenant_id": notice.tenant_id,
+                "chunk_text": chunk,
+                "chunk_index": index,
+                "location": notice.location,
+                "content_hash": content_hash,
+                "embedding": None if content_hash in known_hashes else next(vectors),
+            }
+            index += 1
+
+
+async def process_notice_upload(
+    notice: Notice,
+    file_content: bytes | None = None,
+    on_stage: StageCallback | None = None,
+) -> list[dict]:
+    """Run the ingestion pipeline and collect every embedding row."""
+    return [row async for row in iter_notice_embeddings(notice, file_content, on_stage)]
+
+
+@dataclass
+class BulkWriteStats:
+    rows: int
+    seconds: float
+    reused: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+EMBEDDING_COPY_COLUMNS = (
+    "id", "notice_id", "tenant_id", "chunk_text", "chunk_index", "location", "content_hash", "embedding",
+)
+
+# embedding is NULL for chunks whose stored vector is reused.
+_STAGE_COLUMNS_SQL = """(
+    id UUID,
+    notice_id UUID,
+    tenant_id UUID,
+    chunk_text TEXT,
+    chunk_index INTEGER,
+    location VARCHAR(100),
+    content_hash VARCHAR(64),
+    embedding VECTOR(1536)
+)"""
+
+# Holds a whole notice's chunk set across the per-batch commits of a re-ingestion.
+NOTICE_STAGE = "notice_embeddings_stage"
+CREATE_NOTICE_STAGE_SQL = f"CREATE TEMP TABLE IF NOT EXISTS {NOTICE_STAGE} {_STAGE_COLUMNS_SQL} ON COMMIT PRESERVE ROWS;"
+
+# Existing rows keep their id (queries.retrieved_chunks references it).
+UPSERT_FROM_STAGE_SQL = f"""
+INSERT INTO embeddings (id, notice_id, tenant_id, chunk_text, chunk_index, location, content_hash, embedding)
+SELECT id, notice_id, tenant_id, chunk_text, chunk_index, location, content_hash, embedding
+FROM {NOTICE_STAGE}
+WHERE embedding IS NOT NULL
+ON CONFLICT (notice_id, content_hash) DO UPDATE SET
+    chunk_index = EXCLUDED.chunk_index,
+    location = EXCLUDED.location,
+    embedding = EXCLUDED.embedding;
+"""
+
+MOVE_REUSED_FROM_STAGE_SQL = f"""
+UPDATE embeddings e
+SET chunk_index = s.chunk_index, location = s.location
+FROM {NOTICE_STAGE} s
+WHERE s.embedding IS NULL
+    AND e.notice_id = s.notice_id
+    AND e.content_hash = s.content_hash
+    AND (e.chunk_index, e.location) IS DISTINCT FROM (s.chunk_index, s.location);
+"""
+
+DELETE_REMOVED_CHUNKS_SQL = f"""
+DELETE FROM embeddings e
+WHERE e.notice_id = :notice_id
+    AND NOT EXISTS (SELECT 1 FROM {NOTICE_STAGE} s WHERE s.content_hash = e.content_hash);
+"""
+
+
+async def _copy_to_stage(connection: AsyncConnection, batch: list[dict]) -> None:
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        NOTICE_STAGE,
+        records=[tuple(row[column] for column in EMBEDDING_COPY_COLUMNS) for row in batch],
+        columns=EMBEDDING_COPY_COLUMNS,
+    )
+
+
+async def write_notice_embeddings(
+    notice_id: uuid.UUID,
+    rows: Iterable[dict] | AsyncIterable[dict],
+    batch_size: int | None = None,
+) -> BulkWriteStats:
+    """Replace a notice's chunk set; readers see either the old or the new set.
+
+    While OCR and embedding are still producing rows, each batch is copied
+    into a temp table on a dedicated connection and committed on its own,
+    so no locks are held across provider calls. Upserting changed chunks,
+    repositioning reused ones and deleting the rest then happen in one
+    short final transaction.
     """
-    text = notice.content
-    
-    # OCR stub for images
-    if notice.file_type in {"jpg", "png"} and file_content:
-        # TODO: call cloud OCR service
-        text = f"[OCR extracted from {notice.file_type}] {text}"
-    
-    chunks = chunk_text(text)
-    embeddings_data = []
-    
-    for idx, chunk in enumerate(chunks):
-        # TODO: call generate_embedding from llm service
-        embedding = [0.01] * 1536  # stub
-        embeddings_data.append({
-            "id": uuid.uuid4(),
-            "notice_id": notice.id,
-            "tenant_id": notice.tenant_id,
-            "chunk_text": chunk,
-            "chunk_index": idx,
-            "location": notice.location,
-            "embedding": embedding,
-        })
-    
-    return embeddings_data
+    batch_size = batch_size or settings.embedding_copy_batch_size
+    started = time.perf_counter()
+    written = 0
+    reused = 0
+    async with engine.connect() as connection:
+        await connection.execute(text(CREATE_NOTICE_STAGE_SQL))
+        await connection.execute(text(f"TRUNCATE {NOTICE_STAGE};"))
+        await connection.commit()
+        try:
+            async for batch in _batched(rows, batch_size):
+                await _copy_to_stage(connection, batch)
+                await connection.commit()
+                written += len(batch)
+                reused += sum(row["embedding"] is None for row in batch)
+
+            await connection.execute(text(UPSERT_FROM_STAGE_SQL))
+            await connection.execute(text(MOVE_REUSED_FROM_STAGE_SQL))
+            await connection.execute(text(DELETE_REMOVED_CHUNKS_SQL), {"notice_id": notice_id})
+            await connection.commit()
+        finally:
+            # The connection goes back to the pool; do not leave the staged vectors on it
+            with contextlib.suppress(Exception):
+                await connection.rollback()
+                await connection.execute(text(f"DROP TABLE IF EXISTS {NOTICE_STAGE};"))
+                await connection.commit()
+    return BulkWriteStats(rows=written, seconds=time.perf_counter() - started, reused=reused)
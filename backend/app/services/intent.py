@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
 
+from app.services.phrases import compile_phrases, normalize_phrase
 
 DEPARTMENT_KEYWORDS = {
     "health": {"vaccination", "hospital", "clinic", "covid", "immunization"},
@@ -15,12 +17,50 @@ DEPARTMENT_KEYWORDS = {
 class IntentResult:
     department: str | None
     matched_keywords: set[str]
+    scores: dict[str, int] = field(default_factory=dict)
+
+
+class KeywordMatcher:
+    """All departments' keywords compiled into one regex; a single pass scores every department.
+
+    A department scores one point per word of each distinct keyword found,
+    so multi-word phrases outweigh single words. Ties go to the
+    alphabetically first department, independent of definition order.
+    """
+
+    def __init__(self, keywords: Mapping[str, Iterable[str]]) -> None:
+        self.departments: dict[str, set[str]] = {}
+        for department, words in keywords.items():
+            for word in words:
+                normalized = normalize_phrase(word)
+                if normalized:
+                    self.departments.setdefault(normalized, set()).add(department)
+        self.pattern = compile_phrases(self.departments)
+
+    def classify(self, message: str) -> IntentResult:
+        if self.pattern is None:
+            return IntentResult(department=None, matched_keywords=set())
+        normalized = normalize_phrase(message)
+        found = {match.group() for match in self.pattern.finditer(normalized)}
+        scores: dict[str, int] = {}
+        for keyword in found:
+            for department in self.departments[keyword]:
+                scores[department] = scores.get(department, 0) + len(keyword.split())
+        if not scores:
+            return IntentResult(department=None, matched_keywords=set())
+        department = min(scores, key=lambda name: (-scores[name], name))
+        matched = {keyword for keyword in found if department in self.departments[keyword]}
+        return IntentResult(department=department, matched_keywords=matched, scores=scores)
+
+
+_matcher = KeywordMatcher(DEPARTMENT_KEYWORDS)
 
 
 def classify_intent(message: str) -> IntentResult:
-    normalized = message.lower()
-    for department, keywords in DEPARTMENT_KEYWORDS.items():
-        matched = {kw for kw in keywords if kw in normalized}
-        if matched:
-            return IntentResult(department=department, matched_keywords=matched)
-    return IntentResult(department=None, matched_keywords=set())
+    return _matcher.classify(message)
+
+
+def set_keyword_matcher(matcher: KeywordMatcher) -> None:
+    """Swap in a rebuilt matcher; the tenant registry calls this whenever it reloads."""
+    global _matcher
+    _matcher = matcher
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import IngestionJob, Notice
+from app.models.tables import IngestionState
+
+STATE_PROGRESS = {
+    IngestionState.queued: 0,
+    IngestionState.ocr: 10,
+    IngestionState.chunking: 25,
+    IngestionState.embedding: 50,
+    IngestionState.indexed: 100,
+}
+
+# Claims are serialized by a transaction-scoped advisory lock so the per-tenant
+# running count is exact; SKIP LOCKED keeps claimers off rows being updated.
+CLAIM_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('ingestion_jobs.claim'));"
+
+FAIL_LOST_JOBS_SQL = """
+UPDATE ingestion_jobs
+SET state = 'failed', error = 'worker lost', updated_at = NOW()
+WHERE state IN ('ocr', 'chunking', 'embedding')
+    AND heartbeat_at < NOW() - make_interval(secs => :stale_after)
+    AND attempts >= :max_attempts;
+"""
+
+CLAIM_JOB_SQL = """
+UPDATE ingestion_jobs
+SET state = 'ocr', progress = 0, attempts = attempts + 1, error = NULL, heartbeat_at = NOW(), updated_at = NOW()
+WHERE id = (
+    SELECT j.id
+    FROM ingestion_jobs j
+    WHERE
+        (
+            j.state = 'queued'
+            OR (
+                j.state IN ('ocr', 'chunking', 'embedding')
+                AND j.heartbeat_at < NOW() - make_interval(secs => :stale_after)
+            )
+        )
+        AND j.attempts < :max_attempts
+        AND (
+            SELECT count(*)
+            FROM ingestion_jobs r
+            WHERE r.tenant_id = j.tenant_id
+                AND r.state IN ('ocr', 'chunking', 'embedding')
+                AND r.heartbeat_at >= NOW() - make_interval(secs => :stale_after)
+        ) < :tenant_limit
+    ORDER BY j.created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+)
+RETURNING id, notice_id, tenant_id, attempts;
+"""
+
+
+@dataclass
+class ClaimedJob:
+    id: uuid.UUID
+    notice_id: uuid.UUID
+    tenant_id: uuid.UUID
+    attempts: int
+
+
+async def enqueue_ingestion_job(session: AsyncSession, notice: Notice) -> IngestionJob:
+    """Queue ingestion for a notice, reusing a job that is still waiting."""
+    result = await session.execute(
+        select(IngestionJob).where(
+            IngestionJob.notice_id == notice.id,
+            IngestionJob.state == IngestionState.queued,
+        )
+    )
+    job = result.scalars().first()
+    if job:
+        return job
+
+    job = IngestionJob(
+        id=uuid.uuid4(),
+        notice_id=notice.id,
+        tenant_id=notice.tenant_id,
+        state=IngestionState.queued,
+        progress=0,
+        attempts=0,
+    )
+    session.add(job)
+    await session.commit()
+    return job
+
+
+async def claim_ingestion_job(session: AsyncSession) -> ClaimedJob | None:
+    params = {
+        "stale_after": settings.ingestion_stale_after_seconds,
+        "max_attempts": settings.ingestion_max_attempts,
+        "tenant_limit": settings.ingestion_tenant_concurrency,
+    }
+    await session.execute(text(CLAIM_LOCK_SQL))
+    await session.execute(text(FAIL_LOST_JOBS_SQL), params)
+    row = (await session.execute(text(CLAIM_JOB_SQL), params)).first()
+    await session.commit()
+    if row is None:
+        return None
+    return ClaimedJob(id=row.id, notice_id=row.notice_id, tenant_id=row.tenant_id, attempts=row.attempts)
+
+
+async def set_job_state(session: AsyncSession, job_id: uuid.UUID, state: IngestionState) -> None:
+    await session.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id)
+        .values(state=state, progress=STATE_PROGRESS[state], heartbeat_at=text("NOW()"))
+    )
+    await session.commit()
+
+
+async def touch_job(session: AsyncSession, job_id: uuid.UUID) -> None:
+    await session.execute(update(IngestionJob).where(IngestionJob.id == job_id).values(heartbeat_at=text("NOW()")))
+    await session.commit()
+
+
+async def fail_job(session: AsyncSession, job: ClaimedJob, error: str) -> None:
+    """Requeue for another attempt, or mark failed once attempts are exhausted."""
+    exhausted = job.attempts >= settings.ingestion_max_attempts
+    await session.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job.id)
+        .values(state=IngestionState.failed if exhausted else IngestionState.queued, error=error[:1000])
+    )
+    await session.commit()
+
+
+async def get_latest_job(session: AsyncSession, notice_id: uuid.UUID, tenant_id: uuid.UUID) -> IngestionJob | None:
+    result = await session.execute(
+        select(IngestionJob)
+        .where(IngestionJob.notice_id == notice_id, IngestionJob.tenant_id == tenant_id)
+        .order_by(IngestionJob.created_at.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import Counter
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import User
+from app.services.cache import LocalResponseCache
+
+DEFAULT_LANGUAGE = "en"
+
+# Unicode blocks are 128 code points wide from U+0600 on, so ord(char) >> 7
+# identifies the script without a range search
+SCRIPT_BLOCKS = {
+    0x0600 >> 7: "ur",  # Arabic
+    0x0680 >> 7: "ur",
+    0x0900 >> 7: "hi",  # Devanagari
+    0x0980 >> 7: "bn",  # Bengali (also Assamese)
+    0x0A00 >> 7: "pa",  # Gurmukhi
+    0x0A80 >> 7: "gu",
+    0x0B00 >> 7: "or",
+    0x0B80 >> 7: "ta",
+    0x0C00 >> 7: "te",
+    0x0C80 >> 7: "kn",
+    0x0D00 >> 7: "ml",
+}
+
+# A few hundred characters of typical (romanized) citizen messages per
+# language; enough for trigram profiles that separate English from
+# Hinglish/Tanglish without shipping a model file
+SEED_TEXT = {
+    "en": (
+        "when is the vaccination camp in my area what is the water supply timing today "
+        "there is no power since morning please tell me about the garbage collection schedule "
+        "where is the nearest hospital how can i apply for the scheme is the road closed "
+        "why was the electricity cut will the street light be repaired thank you for the information"
+    ),
+    "hi-Latn": (
+        "kya aaj paani aayega hamare mohalle mein bijli kab aayegi subah se light nahi hai "
+        "teeka kab lagega aspatal kahan hai kachra gaadi kab aati hai mujhe jaankari chahiye "
+        "yojana ke liye kaise apply karna hai sadak band kyun hai kripya batayein dhanyavad "
+        "hamare ghar ke paas nal mein paani nahi aa raha hai kal tak theek hoga kya"
+    ),
+    "ta-Latn": (
+        "inniku thanni varuma engal theruvil current eppo varum kaalaila irundhu current illa "
+        "thadupoosi mugam eppo nadakkum aaspathri enga irukku kuppai vandi eppo varum enakku "
+        "thagaval venum thittathukku epdi vinnappikkanum saalai yen moodi irukku sollunga nandri "
+        "enga veetu pakkathula kuzhai thanni varala naalaikku sari aagumaa"
+    ),
+}
+
+NGRAM_SIZE = 3
+MIN_CONFIDENT_LETTERS = 12
+MIN_CONFIDENT_MARGIN = 0.15  # per-trigram log-probability lead over the runner-up
+
+
+class NgramLanguageModel:
+    """Character trigram profiles with add-one smoothing; scores are mean log-probabilities."""
+
+    def __init__(self, samples: dict[str, str]) -> None:
+        self.profiles: dict[str, tuple[dict[str, float], float]] = {}
+        for language, sample in samples.items():
+            counts = Counter(_trigrams(sample))
+            total = sum(counts.values()) + len(counts) + 1
+            self.profiles[language] = (
+                {gram: math.log((count + 1) / total) for gram, count in counts.items()},
+                math.log(1 / total),
+            )
+
+    def scores(self, text: str) -> dict[str, float]:
+        grams = _trigrams(text)
+        if not grams:
+            return {language: 0.0 for language in self.profiles}
+        return {
+            language: sum(profile.get(gram, unseen) for gram in grams) / len(grams)
+            for language, (profile, unseen) in self.profiles.items()
+        }
+
+
+def _trigrams(text: str) -> list[str]:
+    words = "".join(char if char.isalpha() else " " for char in text.lower()).split()
+    grams = []
+    for word in words:
+        padded = f" {word} "
+        grams.extend(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+    return grams
+
+
+_model = NgramLanguageModel(SEED_TEXT)
+
+
+def identify_language(text: str) -> tuple[str, bool]:
+    """Best-guess language of ``text`` and whether the guess is confident.
+
+    Native Indic/Arabic scripts are decided by counting letters per Unicode
+    block; Latin text falls back to the trigram model, which is only
+    trusted for messages with enough letters and a clear margin.
+    """
+    letters = 0
+    scripts: Counter[str] = Counter()
+    for char in text:
+        language = SCRIPT_BLOCKS.get(ord(char) >> 7)
+        if language is not None:
+            scripts[language] += 1
+            letters += 1
+        elif char.isalpha():
+            letters += 1
+    if scripts:
+        language, count = scripts.most_common(1)[0]
+        if count * 2 >= letters:
+            return language, True
+    if letters <= NGRAM_SIZE:
+        return DEFAULT_LANGUAGE, False
+
+    ranked = sorted(_model.scores(text).items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+    confident = letters >= MIN_CONFIDENT_LETTERS and best_score - runner_up >= MIN_CONFIDENT_MARGIN
+    return best, confident
+
+
+def detect_language(text: str) -> str:
+    return identify_language(text)[0]
+
+
+language_memo = LocalResponseCache(settings.language_memo_max_entries, settings.language_memo_ttl_seconds)
+
+
+async def _query_preferred_language(phone_number: str) -> str | None:
+    async with AsyncSessionLocal() as session:
+        return (
+            await session.execute(select(User.preferred_language).where(User.phone_number == phone_number))
+        ).scalar()
+
+
+async def _load_preferred_language(phone_number: str) -> tuple[str | None, bool]:
+    """(stored preference, whether the lookup completed) within ``language_lookup_timeout_ms``."""
+    try:
+        return await asyncio.wait_for(
+            _query_preferred_language(phone_number), settings.language_lookup_timeout_ms / 1000
+        ), True
+    except Exception:
+        return None, False  # Database slow or not available
+
+
+async def detect_user_language(phone_number: str, text: str) -> str:
+    """Language of a sender's message, falling back to what they used before when the text is ambiguous.
+
+    Confident detections refresh the per-process memo (the query log sink
+    persists them to ``User.preferred_language``). Short or mixed Latin
+    messages ("ok", "thanks", a ward number) reuse the memoized preference,
+    so only a sender's first ambiguous message in a process reads the users table.
+    That read is capped at ``language_lookup_timeout_ms``; past it the reply
+    uses the guess, and the lookup is tried again on the next ambiguous message.
+    """
+    language, confident = identify_language(text)
+    if confident:
+        language_memo.set(phone_number, language)
+        return language
+    known = language_memo.get(phone_number)
+    if known is None:
+        stored, completed = await _load_preferred_language(phone_number)
+        if not completed:
+            return language
+        known = stored or language
+        language_memo.set(phone_number, known)
+    return known
@@ -1,18 +1,219 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import json
+import random
+from collections.abc import AsyncIterator
 
-async def generate_embedding(text: str) -> list[float]:
-    """Stub for cloud LLM embedding generation. Returns mock 1536-dim vector."""
-    return [0.01] * 1536
+import httpx
+import numpy as np
 
+from app.core.config import settings
+from app.db.vector import to_float32
 
-async def generate_response(context_chunks: list[str], query: str) -> str:
-    """Stub for cloud LLM response generation using retrieved context."""
-    if not context_chunks:
-        return "No verified information available"
-    return f"Based on official sources: {context_chunks[0][:100]}..."
+EMBEDDING_DIM = 1536
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
 
+_http_client: httpx.AsyncClient | None = None
 
-def detect_language(text: str) -> str:
-    """Stub language detection. Returns 'en' by default."""
-    return "en"
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the LLM provider."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            base_url=settings.llm_api_base_url or "",
+            headers={"Authorization": f"Bearer {settings.llm_api_key}"} if settings.llm_api_key else None,
+            timeout=settings.llm_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+
+
+def _parse_embedding(value: str | list[float]) -> np.ndarray:
+    # base64 is little-endian float32 and decodes without building a list of Python floats
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype="<f4").astype(np.float32)
+    return to_float32(value)
+
+
+def _stub_embedding(text: str) -> np.ndarray:
+    """Stand-in when no provider is configured: a unit vector seeded from the text.
+
+    Different texts land nearly orthogonal, so the semantic cache never
+    treats two unrelated questions as rephrasings of each other.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+async def _request_embeddings(texts: list[str]) -> list[np.ndarray]:
+    """POST one batch to the OpenAI-compatible /embeddings endpoint, retrying transient failures."""
+    if not settings.llm_api_base_url:
+        return [_stub_embedding(text) for text in texts]
+
+    client = get_http_client()
+    payload = {"model": settings.embedding_model, "input": texts, "encoding_format": settings.embedding_encoding_format}
+    for attempt in range(settings.embedding_max_retries + 1):
+        try:
+            response = await client.post("/embeddings", json=payload)
+            response.raise_for_status()
+            data = sorted(response.json()["data"], key=lambda item: item["index"])
+            return [_parse_embedding(item["embedding"]) for item in data]
+        except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+            retryable = isinstance(exc, httpx.TransportError) or exc.response.status_code in RETRYABLE_STATUS
+            if not retryable or attempt == settings.embedding_max_retries:
+                raise
+            backoff = settings.embedding_retry_backoff_seconds * (2 ** attempt)
+            await asyncio.sleep(backoff + random.uniform(0, backoff))
+    raise RuntimeError("unreachable")
+
+
+class EmbeddingBatcher:
+    """Coalesces embedding requests from concurrent callers into provider-sized batches.
+
+    Identical texts in flight share one result; at most ``max_concurrency``
+    batches are sent at once.
+    """
+
+    def __init__(self, batch_size: int, max_concurrency: int, max_wait_seconds: float) -> None:
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._pending: list[str] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, texts: list[str]) -> list[np.ndarray]:
+        futures = [self._enqueue(text) for text in texts]
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        # Futures are shared with other callers of the same text; a cancelled caller must not cancel them
+        return list(await asyncio.shield(asyncio.gather(*futures)))
+
+    def _enqueue(self, text: str) -> asyncio.Future:
+        future = self._inflight.get(text)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[text] = future
+        self._pending.append(text)
+        if self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.batch_size):
+            task = asyncio.ensure_future(self._send(pending[start:start + self.batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[str]) -> None:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        async with self._semaphore:
+            try:
+                vectors = await _request_embeddings(batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(f"provider returned {len(vectors)} embeddings for {len(batch)} texts")
+            except Exception as exc:
+                for text in batch:
+                    future = self._inflight.pop(text)
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+        for text, vector in zip(batch, vectors):
+            future = self._inflight.pop(text)
+            if not future.done():
+                future.set_result(vector)
+
+
+embedding_batcher = EmbeddingBatcher(
+    batch_size=settings.embedding_batch_size,
+    max_concurrency=settings.embedding_max_concurrency,
+    max_wait_seconds=settings.embedding_batch_wait_ms / 1000,
+)
+
+
+async def generate_embedding(text: str) -> np.ndarray:
+    """Embed a single query directly; the webhook path does not wait for a batch to fill."""
+    [embedding] = await _request_embeddings([text])
+    return embedding
+
+
+async def generate_embeddings(texts: list[str]) -> list[np.ndarray]:
+    """Embed many texts through the shared batcher (ingestion). Order matches ``texts``."""
+    if not texts:
+        return []
+    return await embedding_batcher.embed(texts)
+
+
+RESPONSE_SYSTEM_PROMPT = (
+    "You answer citizens' questions using only the official notices provided. "
+    "If the notices do not contain the answer, say that no verified information is available. "
+    "Reply briefly, in the language of the question."
+)
+
+
+def build_response_messages(context_chunks: list[str], query: str) -> list[dict[str, str]]:
+    context = "\n\n".join(f"[{i}] {chunk}" for i, chunk in enumerate(context_chunks, 1))
+    return [
+        {"role": "system", "content": RESPONSE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Notices:\n{context}\n\nQuestion: {query}"},
+    ]
+
+
+async def stream_response(context_chunks: list[str], query: str) -> AsyncIterator[str]:
+    """Stream completion tokens from the OpenAI-compatible /chat/completions endpoint (SSE).
+
+    Not retried: the caller bounds it with the reply's latency budget, and
+    closing or cancelling the iteration closes the provider stream.
+    """
+    if not settings.llm_api_base_url:
+        # stub when no provider is configured
+        yield f"Based on official sources: {context_chunks[0][:100]}..."
+        return
+
+    payload = {
+        "model": settings.llm_chat_model,
+        "messages": build_response_messages(context_chunks, query),
+        "max_tokens": settings.llm_max_tokens,
+        "temperature": 0,
+        "stream": True,
+    }
+    async with get_http_client().stream("POST", "/chat/completions", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            choices = json.loads(data).get("choices") or [{}]
+            token = (choices[0].get("delta") or {}).get("content")
+            if token:
+                yield token
@@ -1,60 +1,192 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
-from datetime import datetime
-
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.models import Query, UnansweredQuery
-
-
-async def log_query(
-    session: AsyncSession,
-    phone_number: str,
-    tenant_id: str | None,
-    query_text: str,
-    query_language: str,
-    location: str | None,
-    response_text: str | None,
-    response_language: str | None,
-    response_type: str,
-    retrieved_chunks: list[uuid.UUID] | None,
-    latency_ms: int | None,
-) -> None:
-    query = Query(
-        id=uuid.uuid4(),
-        phone_number=phone_number,
-        tenant_id=uuid.UUID(tenant_id) if tenant_id else None,
-        query_text=query_text,
-        query_language=query_language,
-        location=location,
-        response_text=response_text,
-        response_language=response_language,
-        response_type=response_type,
-        retrieved_chunks=retrieved_chunks,
-        latency_ms=latency_ms,
-    )
-    session.add(query)
-    await session.commit()
-
-
-async def log_unanswered_query(
-    session: AsyncSession,
-    phone_number: str,
-    tenant_id: str | None,
-    query_text: str,
-    query_language: str,
-    location: str | None,
-    reason: str,
-) -> None:
-    unanswered = UnansweredQuery(
-        id=uuid.uuid4(),
-        phone_number=phone_number,
-        tenant_id=uuid.UUID(tenant_id) if tenant_id else None,
-        query_text=query_text,
-        query_language=query_language,
-        location=location,
-        reason=reason,
-    )
-    session.add(unanswered)
-    await session.commit()
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import Query, UnansweredQuery, User
+
+
+def _tenant_uuid(tenant_id: str | None) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(tenant_id) if tenant_id else None
+    except ValueError:
+        return None  # placeholder tenant ids are not logged against a tenant
+
+
+class QueryLogSink:
+    """Buffers Query/UnansweredQuery rows and writes them in batches off the reply path.
+
+    ``log_query``/``log_unanswered_query`` only enqueue; a background task
+    flushes every ``batch_size`` rows or ``flush_interval`` seconds with
+    multi-row inserts. When the queue is full callers wait at most
+    ``put_timeout`` seconds before the record is dropped (and counted).
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, put_timeout: float) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: asyncio.Queue[tuple[type, dict]] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.written = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flusher after writing everything already queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._task
+        self._task = None
+
+    async def _put(self, model: type, row: dict) -> None:
+        if self._queue is None:
+            self.dropped += 1  # sink not started (tests, scripts)
+            return
+        try:
+            self._queue.put_nowait((model, row))
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put((model, row)), self.put_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+
+    async def log_query(
+        self,
+        phone_number: str,
+        tenant_id: str | None,
+        query_text: str,
+        query_language: str,
+        location: str | None,
+        response_text: str | None,
+        response_language: str | None,
+        response_type: str,
+        retrieved_chunks: list[uuid.UUID] | None,
+        latency_ms: int | None,
+    ) -> None:
+        await self._put(Query, {
+            "id": uuid.uuid4(),
+            "phone_number": phone_number,
+            "tenant_id": _tenant_uuid(tenant_id),
+            "query_text": query_text,
+            "query_language": query_language,
+            "location": location,
+            "response_text": response_text,
+            "response_language": response_language,
+            "response_type": response_type,
+            "retrieved_chunks": retrieved_chunks,
+            "latency_ms": latency_ms,
+        })
+
+    async def log_unanswered_query(
+        self,
+        phone_number: str,
+        tenant_id: str | None,
+        query_text: str,
+        query_language: str,
+        location: str | None,
+        reason: str,
+    ) -> None:
+        await self._put(UnansweredQuery, {
+            "id": uuid.uuid4(),
+            "phone_number": phone_number,
+            "tenant_id": _tenant_uuid(tenant_id),
+            "query_text": query_text,
+            "query_language": query_language,
+            "location": location,
+            "reason": reason,
+        })
+
+    def _drain(self, limit: int) -> list[tuple[type, dict]]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not (self._closing and self._queue.empty()):
+            try:
+                batch = [await asyncio.wait_for(self._queue.get(), self.flush_interval)]
+            except asyncio.TimeoutError:
+                continue
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                if len(batch) >= self.batch_size or loop.time() >= deadline:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[type, dict]]) -> None:
+        if not batch:
+            return
+        queries = [row for model, row in batch if model is Query]
+        unanswered = [row for model, row in batch if model is UnansweredQuery]
+        # queries.phone_number references users; this also records the interaction.
+        # created_at is left to the server clock, which the analytics rollup watermark relies on.
+        # The latest query language per sender becomes their preferred language
+        languages = {row["phone_number"]: row["query_language"] for row in queries if row["phone_number"]}
+        phones = {row["phone_number"] for _, row in batch if row["phone_number"]}
+        now = datetime.now(timezone.utc)
+        try:
+            async with AsyncSessionLocal() as session:
+                if phones:
+                    upsert = pg_insert(User).values([
+                        {
+                            "phone_number": phone,
+                            "last_interaction_at": now,
+                            "opted_out": False,
+                            "preferred_language": languages.get(phone),
+                        }
+                        for phone in sorted(phones)
+                    ])
+                    await session.execute(upsert.on_conflict_do_update(
+                        index_elements=[User.phone_number],
+                        set_={
+                            "last_interaction_at": upsert.excluded.last_interaction_at,
+                            "preferred_language": func.coalesce(
+                                upsert.excluded.preferred_language, User.preferred_language
+                            ),
+                        },
+                    ))
+                if queries:
+                    await session.execute(insert(Query), queries)
+                if unanswered:
+                    await session.execute(insert(UnansweredQuery), unanswered)
+                await session.commit()
+            self.written += len(batch)
+        except Exception:
+            self.dropped += len(batch)  # Database not available; logging never blocks replies
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+query_log_sink = QueryLogSink(
+    max_size=settings.query_log_queue_size,
+    batch_size=settings.query_log_batch_size,
+    flush_interval=settings.query_log_flush_interval_seconds,
+    put_timeout=settings.query_log_put_timeout_ms / 1000,
+)
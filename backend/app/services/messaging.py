@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+import httpx
+
+from app.core.config import settings
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_twilio_client: httpx.AsyncClient | None = None
+
+
+class PermanentSendError(Exception):
+    """The provider rejected the message (bad number, opted out, ...); retrying will not help."""
+
+
+def get_twilio_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the Twilio REST API."""
+    global _twilio_client
+    if _twilio_client is None:
+        auth = (settings.twilio_account_sid, settings.twilio_auth_token) if settings.twilio_account_sid else None
+        _twilio_client = httpx.AsyncClient(
+            base_url=settings.twilio_api_base_url,
+            auth=auth,
+            timeout=settings.twilio_timeout_seconds,
+            limits=httpx.Limits(max_connections=settings.broadcast_max_concurrency),
+        )
+    return _twilio_client
+
+
+async def close_twilio_client() -> None:
+    global _twilio_client
+    if _twilio_client is not None:
+        await _twilio_client.aclose()
+    _twilio_client = None
+
+
+async def send_whatsapp_message(phone: str, body: str, status_callback: str | None = None) -> str | None:
+    """Send one WhatsApp message, retrying transient failures. Returns the message SID.
+
+    Raises PermanentSendError when the provider rejects the message.
+    """
+    if not settings.twilio_account_sid:
+        return None  # stub when no provider is configured
+
+    client = get_twilio_client()
+    data = {"From": f"whatsapp:{settings.twilio_whatsapp_from}", "To": f"whatsapp:{phone}", "Body": body}
+    if status_callback:
+        data["StatusCallback"] = status_callback
+    path = f"/2010-04-01/Accounts/{settings.twilio_account_sid}/Messages.json"
+    for attempt in range(settings.broadcast_max_retries + 1):
+        try:
+            response = await client.post(path, data=data)
+            response.raise_for_status()
+            return response.json().get("sid")
+        except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+            retryable = isinstance(exc, httpx.TransportError) or exc.response.status_code in RETRYABLE_STATUS
+            if not retryable:
+                raise PermanentSendError(exc.response.text[:200]) from exc
+            if attempt == settings.broadcast_max_retries:
+                raise
+            retry_after = exc.response.headers.get("Retry-After") if isinstance(exc, httpx.HTTPStatusError) else None
+            backoff = settings.broadcast_retry_backoff_seconds * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                await asyncio.sleep(float(retry_after))
+            else:
+                await asyncio.sleep(backoff + random.uniform(0, backoff))
+    raise RuntimeError("unreachable")
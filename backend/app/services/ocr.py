@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import io
+import multiprocessing
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from app.core.config import settings
+
+# Runs in a pool process, so it must be a picklable module-level function
+OcrEngine = Callable[[bytes], str]
+
+
+def split_pages(content: bytes) -> list[bytes]:
+    """One PNG per frame of a multi-page image (e.g. TIFF); the image itself without Pillow."""
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError:
+        return [content]
+    with Image.open(io.BytesIO(content)) as image:
+        if getattr(image, "n_frames", 1) <= 1:
+            return [content]
+        pages = []
+        for frame in ImageSequence.Iterator(image):
+            buffer = io.BytesIO()
+            frame.save(buffer, format="PNG")
+            pages.append(buffer.getvalue())
+        return pages
+
+
+def tesseract_ocr(page: bytes) -> str:
+    """Local tesseract (needs pytesseract, Pillow and the tesseract binary)."""
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(io.BytesIO(page)) as image:
+        return pytesseract.image_to_string(image, lang=settings.ocr_languages)
+
+
+def load_ocr_engine(name: str) -> OcrEngine | None:
+    """``none``, ``tesseract`` or a ``module:function`` path to a custom engine."""
+    if name == "none":
+        return None
+    if name == "tesseract":
+        return tesseract_ocr
+    module_name, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class OcrStage:
+    """Runs CPU-bound OCR off the event loop, one pool task per page."""
+
+    def __init__(self, engine: OcrEngine, executor: Executor, timeout_seconds: float) -> None:
+        self.engine = engine
+        self.executor = executor
+        self.timeout_seconds = timeout_seconds
+
+    async def iter_pages(self, content: bytes) -> AsyncIterator[str]:
+        """Page texts in order, while later pages are still being recognised.
+
+        Raises TimeoutError once OCR time for the document exceeds the timeout;
+        time the consumer spends between pages does not count.
+        """
+        loop = asyncio.get_running_loop()
+        budget = self.timeout_seconds
+        futures: list[asyncio.Future] = []
+        try:
+            started = loop.time()
+            pages = await asyncio.wait_for(loop.run_in_executor(self.executor, split_pages, content), budget)
+            budget -= loop.time() - started
+            futures = [loop.run_in_executor(self.executor, self.engine, page) for page in pages]
+            for future in futures:
+                started = loop.time()
+                text = await asyncio.wait_for(future, max(budget, 0))
+                budget -= loop.time() - started
+                yield text
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_ocr_stage: OcrStage | None = None
+
+
+def get_ocr_stage() -> OcrStage | None:
+    """Shared stage for this process, or None when OCR_ENGINE=none."""
+    global _ocr_stage
+    if _ocr_stage is None:
+        engine = load_ocr_engine(settings.ocr_engine)
+        if engine is None:
+            return None
+        _ocr_stage = OcrStage(
+            engine,
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            ProcessPoolExecutor(max_workers=settings.ocr_workers, mp_context=multiprocessing.get_context("spawn")),
+            settings.ocr_timeout_seconds,
+        )
+    return _ocr_stage
+
+
+def close_ocr_stage() -> None:
+    global _ocr_stage
+    if _ocr_stage is not None:
+        _ocr_stage.shutdown()
+        _ocr_stage = None
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+
+# Letters, digits and the Indic blocks (whose vowel signs are not \w), so a
+# phrase never matches inside a longer word in any of our scripts
+WORD_CHAR = r"\w\u0900-\u0DFF"
+
+
+def normalize_phrase(phrase: str) -> str:
+    return " ".join(phrase.casefold().split())
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Alternation factored on common prefixes, so the regex engine walks a trie
+    instead of trying every phrase at each position."""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends = "" in node
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child) for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def compile_phrases(phrases: Iterable[str]) -> re.Pattern[str] | None:
+    """One regex matching any of the (normalized) phrases on whole-word boundaries; None if there are none.
+
+    Spaces in a phrase match any run of whitespace; match against casefolded text.
+    """
+    phrases = {phrase for phrase in phrases if phrase}
+    if not phrases:
+        return None
+    return re.compile(rf"(?<![{WORD_CHAR}])(?:{_trie_pattern(phrases)})(?![{WORD_CHAR}])")
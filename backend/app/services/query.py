@@ -1,20 +1,50 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import hashlib
+import logging
+import time
 import uuid
 
-from sqlalchemy import insert
+import numpy as np
+from redis import asyncio as redis
 
-from app.models import Query, UnansweredQuery
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
 from app.schemas.webhook import WhatsAppWebhookRequest, WhatsAppWebhookResponse
+from app.services.budget import LatencyBudget
 from app.services.cache import (
     build_cache_key,
+    build_semantic_scope,
+    cache_generations,
+    decode_cached_response,
+    encode_cached_response,
     get_cached_response,
-    get_redis_client,
+    response_cache,
     set_cached_response,
+    tenant_cache_prefix,
 )
+from app.services.extractive import build_extractive_answer, is_decisive
+from app.services.guardrails import BLOCKED_RESPONSE, GuardrailMatch, IncrementalGuardrail, guardrail_registry
 from app.services.intent import classify_intent
-from app.services.llm import detect_language, generate_embedding, generate_response
+from app.services.language import detect_user_language
+from app.services.llm import generate_embedding, stream_response
+from app.services.logging import query_log_sink
+from app.services.retrieval import RetrievedChunk, retrieve_chunks
+from app.services.semantic_cache import semantic_cache
+
+logger = logging.getLogger(__name__)
+
+UNANSWERED_REASONS = {
+    "fallback": "no_verified_information",
+    "filtered": "guardrail_filtered",
+    "timeout": "latency_budget_exceeded",
+    "unavailable": "retrieval_failed",
+}
+
+NO_INFORMATION_RESPONSE = "No verified information available"
+TIMEOUT_RESPONSE = "We could not look this up right now. Please try again in a moment."
 
 
 def build_intent_hash(message: str, department: str | None) -> str:
@@ -25,63 +55,203 @@ def build_intent_hash(message: str, department: str | None) -> str:
     return digest.hexdigest()[:12]
 
 
-async def handle_whatsapp_message(payload: WhatsAppWebhookRequest) -> WhatsAppWebhookResponse:
-    from app.services.guardrails import post_process_response
+async def handle_whatsapp_message(
+    payload: WhatsAppWebhookRequest,
+    client: redis.Redis,
+) -> WhatsAppWebhookResponse:
     from app.services.ratelimit import check_rate_limit
     
+    started = time.perf_counter()
+    budget = LatencyBudget(settings.response_budget_ms / 1000)
     phone = payload.From.replace("whatsapp:", "")
     message = payload.Body
     
     # Rate limit check
-    if not await check_rate_limit(phone, limit=10, window_seconds=3600):
+    if not await check_rate_limit(client, phone, limit=10, window_seconds=3600):
         return WhatsAppWebhookResponse(
             status="rate_limited",
             message="You have reached the hourly message limit. Please try again later."
         )
     location = None  # TODO: extract from payload or session
     intent = classify_intent(message)
-    language = detect_language(message)
+    language = await detect_user_language(phone, message)
     intent_hash = build_intent_hash(message, intent.department)
     
     from app.services.tenants import map_department_to_tenant
     tenant_id = map_department_to_tenant(intent.department)
     cache_key = build_cache_key(tenant_id, location, intent_hash, language)
     
-    client = get_redis_client()
+    local = response_cache.get(cache_key)
+    if tenant_id is None:
+        # No tenant answers this department; nothing to search
+        response_text, response_type, chunk_ids = NO_INFORMATION_RESPONSE, "fallback", []
+    elif local is not None:
+        response_text, response_type, chunk_ids = *_from_cache(local), []
+    else:
+        # Identical concurrent misses share one Redis lookup + embedding + retrieval + LLM run
+        response_text, response_type, chunk_ids = await response_cache.single_flight(
+            cache_key,
+            lambda: _answer_message(client, cache_key, message, tenant_id, location, language, budget),
+        )
+    
+    # Enqueued only; the sink writes to Postgres in batches
+    latency_ms = int((time.perf_counter() - started) * 1000)
+    await query_log_sink.log_query(
+        phone, tenant_id, message, language, location,
+        response_text, language, response_type, chunk_ids or None, latency_ms,
+    )
+    if response_type in UNANSWERED_REASONS:
+        await query_log_sink.log_unanswered_query(
+            phone, tenant_id, message, language, location, UNANSWERED_REASONS[response_type],
+        )
+    
+    return WhatsAppWebhookResponse(status=response_type, message=response_text)
+
+
+async def _answer_message(
+    client: redis.Redis,
+    cache_key: str,
+    message: str,
+    tenant_id: str,
+    location: str | None,
+    language: str,
+    budget: LatencyBudget,
+) -> tuple[str, str, list[uuid.UUID]]:
+    # Read before any work: an invalidation landing mid-computation makes the stores below no-ops
+    store = _CacheStore(client, cache_key, tenant_id)
     try:
-        cached = await get_cached_response(client, cache_key)
+        cached, store.redis_generation = await get_cached_response(client, cache_key, tenant_id)
         if cached:
-            return WhatsAppWebhookResponse(status="cached", message=cached)
+            store.local(cached)
+            return *_from_cache(cached), []
     except Exception:
         pass  # Redis not available
     
-    # Generate embedding and retrieve chunks (stub for now - no DB dependency)
-    embedding = await generate_embedding(message)
-    _ = embedding
+    # Embedding, retrieval and generation each get a slice of the reply's latency budget
+    try:
+        embedding = await budget.run("embedding", generate_embedding(message), settings.embedding_budget_ms / 1000)
+    except asyncio.TimeoutError:
+        return TIMEOUT_RESPONSE, "timeout", []  # Not cached, so the next ask tries again
     
-    # TODO: wire retrieval when DB is ready
-    # async with AsyncSessionLocal() as session:
-    #     chunks = await retrieve_chunks(session, tenant_id, embedding, location)
-    #     context_texts = [c.chunk_text for c in chunks]
-    context_texts = []
-    
-    # Generate response
-    if not context_texts:
-        response_text = "No verified information available"
-        response_type = "fallback"
-    else:
-        raw_response = await generate_response(context_texts, message)
-        response_text, is_safe = post_process_response(raw_response)
-        response_type = "rag" if is_safe else "filtered"
+    # Rephrasings of an already-answered question reuse its response
+    semantic_scope = build_semantic_scope(tenant_id, location, language)
+    similar = semantic_cache.lookup(semantic_scope, embedding)
+    if similar is not None:
+        await store.save(similar.response, "cached")
+        return similar.response, "cached", []
     
     try:
-        await set_cached_response(client, cache_key, response_text)
+        chunks = await budget.run(
+            "retrieval", _retrieve(tenant_id, embedding, location), settings.retrieval_budget_ms / 1000
+        )
+    except asyncio.TimeoutError:
+        return TIMEOUT_RESPONSE, "timeout", []
     except Exception:
-        pass  # Redis not available
+        # Database not available; not cached, or the outage would outlive itself as "no information"
+        logger.warning("retrieval failed for tenant %s", tenant_id, exc_info=True)
+        return TIMEOUT_RESPONSE, "unavailable", []
     
-    # TODO: log query to DB with session
-    _ = phone
-    _ = language
-    _ = response_type
+    if not chunks:
+        response_text, response_type = NO_INFORMATION_RESPONSE, "fallback"
+    elif is_decisive(chunks, settings.extractive_max_distance, settings.extractive_min_margin):
+        # One notice clearly answers it: quote it instead of calling the LLM
+        response_text, response_type = await _checked(build_extractive_answer(chunks[0]), "extractive", tenant_id)
+        if response_type == "extractive" and store.is_current():
+            semantic_cache.add(semantic_scope, embedding, response_text)
+    else:
+        response_text, response_type = await generate_answer(chunks, message, budget, tenant_id)
+        if response_type == "rag" and store.is_current():
+            semantic_cache.add(semantic_scope, embedding, response_text)
     
-    return WhatsAppWebhookResponse(status=response_type, message=response_text)
+    if response_type != "extractive_fallback":
+        await store.save(response_text, response_type)
+    return response_text, response_type, [c.id for c in chunks]
+
+
+async def _retrieve(tenant_id: str, embedding: np.ndarray, location: str | None) -> list[RetrievedChunk]:
+    async with AsyncSessionLocal() as session:
+        return await retrieve_chunks(session, tenant_id, embedding, location)
+
+
+async def _stream_checked(context_texts: list[str], message: str, guardrail: IncrementalGuardrail) -> str:
+    """Read the LLM stream through the guardrail, hanging up at the first forbidden phrase."""
+    async with contextlib.aclosing(stream_response(context_texts, message)) as tokens:
+        async for token in tokens:
+            if guardrail.feed(token):
+                break
+    guardrail.close()
+    return guardrail.text
+
+
+async def generate_answer(
+    chunks: list[RetrievedChunk],
+    message: str,
+    budget: LatencyBudget,
+    tenant_id: str | None = None,
+) -> tuple[str, str]:
+    """LLM answer from the retrieved chunks, checked against the tenant's guardrails as it streams.
+
+    Falls back to an extractive answer from the top chunk if the generation
+    budget runs out or the provider fails.
+    """
+    guardrail = (await guardrail_registry.get(tenant_id)).incremental()
+    try:
+        await budget.run(
+            "generation",
+            _stream_checked([c.chunk_text for c in chunks], message, guardrail),
+            settings.generation_budget_ms / 1000,
+        )
+    except Exception:
+        return await _checked(build_extractive_answer(chunks[0]), "extractive_fallback", tenant_id)
+    if guardrail.matches:
+        _log_blocked(tenant_id, guardrail.matches)
+        return BLOCKED_RESPONSE, "filtered"
+    return guardrail.text.strip(), "rag"
+
+
+async def _checked(response_text: str, response_type: str, tenant_id: str | None) -> tuple[str, str]:
+    """Scan a reply that did not stream through the guardrail (quoted notice text) once, whole."""
+    result = (await guardrail_registry.get(tenant_id)).check(response_text)
+    if result.is_safe:
+        return response_text, response_type
+    _log_blocked(tenant_id, result.matches)
+    return BLOCKED_RESPONSE, "filtered"
+
+
+def _log_blocked(tenant_id: str | None, matches: list[GuardrailMatch]) -> None:
+    logger.info("guardrail blocked reply for tenant %s: %s", tenant_id, sorted({m.rule for m in matches}))
+
+
+def _from_cache(value: str) -> tuple[str, str]:
+    """A cache hit is reported as "cached", except repeats of unanswered questions keep their reason."""
+    response_text, response_type = decode_cached_response(value)
+    return response_text, response_type if response_type in UNANSWERED_REASONS else "cached"
+
+
+class _CacheStore:
+    """Writes one computed response to L1 and Redis, unless the tenant's cache was invalidated meanwhile."""
+
+    def __init__(self, client: redis.Redis, cache_key: str, tenant_id: str) -> None:
+        self.client = client
+        self.cache_key = cache_key
+        self.tenant_id = tenant_id
+        self.prefix = tenant_cache_prefix(tenant_id)
+        self.local_generation = cache_generations.current(self.prefix)
+        self.redis_generation: str | None = None  # unknown until the Redis lookup succeeds
+
+    def is_current(self) -> bool:
+        return cache_generations.current(self.prefix) == self.local_generation
+
+    def local(self, value: str) -> None:
+        if self.is_current():
+            response_cache.set(self.cache_key, value)
+
+    async def save(self, response_text: str, response_type: str) -> None:
+        value = encode_cached_response(response_text, response_type)
+        self.local(value)
+        if self.redis_generation is None:
+            return
+        try:
+            await set_cached_response(self.client, self.cache_key, value, self.tenant_id, self.redis_generation)
+        except Exception:
+            pass  # Redis not available
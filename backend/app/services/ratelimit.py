@@ -1,46 +1,192 @@
 from __future__ import annotations
 
-from functools import wraps
+from dataclasses import dataclass
+from enum import Enum
 
-from fastapi import HTTPException, Request, status
 from redis import asyncio as redis
+from redis.commands.core import AsyncScript
 
 from app.core.config import settings
 
+# Keys per EVALSHA call; keeps one script run from stalling Redis on bulk replays.
+BATCH_CHUNK_SIZE = 500
 
-async def check_rate_limit(phone: str, limit: int = 10, window_seconds: int = 3600) -> bool:
+
+class RateLimitMode(str, Enum):
+    fixed_window = "fixed_window"
+    sliding_window = "sliding_window"
+    token_bucket = "token_bucket"
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after_ms: int
+
+
+# Check-and-consume for every key in KEYS in one round trip. Time comes from
+# the Redis server so all workers share one clock.
+# ARGV: mode, limit, window_ms, cost. Returns {allowed, remaining, retry_after_ms} per key, flattened.
+RATE_LIMIT_LUA = """
+local mode = ARGV[1]
+local limit = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local out = {}
+
+for _, key in ipairs(KEYS) do
+    local allowed = 0
+    local remaining = 0
+    local retry = 0
+
+    if mode == 'fixed_window' then
+        local current = tonumber(redis.call('GET', key) or '0')
+        if current + cost <= limit then
+            current = redis.call('INCRBY', key, cost)
+            -- TTL is only set when the window opens, so steady senders are released
+            if redis.call('PTTL', key) < 0 then
+                redis.call('PEXPIRE', key, window)
+            end
+            allowed = 1
+        else
+            retry = math.max(redis.call('PTTL', key), 0)
+        end
+        remaining = math.max(limit - current, 0)
+
+    elseif mode == 'sliding_window' then
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+        local count = redis.call('ZCARD', key)
+        if count + cost <= limit then
+            for i = 1, cost do
+                redis.call('ZADD', key, now, now .. '-' .. (count + i))
+            end
+            redis.call('PEXPIRE', key, window)
+            allowed = 1
+            remaining = limit - count - cost
+        else
+            remaining = math.max(limit - count, 0)
+            local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+            if oldest[2] then
+                retry = math.max(tonumber(oldest[2]) + window - now, 0)
+            end
+        end
+
+    else
+        local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or limit
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(limit, tokens + math.max(now - ts, 0) * limit / window)
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        else
+            retry = math.ceil((cost - tokens) * window / limit)
+        end
+        redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+        redis.call('PEXPIRE', key, window)
+        remaining = math.floor(tokens)
+    end
+
+    out[#out + 1] = allowed
+    out[#out + 1] = remaining
+    out[#out + 1] = retry
+end
+
+return out
+"""
+
+_rate_limit_script: AsyncScript | None = None
+
+
+def _get_script(client: redis.Redis) -> AsyncScript:
+    """Register the script once; redis-py runs it via EVALSHA and reloads on NOSCRIPT."""
+    global _rate_limit_script
+    if _rate_limit_script is None:
+        _rate_limit_script = client.register_script(RATE_LIMIT_LUA)
+    return _rate_limit_script
+
+
+def build_rate_limit_key(prefix: str, subject: str, mode: RateLimitMode) -> str:
+    # Each mode stores a different Redis type, so they must not share a key.
+    if mode == RateLimitMode.fixed_window:
+        return f"{prefix}:{subject}"
+    return f"{prefix}:{mode.value}:{subject}"
+
+
+def parse_rate_limit_reply(reply: list[int]) -> list[RateLimitResult]:
+    return [
+        RateLimitResult(allowed=bool(reply[i]), remaining=int(reply[i + 1]), retry_after_ms=int(reply[i + 2]))
+        for i in range(0, len(reply), 3)
+    ]
+
+
+async def evaluate_rate_limits(
+    client: redis.Redis,
+    keys: list[str],
+    limit: int,
+    window_seconds: int,
+    mode: RateLimitMode = RateLimitMode.fixed_window,
+    cost: int = 1,
+) -> list[RateLimitResult]:
+    """Atomically check and consume one hit for each key. Raises on Redis errors."""
+    script = _get_script(client)
+    results: list[RateLimitResult] = []
+    for start in range(0, len(keys), BATCH_CHUNK_SIZE):
+        chunk = keys[start:start + BATCH_CHUNK_SIZE]
+        reply = await script(keys=chunk, args=[mode.value, limit, window_seconds * 1000, cost], client=client)
+        results.extend(parse_rate_limit_reply(reply))
+    return results
+
+
+async def check_rate_limit(
+    client: redis.Redis,
+    phone: str,
+    limit: int = 10,
+    window_seconds: int = 3600,
+) -> bool:
     """Check if phone number is within rate limit. Returns True if allowed."""
-    client = redis.from_url(settings.redis_url, decode_responses=True)
-    key = f"ratelimit:{phone}"
-    
+    mode = RateLimitMode(settings.rate_limit_mode)
+    key = build_rate_limit_key("ratelimit", phone, mode)
+
     try:
-        current = await client.get(key)
-        if current and int(current) >= limit:
-            return False
-        
-        pipe = client.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, window_seconds)
-        await pipe.execute()
-        return True
+        [result] = await evaluate_rate_limits(client, [key], limit, window_seconds, mode)
+        return result.allowed
     except Exception:
         return True  # Fail open if Redis unavailable
 
 
-async def check_admin_rate_limit(user_id: str, limit: int = 100, window_seconds: int = 60) -> bool:
+async def check_rate_limit_batch(
+    client: redis.Redis,
+    phones: list[str],
+    limit: int = 10,
+    window_seconds: int = 3600,
+) -> dict[str, bool]:
+    """Check many phone numbers in one call (bulk replays). Returns phone -> allowed."""
+    mode = RateLimitMode(settings.rate_limit_mode)
+    keys = [build_rate_limit_key("ratelimit", phone, mode) for phone in phones]
+
+    try:
+        results = await evaluate_rate_limits(client, keys, limit, window_seconds, mode)
+        return {phone: result.allowed for phone, result in zip(phones, results)}
+    except Exception:
+        return {phone: True for phone in phones}
+
+
+async def check_admin_rate_limit(
+    client: redis.Redis,
+    user_id: str,
+    limit: int = 100,
+    window_seconds: int = 60,
+) -> bool:
     """Check admin API rate limit. Returns True if allowed."""
-    client = redis.from_url(settings.redis_url, decode_responses=True)
-    key = f"admin_ratelimit:{user_id}"
-    
+    mode = RateLimitMode(settings.admin_rate_limit_mode)
+    key = build_rate_limit_key("admin_ratelimit", user_id, mode)
+
     try:
-        current = await client.get(key)
-        if current and int(current) >= limit:
-            return False
-        
-        pipe = client.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, window_seconds)
-        await pipe.execute()
-        return True
+        [result] = await evaluate_rate_limits(client, [key], limit, window_seconds, mode)
+        return result.allowed
     except Exception:
         return True
@@ -1,58 +1,120 @@
 from __future__ import annotations
 
+import asyncio
+import uuid
 from dataclasses import dataclass
 
-from sqlalchemy import text
+import numpy as np
+from sqlalchemy import bindparam, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.vector import PgVector
+from app.services.tenants import tenant_registry
+
 
 @dataclass
 class RetrievedChunk:
+    id: uuid.UUID
     chunk_text: str
     distance: float
     title: str | None
     location: str | None
     tenant_name: str | None
+    contact_phone: str | None = None
+    contact_email: str | None = None
+    working_hours: str | None = None
 
 
+# A plain ordered scan of embeddings so the ANN index serves it; tenant
+# details come from the in-process tenant registry, not a join.
 RAG_SQL = """
 SELECT
+    e.id,
     e.chunk_text,
     e.embedding <=> :query_embedding AS distance,
-    n.title,
-    n.location,
-    t.name AS tenant_name
+    e.notice_title AS title,
+    e.location
 FROM embeddings e
-JOIN notices n ON e.notice_id = n.id
-JOIN tenants t ON e.tenant_id = t.id
 WHERE
-    n.publish_status = 'approved'
-    AND (n.validity_end IS NULL OR n.validity_end > NOW())
+    e.is_active
+    AND (e.validity_end IS NULL OR e.validity_end > NOW())
     AND e.tenant_id = :tenant_id
     AND (:location IS NULL OR e.location = :location)
-    AND t.is_active = TRUE
 ORDER BY e.embedding <=> :query_embedding
 LIMIT 5;
 """
 
+# Keeps the partial indexes small; retrieval also filters validity_end, so this only needs to run periodically.
+EXPIRE_EMBEDDINGS_SQL = """
+UPDATE embeddings
+SET is_active = FALSE
+WHERE is_active AND validity_end <= NOW();
+"""
+
+# Only one worker sweeps at a time; concurrent identical UPDATEs would just contend for row locks
+EXPIRY_LOCK_KEY = 0x5A5A0006
+
+rag_statement = text(RAG_SQL).bindparams(bindparam("query_embedding", type_=PgVector(1536)))
+
+
+async def configure_ann_search(session: AsyncSession) -> None:
+    """Set ANN recall for the current transaction (set_config(..., true) is SET LOCAL with bind params)."""
+    if settings.vector_index_type == "ivfflat":
+        name, value = "ivfflat.probes", settings.ivfflat_probes
+    else:
+        name, value = "hnsw.ef_search", settings.hnsw_ef_search
+    await session.execute(text("SELECT set_config(:name, :value, true)"), {"name": name, "value": str(value)})
+
 
 async def retrieve_chunks(
     session: AsyncSession,
     tenant_id: str,
-    query_embedding: list[float],
+    query_embedding: np.ndarray,
     location: str | None,
 ) -> list[RetrievedChunk]:
+    await configure_ann_search(session)
+    tenant = tenant_registry.get(tenant_id)
     result = await session.execute(
-        text(RAG_SQL),
+        rag_statement,
         {"tenant_id": tenant_id, "location": location, "query_embedding": query_embedding},
     )
     return [
         RetrievedChunk(
+            id=row.id,
             chunk_text=row.chunk_text,
             distance=row.distance,
             title=row.title,
             location=row.location,
-            tenant_name=row.tenant_name,
+            tenant_name=tenant.name if tenant else None,
+            contact_phone=tenant.contact_phone if tenant else None,
+            contact_email=tenant.contact_email if tenant else None,
+            working_hours=tenant.working_hours if tenant else None,
         )
         for row in result.mappings()
     ]
+
+
+async def deactivate_expired_embeddings(session: AsyncSession) -> int:
+    """Run one sweep, or do nothing if another worker is already sweeping."""
+    locked = (await session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": EXPIRY_LOCK_KEY})).scalar()
+    if not locked:
+        await session.rollback()
+        return 0
+    result = await session.execute(text(EXPIRE_EMBEDDINGS_SQL))
+    await session.commit()
+    return result.rowcount
+
+
+async def run_expiry_sweeper(interval_seconds: float) -> None:
+    """Flip expired notices' embeddings out of the active indexes. Runs in the worker."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await deactivate_expired_embeddings(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # Database not available
+        await asyncio.sleep(interval_seconds)
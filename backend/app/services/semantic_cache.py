@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.core.config import settings
+
+
+@dataclass
+class SemanticHit:
+    response: str
+    similarity: float
+
+
+@dataclass
+class _Scope:
+    """Ring buffer of recent normalized query embeddings and their responses."""
+
+    vectors: np.ndarray
+    expires_at: np.ndarray
+    responses: list[str | None] = field(default_factory=list)
+    size: int = 0
+    cursor: int = 0
+
+
+class SemanticResponseCache:
+    """Nearest-neighbour response cache over query embeddings, per tenant/location/language."""
+
+    def __init__(self, threshold: float, max_entries_per_scope: int, ttl_seconds: float, max_scopes: int = 1024) -> None:
+        self.threshold = threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl_seconds = ttl_seconds
+        self.max_scopes = max_scopes
+        self._scopes: OrderedDict[str, _Scope] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray | None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def lookup(self, scope_key: str, embedding: np.ndarray) -> SemanticHit | None:
+        scope = self._scopes.get(scope_key)
+        query = self._normalize(embedding)
+        if scope is None or scope.size == 0 or query is None or query.shape[0] != scope.vectors.shape[1]:
+            self.misses += 1
+            return None
+        similarities = scope.vectors[:scope.size] @ query
+        similarities[scope.expires_at[:scope.size] < time.monotonic()] = -1.0
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            self.misses += 1
+            return None
+        self._scopes.move_to_end(scope_key)
+        self.hits += 1
+        return SemanticHit(response=scope.responses[best], similarity=similarity)
+
+    def add(self, scope_key: str, embedding: np.ndarray, response: str) -> None:
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        scope = self._scopes.get(scope_key)
+        if scope is None or scope.vectors.shape[1] != vector.shape[0]:
+            scope = _Scope(
+                vectors=np.zeros((self.max_entries_per_scope, vector.shape[0]), dtype=np.float32),
+                expires_at=np.zeros(self.max_entries_per_scope, dtype=np.float64),
+                responses=[None] * self.max_entries_per_scope,
+            )
+            self._scopes[scope_key] = scope
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        slot = scope.cursor
+        scope.vectors[slot] = vector
+        scope.expires_at[slot] = time.monotonic() + self.ttl_seconds
+        scope.responses[slot] = response
+        scope.cursor = (slot + 1) % self.max_entries_per_scope
+        scope.size = min(scope.size + 1, self.max_entries_per_scope)
+        self._scopes.move_to_end(scope_key)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        stale = [key for key in self._scopes if key.startswith(prefix)]
+        for key in stale:
+            del self._scopes[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._scopes.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "scopes": len(self._scopes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+semantic_cache = SemanticResponseCache(
+    threshold=settings.semantic_cache_threshold,
+    max_entries_per_scope=settings.semantic_cache_max_entries,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+)
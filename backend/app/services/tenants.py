@@ -1,16 +1,157 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 
-DEPARTMENT_TO_TENANT = {
-    "health": "health-dept-tenant-id",
-    "electricity": "electricity-dept-tenant-id",
-    "water": "water-dept-tenant-id",
-    "municipality": "municipality-tenant-id",
-}
+from redis import asyncio as redis
+from sqlalchemy import select
 
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import Tenant, TenantKeyword
+from app.services.intent import DEPARTMENT_KEYWORDS, KeywordMatcher, set_keyword_matcher
 
-def map_department_to_tenant(department: str | None) -> str:
-    """Map department name to tenant ID. Returns default if not found."""
-    if not department:
-        return "default-tenant-id"
-    return DEPARTMENT_TO_TENANT.get(department, "default-tenant-id")
+logger = logging.getLogger(__name__)
+
+TENANT_REGISTRY_CHANNEL = "tenants:changed"
+
+
+@dataclass(frozen=True)
+class TenantInfo:
+    id: uuid.UUID
+    name: str
+    type: str
+    department: str | None
+    is_active: bool
+    allowed_source_types: frozenset[str] | None
+    contact_phone: str | None = None
+    contact_email: str | None = None
+    office_address: str | None = None
+    working_hours: str | None = None
+    keywords: dict[str, frozenset[str]] = field(default_factory=dict)
+
+    def allows_source_type(self, source_type: str) -> bool:
+        return self.allowed_source_types is None or source_type in self.allowed_source_types
+
+
+class TenantRegistry:
+    """In-process snapshot of the tenants table for I/O-free lookups on hot paths.
+
+    ``refresh`` builds new maps and swaps them in whole, so readers never
+    see a half-loaded registry. It also rebuilds the intent keyword matcher
+    from the built-in keywords plus each active tenant's keywords for its
+    own department.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[str, TenantInfo] = {}
+        self._by_department: dict[str, TenantInfo] = {}
+        self.loaded = False
+
+    async def refresh(self) -> None:
+        async with AsyncSessionLocal() as session:
+            tenants = list((await session.execute(select(Tenant))).scalars())
+            keyword_rows = (
+                await session.execute(select(TenantKeyword.tenant_id, TenantKeyword.department, TenantKeyword.keyword))
+            ).all()
+        self.load(tenants, keyword_rows)
+
+    def load(self, tenants: Iterable[Tenant], keyword_rows: Iterable[tuple[uuid.UUID, str, str]]) -> None:
+        """Replace the snapshot with these tenant rows and (tenant_id, department, keyword) rows."""
+        keywords: dict[uuid.UUID, dict[str, set[str]]] = {}
+        for tenant_id, department, keyword in keyword_rows:
+            keywords.setdefault(tenant_id, {}).setdefault(department, set()).add(keyword)
+
+        by_id: dict[str, TenantInfo] = {}
+        by_department: dict[str, TenantInfo] = {}
+        for tenant in tenants:
+            info = TenantInfo(
+                id=tenant.id,
+                name=tenant.name,
+                type=tenant.type.value,
+                department=tenant.department,
+                is_active=tenant.is_active is not False,
+                allowed_source_types=(
+                    frozenset(tenant.allowed_source_types) if tenant.allowed_source_types is not None else None
+                ),
+                contact_phone=tenant.contact_phone,
+                contact_email=tenant.contact_email,
+                office_address=tenant.office_address,
+                working_hours=tenant.working_hours,
+                keywords={dept: frozenset(words) for dept, words in keywords.get(tenant.id, {}).items()},
+            )
+            by_id[str(tenant.id)] = info
+            if info.department and info.is_active:
+                by_department[info.department] = info
+
+        matcher_keywords = {department: set(words) for department, words in DEPARTMENT_KEYWORDS.items()}
+        for info in by_department.values():
+            # Only keywords for the department the tenant serves route traffic
+            words = info.keywords.get(info.department, frozenset())
+            matcher_keywords.setdefault(info.department, set()).update(words)
+        set_keyword_matcher(KeywordMatcher(matcher_keywords))
+
+        self._by_id, self._by_department = by_id, by_department
+        self.loaded = True
+
+    def get(self, tenant_id: str | uuid.UUID | None) -> TenantInfo | None:
+        if not tenant_id:
+            return None
+        info = self._by_id.get(str(tenant_id))
+        if info is None and isinstance(tenant_id, str):
+            try:
+                info = self._by_id.get(str(uuid.UUID(tenant_id)))  # non-canonical spelling
+            except ValueError:
+                return None
+        return info
+
+    def for_department(self, department: str | None) -> TenantInfo | None:
+        return self._by_department.get(department) if department else None
+
+
+tenant_registry = TenantRegistry()
+
+
+def map_department_to_tenant(department: str | None) -> str | None:
+    """Tenant ID serving the department, or DEFAULT_TENANT_ID (None if unset or blank) when no active tenant does."""
+    tenant = tenant_registry.for_department(department)
+    return str(tenant.id) if tenant else settings.default_tenant_id or None
+
+
+async def publish_tenant_change(client: redis.Redis) -> None:
+    """Tell every process to reload the registry after tenants or their keywords changed."""
+    await client.publish(TENANT_REGISTRY_CHANNEL, "reload")
+
+
+async def run_tenant_registry_listener(client: redis.Redis) -> None:
+    """Keep the registry current. Runs for the app lifetime.
+
+    Reloads on startup, on every change notification, after each reconnect
+    and every ``tenant_registry_refresh_seconds`` (edits made directly in
+    the database publish nothing).
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(TENANT_REGISTRY_CHANNEL)
+                await tenant_registry.refresh()  # Changes published while disconnected were missed
+                next_refresh = loop.time() + settings.tenant_registry_refresh_seconds
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message or loop.time() >= next_refresh:
+                        await tenant_registry.refresh()
+                        next_refresh = loop.time() + settings.tenant_registry_refresh_seconds
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("tenant registry refresh failed; keeping the current snapshot", exc_info=True)
+            try:
+                if not tenant_registry.loaded:
+                    await tenant_registry.refresh()  # Redis down should not leave the registry empty
+            except Exception:
+                pass  # Database not available
+            await asyncio.sleep(5)
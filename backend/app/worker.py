@@ -0,0 +1,178 @@
+"""Background worker: ``python -m app.worker``.
+
+Claims queued notice ingestion jobs from Postgres, runs OCR (in a process
+pool) → chunking → embedding, bulk-writes the embeddings via COPY, marks
+the notice approved, then invalidates the tenant's cached answers.
+
+Also claims queued broadcasts and fans them out to WhatsApp under the
+provider rate limit, checkpointing progress after every batch, and drains
+delivery status callbacks from the Redis stream into Postgres, and
+periodically merges new query logs into the analytics rollups and clusters
+new unanswered queries for the gap report. Embeddings of expired notices
+are swept out of the active indexes here as well.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+from pathlib import Path
+
+from redis import asyncio as redis
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine
+from app.models import Notice
+from app.models.tables import IngestionState, NoticeStatus
+from app.services.analytics import run_rollup_scheduler
+from app.services.broadcast import claim_broadcast, fail_broadcast, run_broadcast
+from app.services.cache import close_redis_pool, init_redis_pool, invalidate_tenant_cache
+from app.services.clustering import run_clustering_loop
+from app.services.delivery import run_delivery_flusher
+from app.services.ingestion import iter_notice_embeddings, load_chunk_hashes, write_notice_embeddings
+from app.services.jobs import ClaimedJob, claim_ingestion_job, fail_job, set_job_state, touch_job
+from app.services.llm import close_http_client
+from app.services.messaging import close_twilio_client
+from app.services.ocr import close_ocr_stage
+from app.services.retrieval import run_expiry_sweeper
+
+logger = logging.getLogger(__name__)
+
+
+async def load_original_file(notice: Notice) -> bytes | None:
+    if not notice.original_file_path:
+        return None
+    path = Path(notice.original_file_path)
+    if not path.exists():
+        return None
+    return await asyncio.to_thread(path.read_bytes)
+
+
+async def _heartbeat(job: ClaimedJob) -> None:
+    """Keep the claim alive through long stages so other workers do not reclaim it."""
+    while True:
+        await asyncio.sleep(settings.ingestion_stale_after_seconds / 3)
+        try:
+            async with AsyncSessionLocal() as session:
+                await touch_job(session, job.id)
+        except Exception:
+            pass  # Database not available; retry on next beat
+
+
+async def run_job(job: ClaimedJob, redis_client: redis.Redis) -> None:
+    async with AsyncSessionLocal() as session, AsyncSessionLocal() as progress:
+        async def report(state: IngestionState) -> None:
+            await set_job_state(progress, job.id, state)
+
+        notice = await session.get(Notice, job.notice_id)
+        if notice is None:
+            raise LookupError(f"notice {job.notice_id} not found")
+        known_hashes = await load_chunk_hashes(session, notice.id)
+        await session.commit()  # Release the connection while OCR runs
+
+        file_content = await load_original_file(notice)
+        rows = iter_notice_embeddings(notice, file_content, on_stage=report, known_hashes=known_hashes)
+        # Readers see either the old or the new chunk set
+        stats = await write_notice_embeddings(notice.id, rows)
+        notice.publish_status = NoticeStatus.approved
+        await session.commit()
+        logger.info(
+            "indexed notice %s: %d chunks (%d reused) in %.2fs (%.0f rows/s)",
+            job.notice_id, stats.rows, stats.reused, stats.seconds, stats.rows_per_second,
+        )
+        await report(IngestionState.indexed)
+
+    try:
+        await invalidate_tenant_cache(redis_client, str(job.tenant_id))
+    except Exception:
+        pass  # Redis not available; cached answers expire by TTL
+
+
+async def _run_claimed(job: ClaimedJob, redis_client: redis.Redis, slots: asyncio.Semaphore) -> None:
+    heartbeat = asyncio.create_task(_heartbeat(job))
+    try:
+        await run_job(job, redis_client)
+    except Exception as exc:
+        with contextlib.suppress(Exception):  # Database not available; stale heartbeat requeues it
+            async with AsyncSessionLocal() as session:
+                await fail_job(session, job, f"{type(exc).__name__}: {exc}")
+    finally:
+        heartbeat.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await heartbeat
+        slots.release()
+
+
+async def _ingestion_loop(redis_client: redis.Redis, concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+    running: set[asyncio.Task] = set()
+    try:
+        while True:
+            await slots.acquire()
+            try:
+                async with AsyncSessionLocal() as session:
+                    job = await claim_ingestion_job(session)
+            except Exception:
+                job = None  # Database not available
+            if job is None:
+                slots.release()
+                await asyncio.sleep(settings.ingestion_poll_interval_seconds)
+                continue
+            task = asyncio.create_task(_run_claimed(job, redis_client, slots))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        # Interrupted jobs keep their stale heartbeat and are reclaimed by another worker
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _broadcast_loop(redis_client: redis.Redis) -> None:
+    """One broadcast at a time per worker; the provider rate limit is shared anyway."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                claimed = await claim_broadcast(session)
+        except Exception:
+            claimed = None  # Database not available
+        if claimed is None:
+            await asyncio.sleep(settings.broadcast_poll_interval_seconds)
+            continue
+        try:
+            async with AsyncSessionLocal() as session:
+                broadcast = await run_broadcast(session, claimed.id, redis_client)
+            logger.info(
+                "broadcast %s: %d sent, %d failed", claimed.id, broadcast.sent_count, broadcast.failed_count,
+            )
+        except Exception as exc:
+            with contextlib.suppress(Exception):  # Database not available; stale heartbeat requeues it
+                async with AsyncSessionLocal() as session:
+                    await fail_broadcast(session, claimed, f"{type(exc).__name__}: {exc}")
+
+
+async def run_worker(concurrency: int | None = None) -> None:
+    redis_client = init_redis_pool()
+    try:
+        await asyncio.gather(
+            _ingestion_loop(redis_client, concurrency or settings.ingestion_worker_concurrency),
+            _broadcast_loop(redis_client),
+            run_delivery_flusher(redis_client, f"{socket.gethostname()}-{os.getpid()}"),
+            run_rollup_scheduler(),
+            run_clustering_loop(),
+            run_expiry_sweeper(settings.embedding_expiry_sweep_seconds),
+        )
+    finally:
+        await close_redis_pool()
+        await close_http_client()
+        await close_twilio_client()
+        close_ocr_stage()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(run_worker())
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.analytics import resolve_range, rollup_granularity, truncate_to_bucket
+from app.services.clustering import NUM_BANDS, band_hashes, estimate_similarity, minhash_signature, normalize_query
+
+
+def test_resolve_range_defaults_and_validates():
+    end = datetime(2026, 3, 8, 12, 30, tzinfo=timezone.utc)
+    assert resolve_range(None, end, default=timedelta(days=7)) == (end - timedelta(days=7), end)
+
+    start, _ = resolve_range(datetime(2026, 3, 1), end, default=timedelta(days=7))
+    assert start.tzinfo is timezone.utc
+
+    with pytest.raises(ValueError):
+        resolve_range(end, end - timedelta(hours=1), default=timedelta(days=7))
+
+
+def test_short_ranges_use_hourly_buckets():
+    start = datetime(2026, 3, 1, 9, 45, 12, tzinfo=timezone.utc)
+    assert rollup_granularity(start, start + timedelta(hours=48)) == "hour"
+    assert rollup_granularity(start, start + timedelta(days=3)) == "day"
+    assert truncate_to_bucket(start, "hour") == datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    assert truncate_to_bucket(start, "day") == datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def test_minhash_groups_near_duplicates_across_scripts():
+    schedule = minhash_signature("Garbage collection schedule?")
+    assert estimate_similarity(schedule, minhash_signature("garbage  collection schedule")) == 1.0
+    assert estimate_similarity(schedule, minhash_signature("garbage collection schedules")) >= 0.5
+    assert estimate_similarity(schedule, minhash_signature("power outage in ward 5")) < 0.2
+
+    hindi = minhash_signature("कचरा गाड़ी कब आएगी")
+    assert estimate_similarity(hindi, minhash_signature("कचरा गाड़ी कब आएगी?")) == 1.0
+    assert normalize_query("कचरा गाड़ी!") == "कचरा गाड़ी"
+
+
+def test_similar_queries_share_an_lsh_band():
+    left = band_hashes(minhash_signature("when is the vaccination camp"))
+    right = band_hashes(minhash_signature("when is vaccination camp"))
+    other = band_hashes(minhash_signature("property tax due date"))
+    assert len(left) == NUM_BANDS
+    assert set(left) & set(right)
+    assert not set(left) & set(other)
@@ -2,7 +2,7 @@ import pytest
 from httpx import ASGITransport, AsyncClient
 
 from app.main import app
-from app.services.cache import build_cache_key
+from app.services.cache import build_cache_key, close_redis_pool, get_redis_client, get_redis_pool_stats
 
 
 @pytest.mark.asyncio
@@ -21,7 +21,7 @@ async def test_webhook_whatsapp():
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         response = await client.post("/webhook/whatsapp", json=payload)
     assert response.status_code == 200
-    assert response.json()["status"] in {"fallback", "cached", "generated", "rag", "filtered", "rate_limited"}
+    assert response.json()["status"] in {"fallback", "cached", "generated", "rag", "filtered", "unavailable", "rate_limited"}
 
 
 @pytest.mark.asyncio
@@ -31,9 +31,19 @@ async def test_webhook_whatsapp_form():
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         response = await client.post("/webhook/whatsapp", data=payload)
     assert response.status_code == 200
-    assert response.json()["status"] in {"fallback", "cached", "generated", "rag", "filtered", "rate_limited"}
+    assert response.json()["status"] in {"fallback", "cached", "generated", "rag", "filtered", "unavailable", "rate_limited"}
 
 
 def test_cache_key_builder():
     cache_key = build_cache_key("tenant-1", "Ward 12", "abc123", "hi")
     assert cache_key == "cache:tenant-1:ward-12:abc123:hi"
+
+
+@pytest.mark.asyncio
+async def test_redis_client_is_shared_across_requests():
+    assert get_redis_client() is get_redis_client()
+    stats = get_redis_pool_stats()
+    assert stats["initialized"] is True
+    assert stats["max_connections"] > 0
+    await close_redis_pool()
+    assert get_redis_pool_stats()["initialized"] is False
@@ -0,0 +1,180 @@
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+from sqlalchemy.exc import DataError
+
+from app.core.config import settings
+from app.services import messaging
+from app.services.broadcast import ProviderRateLimiter, iter_broadcast_targets, send_whatsapp_broadcast
+from app.services import delivery
+from app.services.delivery import (
+    DELIVERY_DEAD_LETTER_STREAM,
+    DELIVERY_STREAM,
+    flush_delivery_events,
+    parse_status_callback,
+    record_status_callback,
+)
+
+
+def build_fake_twilio() -> tuple[FastAPI, list[str]]:
+    """Messages API that rejects numbers ending in 0 and throttles the first try for numbers ending in 1."""
+    fake = FastAPI()
+    attempts: list[str] = []
+
+    @fake.post("/2010-04-01/Accounts/{sid}/Messages.json")
+    async def messages(sid: str, request: Request):
+        form = await request.form()
+        to = form["To"]
+        attempts.append(to)
+        if to.endswith("0"):
+            return Response(status_code=400, content='{"code": 21211}')
+        if to.endswith("1") and attempts.count(to) == 1:
+            return Response(status_code=429)
+        return {"sid": f"SM{len(attempts)}", "status": "queued"}
+
+    return fake, attempts
+
+
+@pytest.fixture
+def fake_twilio(monkeypatch):
+    fake, attempts = build_fake_twilio()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-twilio")
+    monkeypatch.setattr(settings, "twilio_account_sid", "AC123")
+    monkeypatch.setattr(settings, "twilio_whatsapp_from", "+14155238886")
+    monkeypatch.setattr(settings, "broadcast_retry_backoff_seconds", 0.0)
+    monkeypatch.setattr(messaging, "_twilio_client", client)
+    return attempts
+
+
+@pytest.mark.asyncio
+async def test_broadcast_batch_retries_transient_and_counts_rejections(fake_twilio):
+    phones = ["+919800000001", "+919800000002", "+919800000010", "+919800000003"]
+    limiter = ProviderRateLimiter(None, rate_per_second=1000)
+
+    result = await send_whatsapp_broadcast(phones, "Camp tomorrow", limiter, max_concurrency=2)
+
+    assert (result.sent, result.failed) == (3, 1)
+    assert fake_twilio.count("whatsapp:+919800000001") == 2
+    assert fake_twilio.count("whatsapp:+919800000010") == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_rate_limiter_paces_locally_without_redis():
+    limiter = ProviderRateLimiter(None, rate_per_second=50)
+    started = time.perf_counter()
+    await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+    assert time.perf_counter() - started >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_provider_rate_limiter_falls_back_locally_when_redis_errors(caplog):
+    limiter = ProviderRateLimiter(fakeredis.FakeAsyncRedis(connected=False), rate_per_second=50)
+    started = time.perf_counter()
+    await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+    assert time.perf_counter() - started >= 0.19
+    assert sum("pacing locally" in record.message for record in caplog.records) == 1
+
+
+class FakeTargetSession:
+    """Answers keyset page queries from a sorted list of phone numbers."""
+
+    def __init__(self, phones: list[str]) -> None:
+        self.phones = phones
+        self.queries: list[str] = []
+
+    async def execute(self, statement, params):
+        self.queries.append(str(statement))
+        after = params.get("after")
+        page = [p for p in self.phones if after is None or p > after][:params["page_size"]]
+        return SimpleNamespace(scalars=lambda: iter(page))
+
+
+@pytest.mark.asyncio
+async def test_broadcast_targets_stream_in_keyset_pages():
+    phones = [f"+9198000000{i:02d}" for i in range(7)]
+    session = FakeTargetSession(phones)
+    tenant_id = str(uuid.uuid4())
+
+    streamed = [p async for p in iter_broadcast_targets(session, tenant_id, after=phones[1], page_size=2)]
+
+    assert streamed == phones[2:]
+    assert len(session.queries) == 3
+    assert "phone_number > :after" in session.queries[0]
+    assert "last_known_location" not in session.queries[0]
+
+
+def test_parse_status_callback_keeps_counted_broadcast_statuses():
+    broadcast_id = str(uuid.uuid4())
+    form = {"MessageSid": "SM1", "MessageStatus": "delivered", "To": "whatsapp:+919800000001"}
+
+    event = parse_status_callback(form, broadcast_id)
+
+    assert event == {
+        "broadcast_id": broadcast_id,
+        "message_sid": "SM1",
+        "phone_number": "+919800000001",
+        "status": "delivered",
+        "error_code": "",
+    }
+    assert parse_status_callback({**form, "MessageStatus": "sending"}, broadcast_id) is None
+    assert parse_status_callback(form, None) is None
+    assert parse_status_callback(form, "not-a-uuid") is None
+    assert parse_status_callback({**form, "To": "+91" + "9" * 30}, broadcast_id)["phone_number"] == "+91" + "9" * 17
+
+
+@pytest.mark.asyncio
+async def test_status_callback_is_buffered_on_redis_stream():
+    class FakeRedis:
+        def __init__(self) -> None:
+            self.entries = []
+
+        async def xadd(self, stream, fields, **kwargs):
+            self.entries.append((stream, fields))
+
+    client = FakeRedis()
+    event = parse_status_callback({"MessageSid": "SM2", "MessageStatus": "failed", "ErrorCode": "63016"}, str(uuid.uuid4()))
+
+    await record_status_callback(client, event)
+
+    assert client.entries == [(DELIVERY_STREAM, event)]
+
+
+@pytest.mark.asyncio
+async def test_status_callback_reports_failure_when_redis_and_database_are_down(monkeypatch):
+    async def database_down(session, events):
+        raise ConnectionRefusedError
+
+    monkeypatch.setattr(delivery, "write_delivery_events", database_down)
+    event = parse_status_callback({"MessageSid": "SM3", "MessageStatus": "read"}, str(uuid.uuid4()))
+    assert await record_status_callback(fakeredis.FakeAsyncRedis(connected=False), event) is False
+
+
+@pytest.mark.asyncio
+async def test_flush_dead_letters_entries_the_database_rejects(monkeypatch):
+    written = []
+
+    async def write(session, events):
+        if any(event["message_sid"] == "SM-BAD" for event in events):
+            raise DataError("INSERT", {}, ValueError("value too long"))
+        written.extend(event["message_sid"] for event in events)
+
+    monkeypatch.setattr(delivery, "write_delivery_events", write)
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    await client.xgroup_create(DELIVERY_STREAM, delivery.DELIVERY_GROUP, id="0", mkstream=True)
+    broadcast_id = str(uuid.uuid4())
+    for sid in ("SM1", "SM-BAD", "SM2"):
+        await client.xadd(DELIVERY_STREAM, {"broadcast_id": broadcast_id, "message_sid": sid, "status": "sent"})
+    await client.xadd(DELIVERY_STREAM, {"broadcast_id": "garbage", "message_sid": "SM4", "status": "sent"})
+
+    assert await flush_delivery_events(client, "worker-1") == 4
+
+    assert written == ["SM1", "SM2"]
+    dead = [fields["message_sid"] for _, fields in await client.xrange(DELIVERY_DEAD_LETTER_STREAM)]
+    assert sorted(dead) == ["SM-BAD", "SM4"]
+    assert (await client.xpending(DELIVERY_STREAM, delivery.DELIVERY_GROUP))["pending"] == 0
@@ -0,0 +1,85 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.services.cache import (
+    CacheGenerations,
+    LocalResponseCache,
+    build_semantic_scope,
+    get_cached_response,
+    invalidate_tenant_cache,
+    set_cached_response,
+)
+from app.services.semantic_cache import SemanticResponseCache
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("cache:t1:all:a:en", "a")
+    cache.set("cache:t1:all:b:en", "b")
+    assert cache.get("cache:t1:all:a:en") == "a"
+    cache.set("cache:t2:all:c:en", "c")
+    assert cache.get("cache:t1:all:b:en") is None
+    assert cache.invalidate_prefix("cache:t1:") == 1
+    assert len(cache) == 1
+
+
+def test_local_cache_expires_entries():
+    cache = LocalResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set("k", "v", ttl_seconds=-1)
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_pipeline_once():
+    cache = LocalResponseCache(max_entries=10, ttl_seconds=60)
+    calls = 0
+
+    async def pipeline() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*(cache.single_flight("k", pipeline) for _ in range(500)))
+    assert calls == 1
+    assert set(results) == {"answer"}
+
+
+def test_semantic_cache_matches_rephrased_queries():
+    cache = SemanticResponseCache(threshold=0.9, max_entries_per_scope=4, ttl_seconds=60)
+    scope = build_semantic_scope("t1", "Ward 5", "en")
+    cache.add(scope, [1.0, 0.0, 0.1], "Camp on 12 March at PHC Ward 5")
+    hit = cache.lookup(scope, [0.9, 0.0, 0.12])
+    assert hit is not None and hit.response.startswith("Camp")
+    assert cache.lookup(scope, [0.0, 1.0, 0.0]) is None
+    assert cache.lookup(build_semantic_scope("t1", None, "en"), [1.0, 0.0, 0.1]) is None
+    assert cache.stats()["hit_rate"] == pytest.approx(1 / 3)
+    assert cache.invalidate_prefix("cache:t1:") == 1
+    assert cache.lookup(scope, [1.0, 0.0, 0.1]) is None
+
+
+@pytest.mark.asyncio
+async def test_store_started_before_invalidation_is_dropped():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    key = "cache:t1:all:abc:en"
+    _, generation = await get_cached_response(client, key, "t1")
+    assert await set_cached_response(client, key, "old answer", "t1", generation)
+
+    _, generation = await get_cached_response(client, key, "t1")
+    await invalidate_tenant_cache(client, "t1")  # a notice was re-published meanwhile
+    assert not await set_cached_response(client, key, "stale answer", "t1", generation)
+    assert await get_cached_response(client, key, "t1") == (None, "1")
+
+
+def test_cache_generations_change_on_invalidation():
+    generations = CacheGenerations()
+    before = generations.current("cache:t1:")
+    generations.invalidate_prefix("cache:t2:")
+    assert generations.current("cache:t1:") == before
+    generations.invalidate_prefix("cache:t1:")
+    assert generations.current("cache:t1:") != before
+    before = generations.current("cache:t1:")
+    generations.clear()
+    assert generations.current("cache:t1:") != before
@@ -0,0 +1,29 @@
+from app.services.guardrails import BLOCKED_RESPONSE, DEFAULT_FORBIDDEN_PHRASES, GuardrailScanner
+
+
+def test_scan_reports_every_rule_once_on_word_boundaries():
+    scanner = GuardrailScanner([*DEFAULT_FORBIDDEN_PHRASES, "इलाज"])
+    matches = scanner.scan("I THINK you\nhave dengue; इलाज  is probably free. Improbably fine.")
+    assert [m.rule for m in matches] == ["i think", "you have", "इलाज", "probably"]
+
+    result = scanner.check("Camp on 12 March at PHC Ward 5.")
+    assert result.is_safe and result.matches == []
+    assert scanner.check("You have covid").response == BLOCKED_RESPONSE
+
+
+def test_incremental_check_catches_phrases_split_across_tokens():
+    guardrail = GuardrailScanner(DEFAULT_FORBIDDEN_PHRASES).incremental()
+    assert guardrail.feed("The camp is on Monday. It mig") == []
+    assert guardrail.feed("ht be") == []  # could still continue as "might bet..."
+    [match] = guardrail.feed(" moved.")
+    assert match.rule == "might be"
+    assert guardrail.feed(" Probably") == []
+    assert [m.rule for m in guardrail.close()] == ["probably"]
+    assert [m.rule for m in guardrail.matches] == ["might be", "probably"]
+
+
+def test_incremental_check_ignores_words_that_only_start_like_a_rule():
+    guardrail = GuardrailScanner(["tap"]).incremental()
+    assert guardrail.feed("Water tap") == []
+    assert guardrail.feed("estry") == []
+    assert guardrail.close() == []
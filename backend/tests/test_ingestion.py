@@ -0,0 +1,132 @@
+import struct
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.db.vector import decode_vector, encode_vector
+from app.models import Notice
+from app.models.tables import FileType, IngestionState
+from app.services.chunking import iter_chunks
+from app.services import ingestion
+from app.services.ingestion import BulkWriteStats, chunk_hash, process_notice_upload
+from app.services.ocr import OcrStage
+
+
+def make_notice(content: str, file_type: FileType = FileType.text) -> Notice:
+    return Notice(id=uuid.uuid4(), tenant_id=uuid.uuid4(), title="Camp", content=content, file_type=file_type, location="Ward 5")
+
+
+@pytest.mark.asyncio
+async def test_process_notice_upload_reports_stages():
+    stages = []
+
+    async def on_stage(state: IngestionState) -> None:
+        stages.append(state)
+
+    rows = await process_notice_upload(make_notice("Vaccination camp on 12 March.\n\nBring ID."), on_stage=on_stage)
+    assert stages == [IngestionState.chunking, IngestionState.embedding]
+    assert [row["chunk_index"] for row in rows] == [0, 1]
+    assert rows[0]["location"] == "Ward 5"
+
+
+def test_encode_vector_matches_pgvector_binary_format():
+    encoded = encode_vector([1.0, -2.0])
+    assert encoded == struct.pack(">HH", 2, 0) + struct.pack(">ff", 1.0, -2.0)
+    assert encode_vector("[1,-2]") == encoded
+    assert decode_vector(encoded).tolist() == [1.0, -2.0]
+    assert encode_vector(np.array([1.0, -2.0], dtype=np.float32)) == encoded
+
+
+def test_bulk_write_stats_rows_per_second():
+    assert BulkWriteStats(rows=5000, seconds=2.0).rows_per_second == 2500
+
+
+def test_iter_chunks_splits_on_danda_and_packs_by_token_count():
+    text = "पहला वाक्य यहाँ है। दूसरा वाक्य यहाँ है। तीसरा वाक्य यहाँ है।"
+    assert list(iter_chunks([text], max_tokens=8)) == [
+        "पहला वाक्य यहाँ है। दूसरा वाक्य यहाँ है।",
+        "तीसरा वाक्य यहाँ है।",
+    ]
+
+
+def test_iter_chunks_streams_paragraphs_across_segments_with_overlap():
+    segments = ["One two. Three four.", " Five six.\n", "\nSeven."]
+    assert list(iter_chunks(segments, max_tokens=4, overlap_tokens=2)) == [
+        "One two. Three four.",
+        "Three four. Five six.",
+        "Seven.",
+    ]
+
+
+def test_iter_chunks_hard_wraps_oversized_sentences():
+    chunks = list(iter_chunks([" ".join(["word"] * 25)], max_tokens=10))
+    assert [len(chunk.split()) for chunk in chunks] == [10, 10, 5]
+
+
+@pytest.mark.asyncio
+async def test_reingestion_only_embeds_changed_chunks(monkeypatch):
+    embedded = []
+
+    async def fake_generate_embeddings(texts):
+        embedded.extend(texts)
+        return [np.ones(3, dtype=np.float32) for _ in texts]
+
+    monkeypatch.setattr(ingestion, "generate_embeddings", fake_generate_embeddings)
+    notice = make_notice("Camp on 12 March.\n\nBring ID.\n\nBring ID.\n\nVenue: school.")
+    known = {chunk_hash("Camp on 12 March."), chunk_hash("Venue: school.")}
+
+    rows = [row async for row in ingestion.iter_notice_embeddings(notice, known_hashes=known)]
+
+    assert embedded == ["Bring ID."]
+    assert [(row["chunk_index"], row["embedding"] is None) for row in rows] == [(0, True), (1, False), (2, True)]
+
+
+def fake_ocr(page: bytes) -> str:
+    return page.decode()
+
+
+def slow_ocr(page: bytes) -> str:
+    time.sleep(0.5)
+    return ""
+
+
+@pytest.mark.asyncio
+async def test_image_notice_streams_ocr_pages_into_chunks(monkeypatch):
+    stage = OcrStage(fake_ocr, ThreadPoolExecutor(max_workers=2), timeout_seconds=5)
+    monkeypatch.setattr(ingestion, "get_ocr_stage", lambda: stage)
+    notice = make_notice("Flood advisory.", file_type=FileType.png)
+    stages = []
+
+    async def on_stage(state: IngestionState) -> None:
+        stages.append(state)
+
+    rows = await process_notice_upload(notice, file_content=b"Move to higher ground.", on_stage=on_stage)
+
+    assert [row["chunk_text"] for row in rows] == ["Flood advisory.", "Move to higher ground."]
+    assert notice.ocr_processed is True
+    assert stages == [IngestionState.ocr, IngestionState.chunking, IngestionState.embedding]
+    stage.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_sentences_continue_across_ocr_pages(monkeypatch):
+    stage = OcrStage(fake_ocr, ThreadPoolExecutor(max_workers=2), timeout_seconds=5)
+    monkeypatch.setattr(ingestion, "get_ocr_stage", lambda: stage)
+    monkeypatch.setattr("app.services.ocr.split_pages", lambda content: content.split(b"|"))
+    notice = make_notice("Flood advisory.", file_type=FileType.png)
+
+    rows = await process_notice_upload(notice, file_content=b"Relief camp at the|school until Friday.")
+
+    assert [row["chunk_text"] for row in rows] == ["Flood advisory.", "Relief camp at the\nschool until Friday."]
+    stage.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_ocr_stage_times_out():
+    stage = OcrStage(slow_ocr, ThreadPoolExecutor(max_workers=1), timeout_seconds=0.05)
+    with pytest.raises(TimeoutError):
+        [page async for page in stage.iter_pages(b"\x01")]
+    stage.shutdown()
@@ -0,0 +1,25 @@
+from app.services.intent import KeywordMatcher, classify_intent
+
+
+def test_strongest_department_wins_regardless_of_order():
+    result = classify_intent("Water supply cut and a power issue")
+    assert result.department == "water"
+    assert result.matched_keywords == {"water", "supply"}
+    assert result.scores == {"water": 2, "electricity": 1}
+
+
+def test_keywords_match_whole_words_only():
+    assert classify_intent("the tapestry exhibition").department is None
+    assert classify_intent("Tap broken!").department == "water"
+
+
+def test_phrases_and_indic_keywords():
+    matcher = KeywordMatcher({
+        "water": {"पानी", "water"},
+        "electricity": {"bijli", "power cut", "power"},
+    })
+    assert matcher.classify("पानी नहीं आ रहा").department == "water"
+    assert matcher.classify("पानीपुरी").department is None
+    result = matcher.classify("power  cut since morning, water fine")
+    assert result.matched_keywords == {"power cut"}
+    assert result.department == "electricity"
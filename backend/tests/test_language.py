@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import language
+from app.services.language import detect_user_language, identify_language
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("पानी कब आएगा?", "hi"),
+        ("தண்ணீர் எப்போது வரும்", "ta"),
+        ("ನೀರು ಯಾವಾಗ ಬರುತ್ತದೆ", "kn"),
+        ("Ward 12 में पानी नहीं", "hi"),
+        ("when will power come back in ward 5", "en"),
+        ("subah se bijli nahi hai", "hi-Latn"),
+        ("current eppo varum enga theruvil", "ta-Latn"),
+    ],
+)
+def test_identifies_script_and_romanized_languages(text, expected):
+    detected, confident = identify_language(text)
+    assert (detected, confident) == (expected, True)
+
+
+def test_short_latin_text_is_not_confident():
+    assert identify_language("ok")[1] is False
+    assert identify_language("12") == ("en", False)
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_messages_reuse_the_senders_language(monkeypatch):
+    lookups = []
+
+    async def load(phone):
+        lookups.append(phone)
+        return "ta"
+
+    monkeypatch.setattr(language, "_query_preferred_language", load)
+    language.language_memo.clear()
+
+    assert await detect_user_language("+911", "ok") == "ta"
+    assert await detect_user_language("+911", "thanks") == "ta"
+    assert lookups == ["+911"]
+
+    assert await detect_user_language("+911", "पानी कब आएगा?") == "hi"
+    assert await detect_user_language("+911", "ok") == "hi"
+    assert lookups == ["+911"]
+
+
+@pytest.mark.asyncio
+async def test_slow_preference_lookup_falls_back_to_the_guess(monkeypatch):
+    async def slow(phone):
+        await asyncio.sleep(1)
+        return "ta"
+
+    monkeypatch.setattr(language, "_query_preferred_language", slow)
+    monkeypatch.setattr(language.settings, "language_lookup_timeout_ms", 10)
+    language.language_memo.clear()
+
+    started = time.perf_counter()
+    assert await detect_user_language("+912", "ok") == "en"
+    assert time.perf_counter() - started < 0.5
+    assert language.language_memo.get("+912") is None  # looked up again next time
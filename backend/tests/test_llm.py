@@ -0,0 +1,249 @@
+import asyncio
+import base64
+import json
+import time
+import uuid
+from dataclasses import replace
+
+import fakeredis
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request, Response
+
+from app.core.config import settings
+from app.services import llm, query
+from app.services.budget import LatencyBudget
+from app.services.cache import build_cache_key
+from app.services.extractive import build_extractive_answer, is_decisive
+from app.services.query import generate_answer
+from app.services.retrieval import RetrievedChunk
+
+
+def build_fake_embedding_server(fail_first: int = 0) -> tuple[FastAPI, list[list[str]]]:
+    """OpenAI-compatible /embeddings that records each batch and can fail the first N calls."""
+    fake = FastAPI()
+    batches: list[list[str]] = []
+
+    @fake.post("/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        if len(batches) < fail_first:
+            batches.append([])
+            return Response(status_code=503)
+        batches.append(body["input"])
+        vectors = [np.array([len(text), 1.0], dtype="<f4") for text in body["input"]]
+        if body.get("encoding_format") == "base64":
+            data = [base64.b64encode(vector.tobytes()).decode() for vector in vectors]
+        else:
+            data = [vector.tolist() for vector in vectors]
+        return {"data": [{"index": i, "embedding": embedding} for i, embedding in enumerate(data)]}
+
+    return fake, batches
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    def install(fail_first: int = 0) -> list[list[str]]:
+        fake, batches = build_fake_embedding_server(fail_first)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-llm")
+        monkeypatch.setattr(settings, "llm_api_base_url", "http://fake-llm")
+        monkeypatch.setattr(settings, "embedding_retry_backoff_seconds", 0.0)
+        monkeypatch.setattr(llm, "_http_client", client)
+        return batches
+
+    return install
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batches_and_coalesces(fake_provider, monkeypatch):
+    batches = fake_provider()
+    monkeypatch.setattr(llm, "embedding_batcher", llm.EmbeddingBatcher(batch_size=4, max_concurrency=2, max_wait_seconds=0.01))
+
+    first, second = await asyncio.gather(
+        llm.generate_embeddings(["a", "bb", "ccc", "dddd", "eeeee"]),
+        llm.generate_embeddings(["bb", "ffffff"]),
+    )
+    assert [v[0] for v in first] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert [v[0] for v in second] == [2.0, 6.0]
+    sent = [text for batch in batches for text in batch]
+    assert sorted(sent) == ["a", "bb", "ccc", "dddd", "eeeee", "ffffff"]
+    assert all(len(batch) <= 4 for batch in batches)
+
+
+@pytest.mark.asyncio
+async def test_batcher_survives_cancelled_callers_and_short_replies(monkeypatch):
+    replies: list[int] = []
+
+    async def provider(texts):
+        await asyncio.sleep(0.02)
+        count = replies.pop(0) if replies else len(texts)
+        return [np.array([len(text)], dtype=np.float32) for text in texts][:count]
+
+    monkeypatch.setattr(llm, "_request_embeddings", provider)
+    batcher = llm.EmbeddingBatcher(batch_size=8, max_concurrency=2, max_wait_seconds=0.001)
+
+    cancelled = asyncio.create_task(batcher.embed(["abc"]))
+    survivor = asyncio.create_task(batcher.embed(["abc"]))
+    await asyncio.sleep(0.005)
+    cancelled.cancel()
+    assert [v[0] for v in await survivor] == [3.0]
+
+    replies.append(1)  # the provider drops one of two vectors
+    with pytest.raises(ValueError):
+        await batcher.embed(["x", "yy"])
+    assert not batcher._inflight
+    assert [v[0] for v in await batcher.embed(["yy"])] == [2.0]
+
+
+@pytest.mark.asyncio
+async def test_embedding_requests_retry_transient_errors(fake_provider):
+    batches = fake_provider(fail_first=2)
+    embedding = await llm.generate_embedding("abc")
+    assert embedding.dtype == np.float32
+    assert embedding.tolist() == [3.0, 1.0]
+    assert len(batches) == 3
+
+
+@pytest.mark.asyncio
+async def test_embeddings_parse_plain_float_lists(fake_provider, monkeypatch):
+    fake_provider()
+    monkeypatch.setattr(settings, "embedding_encoding_format", "float")
+    embedding = await llm.generate_embedding("ab")
+    assert embedding.dtype == np.float32
+    assert embedding.tolist() == [2.0, 1.0]
+
+
+def build_fake_chat_server(delay_seconds: float = 0.0) -> FastAPI:
+    """OpenAI-compatible streaming /chat/completions that waits ``delay_seconds`` before answering."""
+    fake = FastAPI()
+
+    @fake.post("/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        assert body["stream"] is True
+        await asyncio.sleep(delay_seconds)
+        tokens = ["Camp on ", "12 March ", "at PHC Ward 5."]
+        events = [json.dumps({"choices": [{"delta": {"content": token}}]}) for token in tokens]
+        content = "".join(f"data: {event}\n\n" for event in events) + "data: [DONE]\n\n"
+        return Response(content=content, media_type="text/event-stream")
+
+    return fake
+
+
+@pytest.fixture
+def fake_chat(monkeypatch):
+    def install(delay_seconds: float = 0.0) -> None:
+        fake = build_fake_chat_server(delay_seconds)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake), base_url="http://fake-llm")
+        monkeypatch.setattr(settings, "llm_api_base_url", "http://fake-llm")
+        monkeypatch.setattr(llm, "_http_client", client)
+
+    return install
+
+
+def make_chunk() -> RetrievedChunk:
+    return RetrievedChunk(
+        id=uuid.uuid4(),
+        chunk_text="Vaccination camp on 12 March at PHC Ward 5. Bring your Aadhaar card. Timings 9am to 4pm.",
+        distance=0.1,
+        title="Vaccination camp",
+        location="Ward 5",
+        tenant_name="Health Department",
+    )
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_within_budget(fake_chat):
+    fake_chat(delay_seconds=0.01)
+    budget = LatencyBudget(2.0)
+    text, response_type = await generate_answer([make_chunk()], "when is the camp", budget)
+    assert (text, response_type) == ("Camp on 12 March at PHC Ward 5.", "rag")
+    assert "generation" in budget.timings
+
+
+@pytest.mark.asyncio
+async def test_slow_generation_falls_back_to_extractive_answer(fake_chat, monkeypatch):
+    fake_chat(delay_seconds=1.0)
+    monkeypatch.setattr(settings, "generation_budget_ms", 100)
+    started = time.perf_counter()
+    text, response_type = await generate_answer([make_chunk()], "when is the camp", LatencyBudget(2.0))
+    assert time.perf_counter() - started < 0.5
+    assert response_type == "extractive_fallback"
+    assert text.startswith("Health Department - Vaccination camp: Vaccination camp on 12 March")
+
+
+def test_extractive_path_needs_a_close_and_clear_winner():
+    top = make_chunk()
+    runner_up = RetrievedChunk(uuid.uuid4(), "Other notice.", 0.3, None, None, None)
+    assert is_decisive([top, runner_up], max_distance=0.15, min_margin=0.05)
+    assert not is_decisive([top, replace(runner_up, distance=0.12)], max_distance=0.15, min_margin=0.05)
+    assert not is_decisive([replace(top, distance=0.2)], max_distance=0.15, min_margin=0.05)
+    assert not is_decisive([], max_distance=0.15, min_margin=0.05)
+
+
+def test_extractive_answer_includes_tenant_contact():
+    chunk = replace(make_chunk(), contact_phone="104", working_hours="9am-5pm")
+    answer = build_extractive_answer(chunk, max_chars=80)
+    assert answer == (
+        "Health Department - Vaccination camp: "
+        "Vaccination camp on 12 March at PHC Ward 5. Bring your Aadhaar card.\n"
+        "Contact: 104 (9am-5pm)"
+    )
+
+
+@pytest.mark.asyncio
+async def test_stub_embeddings_do_not_collide_in_the_semantic_cache(monkeypatch):
+    monkeypatch.setattr(settings, "llm_api_base_url", None)
+    camp, power, camp_again = [
+        await llm.generate_embedding(text) for text in ("vaccination camp date", "power cut", "vaccination camp date")
+    ]
+    assert np.array_equal(camp, camp_again)
+    assert float(camp @ power) < settings.semantic_cache_threshold
+
+
+@pytest.mark.asyncio
+async def test_retrieval_errors_are_not_cached(monkeypatch):
+    monkeypatch.setattr(settings, "llm_api_base_url", None)
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    tenant_id = str(uuid.uuid4())
+    cache_key = build_cache_key(tenant_id, None, "abc", "en")
+
+    async def database_down(*_):
+        raise ConnectionRefusedError
+
+    monkeypatch.setattr(query, "_retrieve", database_down)
+    text, response_type, _ = await query._answer_message(
+        client, cache_key, "camp?", tenant_id, None, "en", LatencyBudget(2.0)
+    )
+    assert response_type == "unavailable" and response_type in query.UNANSWERED_REASONS
+    assert query.response_cache.get(cache_key) is None
+    assert await client.get(cache_key) is None
+
+
+@pytest.mark.asyncio
+async def test_repeated_unanswered_questions_stay_unanswered(monkeypatch):
+    monkeypatch.setattr(settings, "llm_api_base_url", None)
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    tenant_id = str(uuid.uuid4())
+    cache_key = build_cache_key(tenant_id, None, "def", "en")
+
+    async def nothing_found(*_):
+        return []
+
+    monkeypatch.setattr(query, "_retrieve", nothing_found)
+    ask = lambda: query._answer_message(client, cache_key, "ferry timings?", tenant_id, None, "en", LatencyBudget(2.0))
+    first = await ask()
+    query.response_cache.invalidate_prefix(cache_key)  # next ask is served by Redis
+    again = await ask()
+    assert first[1] == again[1] == "fallback"
+    assert query._from_cache(query.response_cache.get(cache_key)) == (query.NO_INFORMATION_RESPONSE, "fallback")
+
+
+@pytest.mark.asyncio
+async def test_extractive_replies_pass_the_guardrails(fake_chat, monkeypatch):
+    fake_chat(delay_seconds=1.0)
+    monkeypatch.setattr(settings, "generation_budget_ms", 100)
+    leaky = replace(make_chunk(), chunk_text="Vaccination camp on 12 March, probably at PHC Ward 5.")
+    text, response_type = await generate_answer([leaky], "when is the camp", LatencyBudget(2.0))
+    assert (text, response_type) == (query.BLOCKED_RESPONSE, "filtered")
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.services.logging import QueryLogSink
+
+
+def make_sink(**overrides) -> tuple[QueryLogSink, list[int]]:
+    options = {"max_size": 100, "batch_size": 3, "flush_interval": 0.05, "put_timeout": 0.01, **overrides}
+    sink = QueryLogSink(**options)
+    flushed: list[int] = []
+
+    async def fake_flush(batch):
+        await asyncio.sleep(0.02)
+        flushed.append(len(batch))
+
+    sink._flush = fake_flush
+    return sink, flushed
+
+
+async def log_unanswered(sink: QueryLogSink, i: int) -> None:
+    await sink.log_unanswered_query(f"+91980000{i:04d}", None, "ration card", "hi", None, "no_verified_information")
+
+
+@pytest.mark.asyncio
+async def test_query_log_sink_batches_and_drains_on_close():
+    sink, flushed = make_sink()
+    sink.start()
+    for i in range(7):
+        await log_unanswered(sink, i)
+    await sink.close()
+    assert sum(flushed) == 7
+    assert max(flushed) <= 3
+    assert sink.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_query_log_sink_drops_after_bounded_wait_when_full():
+    sink, flushed = make_sink(max_size=2, batch_size=1)
+    sink.start()
+    for i in range(10):
+        await log_unanswered(sink, i)
+    await sink.close()
+    assert sink.dropped > 0
+    assert sum(flushed) + sink.dropped == 10
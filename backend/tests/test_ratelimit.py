@@ -0,0 +1,69 @@
+import fakeredis
+import pytest
+
+from app.services.ratelimit import (
+    RateLimitMode,
+    build_rate_limit_key,
+    check_rate_limit,
+    check_rate_limit_batch,
+    evaluate_rate_limits,
+    parse_rate_limit_reply,
+)
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+def test_rate_limit_keys_are_separated_by_mode():
+    assert build_rate_limit_key("ratelimit", "+123", RateLimitMode.fixed_window) == "ratelimit:+123"
+    assert build_rate_limit_key("ratelimit", "+123", RateLimitMode.token_bucket) == "ratelimit:token_bucket:+123"
+
+
+def test_parse_rate_limit_reply():
+    results = parse_rate_limit_reply([1, 9, 0, 0, 0, 1500])
+    assert [r.allowed for r in results] == [True, False]
+    assert results[1].retry_after_ms == 1500
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", list(RateLimitMode))
+async def test_script_allows_up_to_limit_then_reports_retry(redis_client, mode):
+    key = build_rate_limit_key("ratelimit", "+123", mode)
+    results = [
+        result
+        for _ in range(3)
+        for result in await evaluate_rate_limits(redis_client, [key], limit=2, window_seconds=60, mode=mode)
+    ]
+    assert [r.allowed for r in results] == [True, True, False]
+    assert [r.remaining for r in results] == [1, 0, 0]
+    assert 0 < results[2].retry_after_ms <= 60_000
+    assert 0 < await redis_client.pttl(key) <= 60_000
+
+
+@pytest.mark.asyncio
+async def test_script_counts_each_key_in_a_batch_separately(redis_client):
+    mode = RateLimitMode.sliding_window
+    keys = [build_rate_limit_key("ratelimit", phone, mode) for phone in ("+1", "+2")]
+    await evaluate_rate_limits(redis_client, keys[:1], limit=1, window_seconds=60, mode=mode)
+    results = await evaluate_rate_limits(redis_client, keys, limit=1, window_seconds=60, mode=mode)
+    assert [r.allowed for r in results] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_the_window(redis_client):
+    mode = RateLimitMode.token_bucket
+    key = build_rate_limit_key("ratelimit", "+123", mode)
+    await evaluate_rate_limits(redis_client, [key], limit=2, window_seconds=60, mode=mode, cost=2)
+    # Pretend the last refill was half a window ago: one of two tokens is back
+    await redis_client.hset(key, "ts", int(await redis_client.hget(key, "ts")) - 30_000)
+    [result] = await evaluate_rate_limits(redis_client, [key], limit=2, window_seconds=60, mode=mode)
+    assert result.allowed and result.remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_checks_fail_open_when_redis_errors():
+    broken = fakeredis.FakeAsyncRedis(connected=False)
+    assert await check_rate_limit(broken, "+1") is True
+    assert await check_rate_limit_batch(broken, ["+1", "+2"]) == {"+1": True, "+2": True}
@@ -0,0 +1,102 @@
+import asyncio
+import uuid
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.core.deps import get_tenant_id
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Tenant
+from app.models.tables import TenantType
+from app.schemas.webhook import WhatsAppWebhookRequest
+from app.services import intent, language, query
+from app.services.intent import classify_intent
+from app.services.tenants import map_department_to_tenant, tenant_registry
+
+
+def _tenant(name: str, department: str | None, is_active: bool = True, **fields) -> Tenant:
+    return Tenant(id=uuid.uuid4(), name=name, type=TenantType.government, department=department, is_active=is_active, **fields)
+
+
+@pytest.fixture
+def loaded_registry(monkeypatch):
+    for name in ("_by_id", "_by_department", "loaded"):
+        monkeypatch.setattr(tenant_registry, name, getattr(tenant_registry, name))
+    monkeypatch.setattr(intent, "_matcher", intent._matcher)
+    health = _tenant("Health Department", "health", allowed_source_types=["advisory"], contact_phone="104")
+    closed = _tenant("Old Water Board", "water", is_active=False)
+    tenant_registry.load(
+        [health, closed],
+        [(health.id, "health", "dengue"), (health.id, "water", "dengue tap"), (closed.id, "water", "borewell")],
+    )
+    return health, closed
+
+
+def test_departments_map_to_active_tenants_only(loaded_registry):
+    health, _ = loaded_registry
+    assert map_department_to_tenant("health") == str(health.id)
+    assert map_department_to_tenant("water") is None
+    assert map_department_to_tenant(None) is None
+
+    info = tenant_registry.get(str(health.id).upper())
+    assert info.contact_phone == "104"
+    assert info.allows_source_type("advisory") and not info.allows_source_type("official_notice")
+    assert tenant_registry.get("not-a-uuid") is None
+
+
+@pytest.mark.asyncio
+async def test_unrouted_questions_get_no_information_with_a_blank_default(loaded_registry, monkeypatch):
+    monkeypatch.setattr(settings, "default_tenant_id", "")  # DEFAULT_TENANT_ID= in .env
+    assert map_department_to_tenant("water") is None
+
+    async def retrieve(*_):
+        raise AssertionError("nothing to search without a tenant")
+
+    logged = []
+
+    async def put(model, row):
+        logged.append((model.__tablename__, row.get("reason")))
+
+    monkeypatch.setattr(query, "_retrieve", retrieve)
+    monkeypatch.setattr(query.query_log_sink, "_put", put)
+    monkeypatch.setattr(language, "_query_preferred_language", lambda phone: asyncio.sleep(0, "en"))
+    reply = await query.handle_whatsapp_message(
+        WhatsAppWebhookRequest(From="whatsapp:+913", Body="when does the borewell get fixed"),
+        fakeredis.FakeAsyncRedis(decode_responses=True),
+    )
+    assert (reply.status, reply.message) == ("fallback", query.NO_INFORMATION_RESPONSE)
+    assert ("unanswered_queries", "no_verified_information") in logged
+
+
+def test_reload_rebuilds_intent_keywords_from_active_tenants(loaded_registry):
+    assert classify_intent("dengue cases near school").department == "health"
+    assert classify_intent("borewell dry").department is None
+    # Keywords a tenant files under another department do not route anything
+    assert classify_intent("dengue tap").department == "health"
+
+
+@pytest.mark.asyncio
+async def test_keywords_can_only_be_set_for_own_department(loaded_registry):
+    health, _ = loaded_registry
+    headers = {"X-Tenant-Id": str(health.id), "Authorization": f"Bearer {create_access_token('admin')}"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.put("/api/keywords/water", json={"keywords": ["tap"]}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_get_tenant_id_checks_registry(loaded_registry, monkeypatch):
+    health, closed = loaded_registry
+    assert get_tenant_id(str(health.id).upper()) == str(health.id)
+    for header, code in [(None, 400), ("abc", 400), (str(uuid.uuid4()), 404), (str(closed.id), 403)]:
+        with pytest.raises(HTTPException) as error:
+            get_tenant_id(header)
+        assert error.value.status_code == code
+
+    monkeypatch.setattr(tenant_registry, "loaded", False)
+    with pytest.raises(HTTPException) as error:
+        get_tenant_id(str(health.id))
+    assert error.value.status_code == 503